@@ -0,0 +1,42 @@
+"""
+Geostrophic velocity computation
+================================
+
+:py:meth:`~py_eddy_tracker.dataset.grid.RegularGridDataset.add_uv` use a compiled kernel which
+compute u and v in one pass over the grid.
+We compare it with the previous method, which use several convolutions by direction.
+"""
+from datetime import datetime
+from py_eddy_tracker.dataset.grid import RegularGridDataset
+from py_eddy_tracker import data
+
+
+def timeit(func, *args, nb=5, **kwargs):
+    # first call to be sure that numba compilation is not count
+    result = func(*args, **kwargs)
+    t0 = datetime.now()
+    for _ in range(nb):
+        func(*args, **kwargs)
+    return result, (datetime.now() - t0).total_seconds() / nb
+
+
+def convolution_uv(g, h):
+    mode = "wrap" if g.is_circular() else "reflect"
+    return (
+        -g.compute_stencil(h, vertical=True),
+        g.compute_stencil(h, mode=mode),
+    )
+
+
+# %%
+for filename in (
+    "dt_med_allsat_phy_l4_20160515_20190101.nc",
+    "nrt_global_allsat_phy_l4_20190223_20190226.nc",
+):
+    g = RegularGridDataset(data.get_path(filename), "longitude", "latitude")
+    h = g.grid("adt")
+    (u_ref, v_ref), dt_ref = timeit(convolution_uv, g, h)
+    (u, v), dt = timeit(g.compute_uv_stencil, h)
+    print(f"{filename} : {h.shape}")
+    print(f"    convolution : {dt_ref * 1000:.1f} ms, fused kernel : {dt * 1000:.1f} ms")
+    print(f"    same mask : {(u.mask == u_ref.mask).all() and (v.mask == v_ref.mask).all()}")
@@ -0,0 +1,46 @@
+"""
+Import time
+===========
+
+Heavy dependencies are imported only when they are needed: zarr for
+``.zarr`` paths, pint to convert units and matplotlib to draw.
+We measure in a new interpreter the import time of modules used by short
+entry points, and list which heavy dependencies are loaded.
+"""
+import sys
+from subprocess import run
+
+HEAVY = ("zarr", "numcodecs", "pint", "matplotlib", "scipy", "netCDF4", "numba")
+
+CODE = """
+import sys
+from time import perf_counter
+t0 = perf_counter()
+import %s
+dt = perf_counter() - t0
+heavy = [name for name in %r if name in sys.modules]
+print(f"{dt:.2f} s, with {', '.join(heavy) if heavy else 'no heavy dependency'}")
+"""
+
+
+def import_time(module):
+    result = run(
+        [sys.executable, "-c", CODE % (module, HEAVY)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout.strip()
+
+
+# %%
+# Each import is done twice to have numba cache ready
+for module in (
+    "py_eddy_tracker",
+    "py_eddy_tracker.observations.observation",
+    "py_eddy_tracker.appli.eddies",
+    "py_eddy_tracker.appli.grid",
+    "py_eddy_tracker.appli.misc",
+):
+    import_time(module)
+    print(f"{module:>42} : {import_time(module)}")
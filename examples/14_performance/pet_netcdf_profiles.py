@@ -0,0 +1,51 @@
+"""
+Netcdf write profiles
+=====================
+
+:py:meth:`~py_eddy_tracker.observations.observation.EddiesObservations.write_file`
+could use several profiles of chunking and compression
+(:py:data:`~py_eddy_tracker.observations.observation.NETCDF_PROFILES`).
+We compare for each profile write time, file size, time to read all observations
+and time to read a small slice of observations.
+"""
+from datetime import datetime
+from os import path
+from tempfile import TemporaryDirectory
+from py_eddy_tracker.observations.observation import (
+    EddiesObservations,
+    NETCDF_PROFILES,
+)
+from py_eddy_tracker import data
+
+
+def timeit(func, *args, nb=3, **kwargs):
+    result = func(*args, **kwargs)
+    t0 = datetime.now()
+    for _ in range(nb - 1):
+        func(*args, **kwargs)
+    return result, (datetime.now() - t0).total_seconds() / max(nb - 1, 1)
+
+
+# %%
+# Build a dataset with 16 times observations of one day
+a = EddiesObservations.load_file(data.get_path("Anticyclonic_20190223.nc"))
+for _ in range(4):
+    a = a.merge(a)
+print(f"{len(a)} observations")
+
+# %%
+with TemporaryDirectory() as tmp:
+    for profile in NETCDF_PROFILES:
+        filename = path.join(tmp, f"{profile}.nc")
+        _, dt_write = timeit(a.write_file, filename=filename, profile=profile)
+        size = path.getsize(filename) / 2 ** 20
+        _, dt_read = timeit(EddiesObservations.load_file, filename)
+        _, dt_slice = timeit(
+            EddiesObservations.load_file,
+            filename,
+            indexs=dict(obs=slice(10000, 10100)),
+        )
+        print(
+            f"{profile:>14} : write {dt_write:.2f} s, {size:.1f} Mo, "
+            f"read {dt_read:.2f} s, read 100 obs {dt_slice * 1000:.1f} ms"
+        )
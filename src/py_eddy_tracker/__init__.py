@@ -23,7 +23,6 @@ Email: evanmason@gmail.com
 from argparse import ArgumentParser
 import logging
 import numpy
-import zarr
 from ._version import get_versions
 
 __version__ = get_versions()["version"]
@@ -395,7 +394,7 @@ VAR_DESCR = dict(
         nc_name="effective_contour_longitude",
         old_nc_name=["contour_lon_e"],
         nc_type="f4",
-        filters=[zarr.Delta("i2")],
+        filters=[dict(id="delta", dtype="i2")],
         output_type="i2",
         scale_factor=numpy.float32(0.01),
         add_offset=180,
@@ -412,7 +411,7 @@ VAR_DESCR = dict(
         nc_name="effective_contour_latitude",
         old_nc_name=["contour_lat_e"],
         nc_type="f4",
-        filters=[zarr.Delta("i2")],
+        filters=[dict(id="delta", dtype="i2")],
         output_type="i2",
         scale_factor=numpy.float32(0.01),
         nc_dims=("obs", "NbSample"),
@@ -439,7 +438,7 @@ VAR_DESCR = dict(
         nc_name="speed_contour_longitude",
         old_nc_name=["contour_lon_s"],
         nc_type="f4",
-        filters=[zarr.Delta("i2")],
+        filters=[dict(id="delta", dtype="i2")],
         output_type="i2",
         scale_factor=numpy.float32(0.01),
         add_offset=180,
@@ -456,7 +455,7 @@ VAR_DESCR = dict(
         nc_name="speed_contour_latitude",
         old_nc_name=["contour_lat_s"],
         nc_type="f4",
-        filters=[zarr.Delta("i2")],
+        filters=[dict(id="delta", dtype="i2")],
         output_type="i2",
         scale_factor=numpy.float32(0.01),
         nc_dims=("obs", "NbSample"),
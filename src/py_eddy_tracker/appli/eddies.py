@@ -7,6 +7,7 @@ from netCDF4 import Dataset
 from .. import EddyParser
 from ..observations.tracking import TrackEddiesObservations
 from ..observations.observation import EddiesObservations
+from ..observations.collection import EddiesCollection
 
 
 def eddies_add_circle():
@@ -39,25 +40,41 @@ def merge_eddies():
     parser.add_argument(
         "--include_var", nargs="+", type=str, help="use only listed variable"
     )
+    parser.add_argument(
+        "--nb_process", type=int, default=1, help="number of processes to read files"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="write each file directly in output, merged dataset is never in memory, "
+        "only for netcdf output",
+    )
     args = parser.parse_args()
 
     if args.include_var is None:
         with Dataset(args.filename[0]) as h:
-            args.include_var = h.variables.keys()
+            args.include_var = list(h.variables.keys())
 
-    obs = TrackEddiesObservations.load_file(
-        args.filename[0], raw_data=True, include_vars=args.include_var
+    obs = TrackEddiesObservations.concatenate_files(
+        args.filename,
+        out=args.out if args.stream else None,
+        nb_process=args.nb_process,
+        callback=TrackEddiesObservations.add_rotation_type
+        if args.add_rotation_variable
+        else None,
+        raw_data=True,
+        include_vars=args.include_var,
     )
-    if args.add_rotation_variable:
-        obs = obs.add_rotation_type()
-    for filename in args.filename[1:]:
-        other = TrackEddiesObservations.load_file(
-            filename, raw_data=True, include_vars=args.include_var
-        )
-        if args.add_rotation_variable:
-            other = other.add_rotation_type()
-        obs = obs.merge(other)
-    obs.write_file(filename=args.out)
+    if not args.stream:
+        obs.write_file(filename=args.out)
+
+
+def build_collection_index():
+    parser = EddyParser("Build index of a collection of identification files")
+    parser.add_argument("filename", nargs="+", help="identification files")
+    parser.add_argument("out", help="index file")
+    args = parser.parse_args()
+    EddiesCollection(sorted(args.filename)).write_index(args.out)
 
 
 def get_frequency_grid():
@@ -75,6 +92,24 @@ def get_frequency_grid():
     parser.add_argument(
         "--yrange", nargs="+", type=float, help="Vertical range : START,STOP,STEP"
     )
+    parser.add_argument(
+        "--time_chunk",
+        type=int,
+        help="Count observations by period of N days to bound memory use",
+    )
+    parser.add_argument(
+        "--chunk_size",
+        type=int,
+        help="Read observations by chunk of N observations to bound memory use",
+    )
+    parser.add_argument(
+        "--memory",
+        type=float,
+        default=1000,
+        help="Maximal memory in MB used to count, each thread counts in its own "
+        "grid, so memory scales with number of threads, which is reduced to stay "
+        "below this limit",
+    )
     args = parser.parse_args()
 
     if (args.xrange is None or len(args.xrange) not in (3,)) or (
@@ -84,10 +119,20 @@ def get_frequency_grid():
 
     var_to_load = ["longitude"]
     var_to_load.extend(EddiesObservations.intern(args.intern, public_label=True))
-    e = EddiesObservations.load_file(args.observations, include_vars=var_to_load)
-
+    if args.time_chunk is not None:
+        var_to_load.append("time")
     bins = args.xrange, args.yrange
-    g = e.grid_count(bins, intern=args.intern)
+    kwargs = dict(
+        intern=args.intern, time_chunk=args.time_chunk, memory=args.memory * 1e6
+    )
+    if args.chunk_size is None:
+        e = EddiesObservations.load_file(args.observations, include_vars=var_to_load)
+        g = e.grid_count(bins, **kwargs)
+    else:
+        chunks = EddiesObservations.load_chunks(
+            args.observations, args.chunk_size, include_vars=var_to_load
+        )
+        g = EddiesObservations.grid_count_chunks(chunks, bins, **kwargs)
     g.write(args.out)
 
 
@@ -107,10 +107,11 @@ def identification(
     unregular=False,
     cut_wavelength=500,
     filter_order=1,
+    context=None,
     **kwargs
 ):
     grid_class = UnRegularGridDataset if unregular else RegularGridDataset
-    grid = grid_class(filename, lon, lat)
+    grid = grid_class(filename, lon, lat, context=context)
     if u == "None" and v == "None":
         grid.add_uv(h)
         u, v = "u", "v"
@@ -3,6 +3,10 @@
 Class to load and manipulate RegularGrid and UnRegularGrid
 """
 import logging
+import hashlib
+import sys
+from os import makedirs
+from os.path import exists, join
 from numpy import (
     concatenate,
     empty,
@@ -15,7 +19,6 @@ from numpy import (
     cos,
     ma,
     int8,
-    histogram2d,
     arange,
     float_,
     linspace,
@@ -27,31 +30,46 @@ from numpy import (
     ceil,
     sinc,
     isnan,
+    isfinite,
     percentile,
     zeros,
     round_,
     nanmean,
     exp,
     nanstd,
+    repeat,
+    minimum,
+    maximum,
+    add,
+    sqrt,
+    inf,
+    savez,
+    bincount,
+    load as np_load,
     mean as np_mean,
 )
 from datetime import datetime
 from scipy.special import j1
 from netCDF4 import Dataset
 from scipy.ndimage import gaussian_filter, convolve
-from scipy.interpolate import RectBivariateSpline, interp1d
-from scipy.spatial import cKDTree
+from scipy.interpolate import interp1d, RectBivariateSpline
 from scipy.signal import welch
 from cv2 import filter2D
 from numba import njit, types as numba_types
-from matplotlib.path import Path as BasePath
-from pint import UnitRegistry
-from ..observations.observation import EddiesObservations
+from ..observations.observation import (
+    EddiesObservations,
+    ObservationsBuffer,
+    unit_factor,
+    unit_registry,
+)
 from ..eddy_feature import Amplitude, Contours
 from .. import VAR_DESCR
 from ..generic import (
     distance,
     interp2d_geo,
+    interp2d_geo_serial,
+    interp2d_plan,
+    interp2d_apply,
     uniform_resample,
     coordinates_to_local,
     local_to_coordinates,
@@ -59,7 +77,6 @@ from ..generic import (
     bbox_indice_regular,
 )
 from ..poly import (
-    poly_contain_poly,
     winding_number_poly,
     create_vertice,
     poly_area,
@@ -69,6 +86,19 @@ from ..poly import (
 
 logger = logging.getLogger("pet")
 
+# Stencils used to compute gradient, from the largest to the smallest
+STENCIL_WEIGHTS = [
+    array((3, -32, 168, -672, 0, 672, -168, 32, -3)) / 840.0,
+    array((-1, 9, -45, 0, 45, -9, 1)) / 60.0,
+    array((1, -8, 0, 8, -1)) / 12.0,
+    array((-1, 0, 1)) / 2.0,
+    # uncentered kernel
+    # like array((0, -1, 1)) but left value could be default value
+    array((-1, 1)),
+    # like array((-1, 1, 0)) but right value could be default value
+    (1, array((-1, 1))),
+]
+
 
 def raw_resample(datas, fixed_size):
     nb_value = datas.shape[0]
@@ -95,11 +125,6 @@ def lat(self):
     return self.vertices[:, 1]
 
 
-BasePath.mean_coordinates = mean_coordinates
-BasePath.lon = lon
-BasePath.lat = lat
-
-
 @njit(cache=True)
 def uniform_resample_stack(vertices, num_fac=2, fixed_size=None):
     x_val, y_val = vertices[:, 0], vertices[:, 1]
@@ -114,7 +139,7 @@ def uniform_resample_stack(vertices, num_fac=2, fixed_size=None):
 def value_on_regular_contour(x_g, y_g, z_g, m_g, vertices, num_fac=2, fixed_size=None):
     x_val, y_val = vertices[:, 0], vertices[:, 1]
     x_new, y_new = uniform_resample(x_val, y_val, num_fac, fixed_size)
-    return interp2d_geo(x_g, y_g, z_g, m_g, x_new[1:], y_new[1:])
+    return interp2d_geo_serial(x_g, y_g, z_g, m_g, x_new[1:], y_new[1:])
 
 
 @njit(cache=True)
@@ -123,13 +148,85 @@ def mean_on_regular_contour(
 ):
     x_val, y_val = vertices[:, 0], vertices[:, 1]
     x_new, y_new = uniform_resample(x_val, y_val, num_fac, fixed_size)
-    values = interp2d_geo(x_g, y_g, z_g, m_g, x_new[1:], y_new[1:])
+    values = interp2d_geo_serial(x_g, y_g, z_g, m_g, x_new[1:], y_new[1:])
     if nan_remove:
         return nanmean(values)
     else:
         return values.mean()
 
 
+@njit(cache=True)
+def mean_on_regular_contours(
+    x_g,
+    y_g,
+    z_g,
+    m_g,
+    vertices,
+    contour_index,
+    nb_pt_per_contour,
+    indices,
+    num_fac=2,
+    nan_remove=False,
+):
+    """
+    Same as :py:func:`mean_on_regular_contour` for several contours stored in
+    flat arrays.
+
+    :param array vertices: vertices of all contours (N,2)
+    :param array contour_index: index of first vertice of each contour
+    :param array nb_pt_per_contour: number of vertices of each contour
+    :param array indices: index of contours to compute
+    :return: mean of each selected contour
+    :rtype: array
+    """
+    nb = indices.shape[0]
+    means = empty(nb, dtype=z_g.dtype)
+    for k in range(nb):
+        i_start = contour_index[indices[k]]
+        i_stop = i_start + nb_pt_per_contour[indices[k]]
+        means[k] = mean_on_regular_contour(
+            x_g,
+            y_g,
+            z_g,
+            m_g,
+            vertices[i_start:i_stop],
+            num_fac=num_fac,
+            nan_remove=nan_remove,
+        )
+    return means
+
+
+@njit(cache=True)
+def uniform_resample_contours(
+    vertices, contour_index, nb_pt_per_contour, indices, num_fac=2
+):
+    """
+    Resample several contours stored in flat arrays, first point of each
+    resampled contour is removed (it's the same as the last one).
+
+    :param array vertices: vertices of all contours (N,2)
+    :param array contour_index: index of first vertice of each contour
+    :param array nb_pt_per_contour: number of vertices of each contour
+    :param array indices: index of contours to resample
+    :param int num_fac: factor to increase lengths of output coordinates
+    :return: resampled vertices and index of first vertice of each contour,
+        with one more element for the end of last contour
+    :rtype: (array, array)
+    """
+    nb = indices.shape[0]
+    i_first = empty(nb + 1, dtype=numba_types.int64)
+    i_first[0] = 0
+    for k in range(nb):
+        i_first[k + 1] = i_first[k] + nb_pt_per_contour[indices[k]] * num_fac - 1
+    data = empty((i_first[-1], 2), dtype=vertices.dtype)
+    for k in range(nb):
+        i_start = contour_index[indices[k]]
+        i_stop = i_start + nb_pt_per_contour[indices[k]]
+        resampled = uniform_resample_stack(vertices[i_start:i_stop], num_fac)
+        data[i_first[k] : i_first[k + 1]] = resampled[1:]
+    return data, i_first
+
+
 def fit_circle_path(self, method="fit"):
     if not hasattr(self, "_circle_params"):
         self._circle_params = dict()
@@ -193,9 +290,6 @@ def _get_pixel_in_unregular(vertices, x_c, y_c, x_start, x_stop, y_start, y_stop
     return i_x, i_y
 
 
-BasePath.fit_circle = fit_circle_path
-
-
 def pixels_in(self, grid):
     if not hasattr(self, "_slice"):
         self._slice = grid.bbox_indice(self.vertices)
@@ -225,10 +319,352 @@ def nb_pixel(self):
     return self._pixels_in[0].shape[0]
 
 
-BasePath.pixels_in = pixels_in
-BasePath.pixels_index = pixels_index
-BasePath.bbox_slice = bbox_slice
-BasePath.nb_pixel = nb_pixel
+def patch_matplotlib_path():
+    """
+    Add methods used on contours to matplotlib Path, matplotlib is imported only
+    when it is needed to compute contours
+    """
+    from matplotlib.path import Path as BasePath
+
+    BasePath.mean_coordinates = mean_coordinates
+    BasePath.lon = lon
+    BasePath.lat = lat
+    BasePath.fit_circle = fit_circle_path
+    BasePath.pixels_in = pixels_in
+    BasePath.pixels_index = pixels_index
+    BasePath.bbox_slice = bbox_slice
+    BasePath.nb_pixel = nb_pixel
+
+
+class IdentificationContext(object):
+    """
+    Store objects which could be shared between grids with the same layout,
+    to compute them only once when we process several dates.
+
+    - unit conversion factors, which are shared by the whole process
+    - kernels used by filtering
+    - geometry of grid (coordinates, bounds, index interpolator, ...)
+
+    .. code-block:: python
+
+        context = IdentificationContext()
+        for filename, date in items:
+            g = RegularGridDataset(filename, "longitude", "latitude", context=context)
+            g.bessel_high_filter("adt", 500)
+            a, c = g.eddy_identification("adt", "ugos", "vgos", date)
+    """
+
+    __slots__ = (
+        "kernels",
+        "geometries",
+        "cache_dir",
+    )
+
+    def __init__(self, cache_dir=None):
+        """
+        :param str cache_dir: if define, position locators of unregular grids are
+            stored in this directory, to be reused by next processes
+        """
+        self.kernels = dict()
+        self.geometries = dict()
+        self.cache_dir = cache_dir
+
+    @property
+    def units(self):
+        """Unit registry, shared by the whole process, look at
+        :py:func:`~py_eddy_tracker.observations.observation.unit_registry`
+        """
+        return unit_registry()
+
+    @staticmethod
+    def unit_factor(input_unit, output_unit):
+        """Get factor to convert a value from input_unit to output_unit, factors
+        are shared by the whole process, look at
+        :py:func:`~py_eddy_tracker.observations.observation.unit_factor`
+
+        :param str input_unit:
+        :param str output_unit:
+        :return: multiplicative factor
+        :rtype: float
+        """
+        return unit_factor(input_unit, output_unit, strict=True)
+
+    def get_kernel(self, grid, kernel_func, lat, **kwargs):
+        """Get kernel, computed only at the first call for a grid resolution
+
+        :param RegularGridDataset grid: grid which will be filtered
+        :param func kernel_func: method of grid which compute kernel
+        :param float lat: latitude of kernel
+        :param dict kwargs: look at kernel_func
+        :return: kernel
+        :rtype: array
+        """
+        key = (
+            kernel_func.__name__,
+            grid.xstep,
+            grid.ystep,
+            lat,
+            tuple(sorted(kwargs.items())),
+        )
+        if key not in self.kernels:
+            self.kernels[key] = kernel_func(lat, **kwargs)
+        return self.kernels[key]
+
+    def get_geometry(self, *coordinates):
+        """Get dictionary where objects derived from coordinates could be stored
+
+        :param array coordinates: all arrays which define grid geometry
+        :return: storage for geometry, shared between grids with same coordinates
+        :rtype: dict
+        """
+        key = hashlib.sha1()
+        for coordinate in coordinates:
+            coordinate = ma.getdata(coordinate)
+            key.update(str((coordinate.shape, coordinate.dtype.str)).encode())
+            key.update(coordinate.tobytes())
+        key = key.hexdigest()
+        if key not in self.geometries:
+            self.geometries[key] = dict(key=key)
+        return self.geometries[key]
+
+    def get_locator(self, key, x_c, y_c):
+        """Get locator of a curvilinear grid, read in cache directory if available
+
+        :param str key: hash of coordinates, look at get_geometry
+        :param array x_c: longitude of grid (2D)
+        :param array y_c: latitude of grid (2D)
+        :rtype: CurvilinearLocator
+        """
+        if self.cache_dir is None:
+            return CurvilinearLocator(x_c, y_c)
+        filename = join(self.cache_dir, f"locator_{key}.npz")
+        if exists(filename):
+            logger.debug("Read locator in %s", filename)
+            return CurvilinearLocator.load(filename, x_c, y_c)
+        locator = CurvilinearLocator(x_c, y_c)
+        makedirs(self.cache_dir, exist_ok=True)
+        locator.save(filename)
+        return locator
+
+
+class CurvilinearLocator(object):
+    """
+    Locate nearest nodes of a curvilinear grid.
+
+    A table of buckets on a regular grid gives a node near each position, then
+    we walk from node to neighbour node until the nearest one. Successive positions
+    (like contour vertices) could start from the previous result, so cost of a query
+    doesn't depend of grid size.
+
+    Distance and interface are the same as :py:meth:`scipy.spatial.cKDTree.query`
+    on flattened coordinates.
+    """
+
+    __slots__ = (
+        "x_c",
+        "y_c",
+        "hint",
+        "x0",
+        "y0",
+        "x_step",
+        "y_step",
+    )
+
+    NODES_BY_BUCKET = 16
+
+    def __init__(self, x_c, y_c, table=None):
+        """
+        :param array x_c: longitude of grid (2D)
+        :param array y_c: latitude of grid (2D)
+        :param tuple table: bucket table already computed (hint, bounds)
+        """
+        self.x_c = ma.getdata(x_c).astype("f8")
+        self.y_c = ma.getdata(y_c).astype("f8")
+        if table is None:
+            table = self.build_table()
+        self.hint, (self.x0, self.y0, self.x_step, self.y_step) = table
+
+    def build_table(self):
+        """Compute for each bucket the nearest node of its center
+
+        :return: hint table and (x0, y0, x_step, y_step) of buckets
+        :rtype: (array, tuple)
+        """
+        x_min, x_max = self.x_c.min(), self.x_c.max()
+        y_min, y_max = self.y_c.min(), self.y_c.max()
+        d_x, d_y = max(x_max - x_min, 1e-6), max(y_max - y_min, 1e-6)
+        nb_bucket = max(self.x_c.size // self.NODES_BY_BUCKET, 1)
+        nb_x = int(ceil((nb_bucket * d_x / d_y) ** 0.5))
+        nb_y = int(ceil(nb_bucket / nb_x))
+        bounds = x_min, y_min, d_x / nb_x, d_y / nb_y
+        return bucket_hint(self.x_c, self.y_c, *bounds, nb_x, nb_y), bounds
+
+    def save(self, filename):
+        """Store bucket table
+
+        :param str filename: npz file
+        """
+        savez(
+            filename,
+            hint=self.hint,
+            bounds=array((self.x0, self.y0, self.x_step, self.y_step)),
+        )
+
+    @classmethod
+    def load(cls, filename, x_c, y_c):
+        """Create locator with a bucket table stored with save
+
+        :param str filename: npz file
+        :param array x_c: longitude of grid (2D)
+        :param array y_c: latitude of grid (2D)
+        :rtype: CurvilinearLocator
+        """
+        with np_load(filename) as h:
+            return cls(x_c, y_c, (h["hint"], tuple(h["bounds"])))
+
+    def query(self, points, k=1):
+        """Get nearest nodes of positions
+
+        :param array points: positions (N,2) or only one position (2,)
+        :param int k: number of nearest nodes
+        :return: distance and flat index of nodes, with shape (N,k),
+            k dimension is removed if k == 1
+        :rtype: (array, array)
+        """
+        points = array(points, dtype="f8")
+        single = points.ndim == 1
+        points = points.reshape(-1, 2)
+        dist, idx = locate_nearest(
+            self.x_c,
+            self.y_c,
+            self.hint,
+            self.x0,
+            self.y0,
+            self.x_step,
+            self.y_step,
+            points[:, 0].copy(),
+            points[:, 1].copy(),
+            k,
+        )
+        if k == 1:
+            dist, idx = dist[:, 0], idx[:, 0]
+        if single:
+            return dist[0], idx[0]
+        return dist, idx
+
+    def bilinear_weights(self, x, y):
+        """Compute bilinear weights of positions in cells of grid
+
+        Weights depend only of grid and positions, so they could be stored to
+        interpolate several variables or dates.
+
+        :param array x: longitude of positions
+        :param array y: latitude of positions
+        :rtype: BilinearWeights
+        """
+        x, y = array(x, dtype="f8"), array(y, dtype="f8")
+        i, j, weights = locate_cells(
+            self.x_c,
+            self.y_c,
+            self.hint,
+            self.x0,
+            self.y0,
+            self.x_step,
+            self.y_step,
+            x.reshape(-1),
+            y.reshape(-1),
+        )
+        return BilinearWeights(x.shape, i, j, weights)
+
+
+class BilinearWeights(object):
+    """
+    Position of points in cells of a curvilinear grid, with weights of the 4 cell
+    corners given by an inverse bilinear transform.
+
+    .. code-block:: python
+
+        weights = grid.index_interp.bilinear_weights(x, y)
+        u, v = weights.interp(grid.grid("u")), weights.interp(grid.grid("v"))
+    """
+
+    __slots__ = (
+        "shape",
+        "i",
+        "j",
+        "weights",
+    )
+
+    def __init__(self, shape, i, j, weights):
+        """
+        :param tuple shape: shape of positions
+        :param array i: first index of cell, -1 if position is out of grid
+        :param array j: second index of cell
+        :param array weights: weights of corners (i,j), (i+1,j), (i+1,j+1), (i,j+1)
+        """
+        self.shape = shape
+        self.i = i
+        self.j = j
+        self.weights = weights
+
+    def interp(self, z):
+        """Interpolate a variable of grid, masked corners are removed from
+        weighted mean
+
+        :param array z: variable with grid shape
+        :return: interpolated values, masked out of grid or if all corners
+            are masked
+        :rtype: masked array
+        """
+        values = interp_cells(
+            ma.getdata(z).astype("f8"),
+            ma.getmaskarray(z),
+            self.i,
+            self.j,
+            self.weights,
+        )
+        return ma.masked_invalid(values.reshape(self.shape))
+
+
+class InterpolationPlan(object):
+    """
+    Cells and positions in cells of points in a regular grid, computed once to
+    interpolate several variables or dates on the same points.
+
+    .. code-block:: python
+
+        plan = grid.interpolation_plan(lons, lats)
+        u, v = plan.interp(grid.grid("u")), plan.interp(grid.grid("v"))
+    """
+
+    __slots__ = (
+        "shape",
+        "plan",
+    )
+
+    def __init__(self, x_g, y_g, x, y):
+        """
+        :param array x_g: coordinates of grid
+        :param array y_g: coordinates of grid
+        :param array x: coordinates of points
+        :param array y: coordinates of points
+        """
+        x, y = array(x, dtype="f8"), array(y, dtype="f8")
+        self.shape = x.shape
+        self.plan = interp2d_plan(
+            ma.getdata(x_g), ma.getdata(y_g), x.reshape(-1), y.reshape(-1)
+        )
+
+    def interp(self, z):
+        """Interpolate a variable of grid, look at :py:func:`interp2d_geo`
+
+        :param array z: variable with grid shape
+        :return: interpolated values, nan out of grid or if one corner is masked
+        :rtype: array
+        """
+        return interp2d_apply(ma.getdata(z), ma.getmaskarray(z), *self.plan).reshape(
+            self.shape
+        )
 
 
 class GridDataset(object):
@@ -258,6 +694,18 @@ class GridDataset(object):
         "interpolators",
         "speed_coef",
         "contours",
+        "context",
+        "geometry",
+    )
+
+    # Attributes which only depend of coordinates
+    GEOMETRY_ATTRS = (
+        "x_c",
+        "y_c",
+        "x_bounds",
+        "y_bounds",
+        "xinterp",
+        "yinterp",
     )
 
     GRAVITY = 9.807
@@ -267,7 +715,14 @@ class GridDataset(object):
     N = 1
 
     def __init__(
-        self, filename, x_name, y_name, centered=None, indexs=None, unset=False
+        self,
+        filename,
+        x_name,
+        y_name,
+        centered=None,
+        indexs=None,
+        unset=False,
+        context=None,
     ):
         """
         :param str filename: Filename to load
@@ -276,6 +731,9 @@ class GridDataset(object):
         :param bool,None centered: Allow to know how coordinates could be used with pixel
         :param dict indexs: A dictionary which set indexs to use for non-coordinate dimensions
         :param bool unset: Set to True to create an empty grid object without file
+        :param IdentificationContext,None context:
+            Context to share with other grids of same layout, to avoid to compute again
+            units, kernels and geometry
         """
         self.dimensions = None
         self.variables_description = None
@@ -295,6 +753,11 @@ class GridDataset(object):
         self.vars = dict()
         self.indexs = dict() if indexs is None else indexs
         self.interpolators = dict()
+        self.context = IdentificationContext() if context is None else context
+        self.geometry = dict()
+        if "matplotlib.path" in sys.modules:
+            # Path could be built by user and used with this grid
+            patch_matplotlib_path()
         if centered is None:
             logger.warning(
                 "We assume pixel position of grid is center for %s", filename,
@@ -394,8 +857,33 @@ class GridDataset(object):
             self.vars[x_name] = h.variables[x_name][sl_x]
             self.vars[y_name] = h.variables[y_name][sl_y]
 
-        self.setup_coordinates()
-        self.init_pos_interpolator()
+        self.geometry = self.context.get_geometry(
+            self.vars[x_name], self.vars[y_name], array(self.is_centered)
+        )
+        if not self.restore_geometry():
+            self.setup_coordinates()
+            self.init_pos_interpolator()
+            self.store_geometry()
+
+    def restore_geometry(self):
+        """Set attributes which depend only of coordinates, if stored in context
+
+        :return: True if geometry is restored
+        :rtype: bool
+        """
+        if "attrs" not in self.geometry:
+            return False
+        logger.debug("Use geometry already computed in context")
+        for name, value in self.geometry["attrs"].items():
+            setattr(self, name, value)
+        return True
+
+    def store_geometry(self):
+        """Store attributes which depend only of coordinates in context
+        """
+        self.geometry["attrs"] = {
+            name: getattr(self, name) for name in self.GEOMETRY_ATTRS
+        }
 
     def setup_coordinates(self):
         x_name, y_name = self.coordinates
@@ -620,14 +1108,13 @@ class GridDataset(object):
         h_units = (
             self.units(grid_height) if force_height_unit is None else force_height_unit
         )
-        units = UnitRegistry()
         if grid_height in ['ow']:
             in_h_unit = None
         else:
-            in_h_unit = units.parse_expression(h_units)
-            
+            in_h_unit = h_units
+
         if in_h_unit is not None:
-            factor, _ = in_h_unit.to("m").to_tuple()
+            factor = self.context.unit_factor(in_h_unit, "m")
             logger.info(
                 "We will apply on step a factor to be coherent with grid : %f",
                 1 / factor,
@@ -700,10 +1187,30 @@ class GridDataset(object):
             "contour_lat_s",
             "uavg_profile",
         ]
+        # Criterions which depend only of contour geometry are computed only once
+        vertices = self.contours.vertices
+        shape_errors = contours_shape_error(
+            vertices, self.contours.contour_index, self.contours.nb_pt_per_contour
+        )
+        bbox = self.contours_bbox_indice(
+            vertices,
+            self.contours.contour_index,
+            self.contours.nb_pt_per_contour,
+            selection=shape_errors <= shape_error,
+        )
+        data_values = ma.getdata(data)
+        if grid_height in ['ow']:
+            vrt_data = ma.getdata(vrt)
         # Compute cyclonic and anticylonic research:
         a_and_c = list()
         for anticyclonic_search in [True, False]:
-            eddies = list()
+            eddies = ObservationsBuffer(
+                EddiesObservations(
+                    track_extra_variables=track_extra_variables,
+                    track_array_variables=sampling,
+                    array_variables=array_variables,
+                )
+            )
             if grid_height in ['ow']:
                 iterator = -1
             else:
@@ -727,47 +1234,44 @@ class GridDataset(object):
                     nb_paths,
                 )
 
+                # Test to know cyclone or anticyclone
+                if grid_height in ['ow']:
+                    values, threshold, below = vrt_data, 0, not anticyclonic_search
+                else:
+                    values, threshold, below = data_values, cvalues, anticyclonic_search
+                i_first = self.contours.level_index[corrected_coll_index]
+                i_contour, i_contour_stop = i_first, i_first + nb_paths
                 # Loop over individual c_s contours (i.e., every eddy in field)
-                for contour in contour_paths:
-                    if contour.used:
-                        continue
-                    # FIXME : center could be not in contour and fit on raw sampling
-                    _, _, _, aerr = contour.fit_circle()
-
-                    # Filter for shape
-                    if aerr < 0 or aerr > shape_error or isnan(aerr):
-                        contour.reject = 1
-                        continue
-
-                    # Find all pixels in the contour
-                    i_x_in, i_y_in = contour.pixels_in(self)
-
-                    # Check if pixels in contour are masked
-                    if has_masked_value(data.mask, i_x_in, i_y_in):
-                        if contour.reject == 0:
-                            contour.reject = 2
-                        continue
-
-                    # Test to know cyclone or anticyclone
-                    if grid_height in ['ow']:
-                        #acyc_not_cyc = vrt[i_x, i_y] <= 0
-                    	if has_value(
-                        vrt, i_x_in, i_y_in, 0, below=not anticyclonic_search
-                    ):
-                        	continue
-                    else:
-                    	if has_value(
-                        data, i_x_in, i_y_in, cvalues, below=anticyclonic_search
-                    ):
-                        	continue
-
-                    # FIXME : Maybe limit max must be replace with a maximum of surface
-                    if (
-                        contour.nb_pixel < pixel_limit[0]
-                        or contour.nb_pixel > pixel_limit[1]
-                    ):
-                        contour.reject = 3
-                        continue
+                while True:
+                    # Shape, masked pixels, values and pixel limit criterions are
+                    # checked in a compiled loop, we only get valid contour
+                    i_contour, i_x_in, i_y_in = self.select_contour(
+                        i_contour,
+                        i_contour_stop,
+                        vertices,
+                        self.contours.contour_index,
+                        self.contours.nb_pt_per_contour,
+                        self.contours.used_per_contour,
+                        self.contours.reject_per_contour,
+                        shape_errors,
+                        shape_error,
+                        bbox,
+                        data.mask,
+                        values,
+                        threshold,
+                        below,
+                        pixel_limit[0],
+                        pixel_limit[1],
+                    )
+                    if i_contour == -1:
+                        break
+                    contour = contour_paths[i_contour - i_first]
+                    i_contour += 1
+                    contour._slice = (
+                        (bbox[0][contour.index], bbox[1][contour.index]),
+                        (bbox[2][contour.index], bbox[3][contour.index]),
+                    )
+                    contour._pixels_in = i_x_in, i_y_in
 
                     # Compute amplitude
                     reset_centroid, amp = self.get_amplitude(
@@ -781,7 +1285,7 @@ class GridDataset(object):
                     )
                     # If we have a valid amplitude
                     if (not amp.within_amplitude_limits()) or (amp.amplitude == 0):
-                        contour.reject = 4
+                        self.contours.reject_per_contour[contour.index] = 4
                         continue
                     if reset_centroid:
 
@@ -816,35 +1320,32 @@ class GridDataset(object):
                         pixel_min=pixel_limit[0],
                     )
 
-                    # FIXME : Instantiate new EddyObservation object (high cost need to be review)
-                    obs = EddiesObservations(
-                        size=1,
-                        track_extra_variables=track_extra_variables,
-                        track_array_variables=sampling,
-                        array_variables=array_variables,
-                    )
-
-                    obs.obs["height_max_speed_contour"] = self.contours.cvalues[
-                        i_max_speed
-                    ]
-                    obs.obs["height_external_contour"] = cvalues
-                    obs.obs["height_inner_contour"] = self.contours.cvalues[i_inner]
+                    # Store directly in output buffer
+                    i_obs = eddies.new_row()
+                    cvalues_all = self.contours.cvalues
+                    eddies["height_max_speed_contour"][i_obs] = cvalues_all[i_max_speed]
+                    eddies["height_external_contour"][i_obs] = cvalues
+                    eddies["height_inner_contour"][i_obs] = cvalues_all[i_inner]
                     array_size = speed_array.shape[0]
-                    obs.obs["nb_contour_selected"] = array_size
+                    eddies["nb_contour_selected"][i_obs] = array_size
                     if speed_array.shape[0] == 1:
-                        obs.obs["uavg_profile"][:] = speed_array[0]
+                        eddies["uavg_profile"][i_obs] = speed_array[0]
                     else:
-                        obs.obs["uavg_profile"] = raw_resample(speed_array, sampling)
-                    obs.obs["amplitude"] = amp.amplitude
-                    obs.obs["speed_average"] = max_average_speed
-                    obs.obs["num_point_e"] = contour.lon.shape[0]
+                        eddies["uavg_profile"][i_obs] = raw_resample(
+                            speed_array, sampling
+                        )
+                    eddies["amplitude"][i_obs] = amp.amplitude
+                    eddies["speed_average"][i_obs] = max_average_speed
+                    eddies["num_point_e"][i_obs] = contour.lon.shape[0]
                     xy_e = uniform_resample(contour.lon, contour.lat, **out_sampling)
-                    obs.obs["contour_lon_e"], obs.obs["contour_lat_e"] = xy_e
-                    obs.obs["num_point_s"] = speed_contour.lon.shape[0]
+                    eddies["contour_lon_e"][i_obs] = xy_e[0]
+                    eddies["contour_lat_e"][i_obs] = xy_e[1]
+                    eddies["num_point_s"][i_obs] = speed_contour.lon.shape[0]
                     xy_s = uniform_resample(
                         speed_contour.lon, speed_contour.lat, **out_sampling
                     )
-                    obs.obs["contour_lon_s"], obs.obs["contour_lat_s"] = xy_s
+                    eddies["contour_lon_s"][i_obs] = xy_s[0]
+                    eddies["contour_lat_s"][i_obs] = xy_s[1]
 
                     # FIXME : we use a contour without resampling
                     # First, get position based on innermost contour
@@ -860,20 +1361,21 @@ class GridDataset(object):
                         create_vertice(*xy_e)
                     )
 
-                    obs.obs["radius_s"] = eddy_radius_s
-                    obs.obs["radius_e"] = eddy_radius_e
-                    obs.obs["shape_error_e"] = aerr_e
-                    obs.obs["shape_error_s"] = aerr_s
-                    obs.obs["speed_area"] = poly_area(
+                    eddies["radius_s"][i_obs] = eddy_radius_s
+                    eddies["radius_e"][i_obs] = eddy_radius_e
+                    eddies["shape_error_e"][i_obs] = aerr_e
+                    eddies["shape_error_s"][i_obs] = aerr_s
+                    eddies["speed_area"][i_obs] = poly_area(
                         *coordinates_to_local(*xy_s, lon0=centlon_s, lat0=centlat_s)
                     )
-                    obs.obs["effective_area"] = poly_area(
+                    eddies["effective_area"][i_obs] = poly_area(
                         *coordinates_to_local(*xy_e, lon0=centlon_s, lat0=centlat_s)
                     )
-                    obs.obs["lon"] = centlon_s
-                    obs.obs["lat"] = centlat_s
-                    obs.obs["lon_max"] = centlon_i
-                    obs.obs["lat_max"] = centlat_i
+                    eddies["lon"][i_obs] = centlon_s
+                    eddies["lat"][i_obs] = centlat_s
+                    eddies["lon_max"][i_obs] = centlon_i
+                    eddies["lat_max"][i_obs] = centlat_i
+                    aerr = shape_errors[contour.index]
                     if aerr > 99.9 or aerr_s > 99.9:
                         logger.warning(
                             "Strange shape at this step! shape_error : %f, %f",
@@ -881,17 +1383,9 @@ class GridDataset(object):
                             aerr_s,
                         )
 
-                    eddies.append(obs)
                     # To reserve definitively the area
                     data.mask[i_x_in, i_y_in] = True
-            if len(eddies) == 0:
-                eddies = EddiesObservations(
-                    track_extra_variables=track_extra_variables,
-                    track_array_variables=sampling,
-                    array_variables=array_variables,
-                )
-            else:
-                eddies = EddiesObservations.concatenate(eddies)
+            eddies = eddies.to_observations()
             eddies.sign_type = 1 if anticyclonic_search else -1
             eddies.obs["time"] = (date - datetime(1950, 1, 1)).total_seconds() / 86400.0
 
@@ -906,6 +1400,7 @@ class GridDataset(object):
                 (eddies.obs["contour_lon_s"].T - ref) % 360 + ref
             ).T
             a_and_c.append(eddies)
+        self.contours.update_paths_flags()
 
         if in_h_unit is not None:
             for name in [
@@ -914,16 +1409,15 @@ class GridDataset(object):
                 "height_external_contour",
                 "height_inner_contour",
             ]:
-                out_unit = units.parse_expression(VAR_DESCR[name]["nc_attr"]["units"])
-                factor, _ = in_h_unit.to(out_unit).to_tuple()
+                out_unit = VAR_DESCR[name]["nc_attr"]["units"]
+                factor = self.context.unit_factor(in_h_unit, out_unit)
                 a_and_c[0].obs[name] *= factor
                 a_and_c[1].obs[name] *= factor
         u_units = self.units(uname) if force_speed_unit is None else force_speed_unit
-        in_u_units = units.parse_expression(u_units)
-        if in_u_units is not None:
+        if u_units is not None:
             for name in ["speed_average", "uavg_profile"]:
-                out_unit = units.parse_expression(VAR_DESCR[name]["nc_attr"]["units"])
-                factor, _ = in_u_units.to(out_unit).to_tuple()
+                out_unit = VAR_DESCR[name]["nc_attr"]["units"]
+                factor = self.context.unit_factor(u_units, out_unit)
                 a_and_c[0].obs[name] *= factor
                 a_and_c[1].obs[name] *= factor
         return a_and_c
@@ -942,51 +1436,43 @@ class GridDataset(object):
         Calculate geostrophic speed around successive contours
         Returns the average
         """
-        # Init max speed to search maximum
-        max_average_speed = self.speed_coef_mean(original_contour)
-        speed_array = [max_average_speed]
-
-        eddy_contours = [original_contour]
-        inner_contour = selected_contour = original_contour
         # Must start only on upper or lower contour, no need to test the two part
         step = 1 if anticyclonic_search else -1
-        i_inner = i_max_speed = -1
-
-        for i, coll in enumerate(
-            all_contours.iter(start=level_start + step, step=step)
-        ):
-            level_contour = coll.get_nearest_path_bbox_contain_pt(centlon_e, centlat_e)
-            # Leave loop if no contours at level
-            if level_contour is None:
-                break
-            # Ensure polygon_i is within polygon_e
-            if not poly_contain_poly(original_contour.vertices, level_contour.vertices):
-                break
-            # 3. Respect size range (for max speed)
-            # nb_pixel properties need call of pixels_in before with a grid of pixel
-            level_contour.pixels_in(self)
-            # Interpolate uspd to seglon, seglat, then get mean
-            level_average_speed = self.speed_coef_mean(level_contour)
-            speed_array.append(level_average_speed)
-            if (
-                pixel_min < level_contour.nb_pixel
-                and level_average_speed >= max_average_speed
-            ):
-                max_average_speed = level_average_speed
-                i_max_speed = i
-                selected_contour = level_contour
-            inner_contour = level_contour
-            eddy_contours.append(level_contour)
-            i_inner = i
-        for contour in eddy_contours:
-            contour.used = True
+        # Walk down nesting tree, one contour by level inside original contour
+        i_contours = concatenate(
+            (
+                (original_contour.index,),
+                all_contours.inner_contours(
+                    original_contour.index, centlon_e, centlat_e, step
+                ),
+            )
+        )
+        # Interpolate uspd to seglon, seglat, then get mean, for all contours
+        speed_array = self.speed_coef_mean_contours(all_contours, i_contours)
+        # Init max speed to search maximum
+        max_average_speed = speed_array[0]
+        selected_contour = original_contour
+        i_max_speed = -1
+        for i, level_average_speed in enumerate(speed_array[1:]):
+            if level_average_speed >= max_average_speed:
+                level_contour = all_contours.get_path(i_contours[i + 1])
+                # 3. Respect size range (for max speed)
+                # nb_pixel properties need call of pixels_in before with a grid of pixel
+                level_contour.pixels_in(self)
+                if pixel_min < level_contour.nb_pixel:
+                    max_average_speed = level_average_speed
+                    i_max_speed = i
+                    selected_contour = level_contour
+        i_inner = i_contours.shape[0] - 2
+        inner_contour = all_contours.get_path(i_contours[-1])
+        all_contours.used_per_contour[i_contours] = True
         i_max_speed = level_start + step + step * i_max_speed
         i_inner = level_start + step + step * i_inner
         return (
             max_average_speed,
             selected_contour,
             inner_contour,
-            array(speed_array),
+            speed_array,
             i_max_speed,
             i_inner,
         )
@@ -1052,6 +1538,8 @@ class UnRegularGridDataset(GridDataset):
         "_speed_norm",
     )
 
+    GEOMETRY_ATTRS = ("x_c", "y_c", "index_interp")
+
     def load(self):
         """Load variable (data)
         """
@@ -1065,10 +1553,12 @@ class UnRegularGridDataset(GridDataset):
             self.vars[x_name] = h.variables[x_name][sl_x]
             self.vars[y_name] = h.variables[y_name][sl_y]
 
+        self.geometry = self.context.get_geometry(self.vars[x_name], self.vars[y_name])
+        if not self.restore_geometry():
             self.x_c = self.vars[x_name]
             self.y_c = self.vars[y_name]
-
             self.init_pos_interpolator()
+            self.store_geometry()
 
     @property
     def bounds(self):
@@ -1091,6 +1581,42 @@ class UnRegularGridDataset(GridDataset):
             contour.vertices, self.x_c, self.y_c, x_start, x_stop, y_start, y_stop
         )
 
+    def contours_bbox_indice(
+        self, vertices, contour_index, nb_pt_per_contour, selection=None
+    ):
+        """Get bbox indices of all contours stored in flat arrays
+
+        :param array vertices: vertices of all contours (N,2)
+        :param array contour_index: index of first vertice of each contour
+        :param array nb_pt_per_contour: number of vertices of each contour
+        :param array[bool] selection: only bbox of these contours are computed
+        :return: x_start, x_stop, y_start, y_stop of each contour
+        :rtype: (array, array, array, array)
+        """
+        nb_contour = contour_index.shape[0]
+        if selection is None:
+            selection = ones(nb_contour, dtype="bool")
+        bbox = zeros((4, nb_contour), dtype="i8")
+        if not selection.any():
+            return tuple(bbox)
+        nb_pt = nb_pt_per_contour[selection]
+        _, idx = self.index_interp.query(
+            vertices[repeat(selection, nb_pt_per_contour)], k=1
+        )
+        i_y = idx % self.x_c.shape[1]
+        i_x = (idx - i_y) // self.x_c.shape[1]
+        i_first = (nb_pt.cumsum() - nb_pt).astype("i8")
+        bbox[0, selection] = maximum(minimum.reduceat(i_x, i_first) - self.N, 0)
+        bbox[1, selection] = maximum.reduceat(i_x, i_first) + self.N + 1
+        bbox[2, selection] = maximum(minimum.reduceat(i_y, i_first) - self.N, 0)
+        bbox[3, selection] = maximum.reduceat(i_y, i_first) + self.N + 1
+        return tuple(bbox)
+
+    def select_contour(self, i_start, i_stop, *args):
+        """Look at :py:func:`select_contour_unregular`
+        """
+        return select_contour_unregular(self.x_c, self.y_c, i_start, i_stop, *args)
+
     def normalize_x_indice(self, indices):
         """Not do"""
         return indices
@@ -1105,14 +1631,24 @@ class UnRegularGridDataset(GridDataset):
         pass
 
     def init_pos_interpolator(self):
-        logger.debug("Create a KdTree could be long ...")
-        self.index_interp = cKDTree(
-            create_vertice(self.x_c.reshape(-1), self.y_c.reshape(-1))
+        self.index_interp = self.context.get_locator(
+            self.geometry["key"], self.x_c, self.y_c
         )
 
-        logger.debug("... OK")
-
-    def _low_filter(self, grid_name, w_cut, factor=8.0):
+    def _low_filter(self, grid_name, w_cut, factor=8.0, bilinear=False):
+        """Filter on a regular grid of step w_cut / factor, then come back on
+        nodes of unregular grid
+
+        :param str grid_name: grid to filter
+        :param float w_cut: wave length in km
+        :param float factor: number of regular steps by wave length
+        :param bool bilinear: if False, regular grid is the mean of nodes in each
+            of its bins, if True it is sampled with bilinear weights of unregular
+            grid, faster but nodes between regular nodes are ignored, so only
+            valid if unregular grid is not finer than regular grid
+        """
+        if bilinear:
+            return self._low_filter_bilinear(grid_name, w_cut, factor)
         data = self.grid(grid_name)
         x = self.grid(self.coordinates[0])
         y = self.grid(self.coordinates[1])
@@ -1120,15 +1656,21 @@ class UnRegularGridDataset(GridDataset):
         x_min, x_max, y_min, y_max = self.bounds
         x_array = arange(x_min, x_max + regrid_step, regrid_step)
         y_array = arange(y_min, min(y_max + regrid_step, 89), regrid_step)
-        bins = (x_array, y_array)
-
-        x_flat, y_flat, z_flat = x.reshape((-1,)), y.reshape((-1,)), data.reshape((-1,))
-        m = ~z_flat.mask
-        x_flat, y_flat, z_flat = x_flat[m], y_flat[m], z_flat[m]
-
-        nb_value, _, _ = histogram2d(x_flat, y_flat, bins=bins)
+        nb_x, nb_y = x_array.shape[0] - 1, y_array.shape[0] - 1
 
-        sum_value, _, _ = histogram2d(x_flat, y_flat, bins=bins, weights=z_flat)
+        # Bin of each node depend only of geometry
+        key = "low_filter_bins", regrid_step
+        if key not in self.geometry:
+            self.geometry[key] = self.bin_index(
+                x_array, y_array, ma.getdata(x).reshape(-1), ma.getdata(y).reshape(-1)
+            )
+        i_bin = self.geometry[key]
+        z_flat = data.reshape(-1)
+        m = (i_bin != -1) * ~ma.getmaskarray(z_flat)
+        nb_value = bincount(i_bin[m], minlength=nb_x * nb_y).reshape(nb_x, nb_y)
+        sum_value = bincount(
+            i_bin[m], weights=ma.getdata(z_flat)[m], minlength=nb_x * nb_y
+        ).reshape(nb_x, nb_y)
 
         with errstate(invalid="ignore"):
             z_grid = ma.array(sum_value / nb_value, mask=nb_value == 0)
@@ -1140,6 +1682,7 @@ class UnRegularGridDataset(GridDataset):
                 self.coordinates[1]: y_array[:-1],
             },
             centered=False,
+            context=self.context,
         )
         regular_grid.bessel_low_filter(grid_name, w_cut, order=1)
         z_filtered = regular_grid.grid(grid_name)
@@ -1147,22 +1690,107 @@ class UnRegularGridDataset(GridDataset):
         y_center = (y_array[:-1] + y_array[1:]) / 2
         opts_interpolation = dict(kx=1, ky=1, s=0)
         m_interp = RectBivariateSpline(
-            x_center, y_center, z_filtered.mask, **opts_interpolation
+            x_center, y_center, ma.getmaskarray(z_filtered), **opts_interpolation
         )
-        z_filtered.data[z_filtered.mask] = 0
+        z_filtered.data[ma.getmaskarray(z_filtered)] = 0
         z_interp = RectBivariateSpline(
             x_center, y_center, z_filtered.data, **opts_interpolation
         ).ev(x, y)
         return ma.array(z_interp, mask=m_interp.ev(x, y) > 0.00001)
 
+    @staticmethod
+    def bin_index(x_edges, y_edges, x, y):
+        """Flat index of bin of each position, like :py:func:`numpy.histogram2d`
+        last bins include their upper edge
+
+        :param array x_edges: edges of bins along x
+        :param array y_edges: edges of bins along y
+        :param array x: x of positions
+        :param array y: y of positions
+        :return: flat index of bin, -1 for positions out of bins
+        :rtype: array
+        """
+        nb_x, nb_y = x_edges.shape[0] - 1, y_edges.shape[0] - 1
+        i_x = x_edges.searchsorted(x, side="right") - 1
+        i_y = y_edges.searchsorted(y, side="right") - 1
+        i_x[x == x_edges[-1]] = nb_x - 1
+        i_y[y == y_edges[-1]] = nb_y - 1
+        i_bin = i_x * nb_y + i_y
+        i_bin[(i_x < 0) + (i_x >= nb_x) + (i_y < 0) + (i_y >= nb_y)] = -1
+        return i_bin
+
+    def _low_filter_bilinear(self, grid_name, w_cut, factor):
+        """Look at :py:meth:`_low_filter` with bilinear option"""
+        data = self.grid(grid_name)
+        x = self.grid(self.coordinates[0])
+        y = self.grid(self.coordinates[1])
+        regrid_step = w_cut / 111.0 / factor
+        x_min, x_max, y_min, y_max = self.bounds
+        # Regular grid which covers all nodes
+        x_array = x_min + arange(int((x_max - x_min) / regrid_step) + 2) * regrid_step
+        y_array = y_min + arange(int((y_max - y_min) / regrid_step) + 2) * regrid_step
+        y_array = y_array[y_array < 89]
+
+        # Weights of regular nodes in cells depend only of geometry
+        key = "low_filter", regrid_step
+        if key not in self.geometry:
+            self.geometry[key] = self.index_interp.bilinear_weights(
+                *meshgrid(x_array, y_array, indexing="ij")
+            )
+        z_grid = self.geometry[key].interp(data)
+        regular_grid = RegularGridDataset.with_array(
+            coordinates=self.coordinates,
+            datas={
+                grid_name: z_grid,
+                self.coordinates[0]: x_array,
+                self.coordinates[1]: y_array,
+            },
+            centered=True,
+            context=self.context,
+        )
+        regular_grid.bessel_low_filter(grid_name, w_cut, order=1)
+        z_filtered = regular_grid.grid(grid_name)
+        z_interp = interp2d_geo(
+            x_array,
+            y_array,
+            ma.getdata(z_filtered),
+            ma.getmaskarray(z_filtered),
+            ma.getdata(x).reshape(-1).astype("f8"),
+            ma.getdata(y).reshape(-1).astype("f8"),
+        )
+        return ma.masked_invalid(z_interp.reshape(x.shape))
+
     def speed_coef_mean(self, contour):
-        dist, idx = self.index_interp.query(
-            uniform_resample_stack(contour.vertices)[1:], k=4
+        vertices = uniform_resample_stack(contour.vertices)[1:]
+        speed = self.index_interp.bilinear_weights(
+            vertices[:, 0], vertices[:, 1]
+        ).interp(self._speed_norm)
+        return speed.mean()
+
+    def speed_coef_mean_contours(self, contours, indices):
+        """Same as speed_coef_mean for several contours, with only one call
+        to interpolator
+
+        :param Contours contours: contours stored in flat arrays
+        :param array indices: index of contours to compute
+        :return: mean speed of each contour
+        :rtype: masked array
+        """
+        vertices, i_first = uniform_resample_contours(
+            contours.vertices,
+            contours.contour_index,
+            contours.nb_pt_per_contour,
+            indices,
         )
-        i_y = idx % self.x_c.shape[1]
-        i_x = int_((idx - i_y) / self.x_c.shape[1])
-        # A simplified solution to be change by a weight mean
-        return self._speed_norm[i_x, i_y].mean(axis=1).mean()
+        speed = self.index_interp.bilinear_weights(
+            vertices[:, 0], vertices[:, 1]
+        ).interp(self._speed_norm)
+        # Mean of each contour without masked values
+        valid = ~ma.getmaskarray(speed)
+        nb_valid = add.reduceat(valid, i_first[:-1])
+        speed_sum = add.reduceat(speed.filled(0), i_first[:-1])
+        with errstate(invalid="ignore"):
+            return ma.array(speed_sum / nb_valid, mask=nb_valid == 0)
 
     def init_speed_coef(self, uname="u", vname="v"):
         self._speed_norm = (self.grid(uname) ** 2 + self.grid(vname) ** 2) ** 0.5
@@ -1180,6 +1808,8 @@ class RegularGridDataset(GridDataset):
         "_y_step",
     )
 
+    GEOMETRY_ATTRS = GridDataset.GEOMETRY_ATTRS + ("x_size", "_x_step", "_y_step")
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._is_circular = None
@@ -1239,6 +1869,36 @@ class RegularGridDataset(GridDataset):
             contour.vertices, self.x_c, self.y_c, x_start, x_stop, y_start, y_stop
         )
 
+    def contours_bbox_indice(
+        self, vertices, contour_index, nb_pt_per_contour, selection=None
+    ):
+        """Get bbox indices of all contours stored in flat arrays
+
+        :param array vertices: vertices of all contours (N,2)
+        :param array contour_index: index of first vertice of each contour
+        :param array nb_pt_per_contour: number of vertices of each contour
+        :param array[bool] selection: not used, computation is cheap on regular grid
+        :return: x_start, x_stop, y_start, y_stop of each contour
+        :rtype: (array, array, array, array)
+        """
+        return contours_bbox_indice_regular(
+            vertices,
+            contour_index,
+            nb_pt_per_contour,
+            self.x_bounds,
+            self.y_bounds,
+            self.xstep,
+            self.ystep,
+            self.N,
+            self.is_circular(),
+            self.x_size,
+        )
+
+    def select_contour(self, i_start, i_stop, *args):
+        """Look at :py:func:`select_contour_regular`
+        """
+        return select_contour_regular(self.x_c, self.y_c, i_start, i_stop, *args)
+
     def normalize_x_indice(self, indices):
         return indices % self.x_size
 
@@ -1403,7 +2063,7 @@ class RegularGridDataset(GridDataset):
                 data_out.mask[:, i] = True
                 continue
             # Get kernel
-            kernel = kernel_func(lat, **kwargs_func)
+            kernel = self.context.get_kernel(self, kernel_func, lat, **kwargs_func)
             # Kernel shape
             k_shape = kernel.shape
             t0 = datetime.now()
@@ -1642,20 +2302,8 @@ class RegularGridDataset(GridDataset):
         logger.debug("Stencil half width apply : %d", stencil_halfwidth)
         # output
         grad = None
-
-        weights = [
-            array((3, -32, 168, -672, 0, 672, -168, 32, -3)) / 840.0,
-            array((-1, 9, -45, 0, 45, -9, 1)) / 60.0,
-            array((1, -8, 0, 8, -1)) / 12.0,
-            array((-1, 0, 1)) / 2.0,
-            # uncentered kernel
-            # like array((0, -1, 1)) but left value could be default value
-            array((-1, 1)),
-            # like array((-1, 1, 0)) but right value could be default value
-            (1, array((-1, 1))),
-        ]
         # reduce to stencil selected
-        weights = weights[4 - stencil_halfwidth :]
+        weights = STENCIL_WEIGHTS[4 - stencil_halfwidth :]
         if vertical:
             data = data.T
         # Iteration from larger stencil to smaller (to fill matrix)
@@ -1788,29 +2436,80 @@ class RegularGridDataset(GridDataset):
                 self.variables_description[variable]["attrs"][
                     "long_name"
                 ] += " gradient"
-        # Divide by sideral day
-        gof = (
-            sin(deg2rad(self.y_c))
-            * ones((self.x_c.shape[0], 1))
-            * 4.0
-            * pi
-            / (23 * 3600 + 56 * 60 + 4.1)
+        self.vars[uname], self.vars[vname] = self.compute_uv_stencil(
+            data, stencil_halfwidth=stencil_halfwidth
         )
-        with errstate(divide="ignore"):
-            gof = self.GRAVITY / (gof * ones((self.x_c.shape[0], 1)))
 
-        # Compute v
+    def compute_uv_stencil(self, data, stencil_halfwidth=4):
+        """Compute u and v with stencil method, in one pass over the grid.
+
+        Give the same result than :py:meth:`compute_stencil` called for each
+        direction, but without scipy convolution and masked array temporaries.
+
+        :param array data: height grid
+        :param int stencil_halfwidth: largest stencil could be apply
+        :return: u and v
+        :rtype: (array, array)
+        """
+        stencil_halfwidth = max(min(int(stencil_halfwidth), 4), 1)
+        logger.debug("Stencil half width apply : %d", stencil_halfwidth)
+        key = "uv_stencil", stencil_halfwidth
+        if key not in self.geometry:
+            self.geometry[key] = self.uv_stencil_coefficients(stencil_halfwidth)
+        m = data.mask
+        if m.shape != data.shape:
+            m = ones(data.shape, dtype="bool") * m
+        u, v, m_u, m_v = compute_uv_stencil(data.data, m, *self.geometry[key])
+        return ma.array(u, mask=m_u), ma.array(v, mask=m_v)
+
+    def uv_stencil_coefficients(self, stencil_halfwidth):
+        """Coefficients used by :py:func:`compute_uv_stencil`, they depend of coordinates
+
+        :param int stencil_halfwidth: largest stencil could be apply
+        :return: weights, nb_weights, shifted, d_x, d_y, cos_lat, gof, wrap_x
+        :rtype: tuple
+        """
+        stencils = STENCIL_WEIGHTS[4 - stencil_halfwidth :]
+        nb_stencil = len(stencils)
+        # Store all stencil in one table, to be used by numba
+        weights = zeros((nb_stencil, 9))
+        nb_weights = empty(nb_stencil, dtype="i4")
+        shifted = zeros(nb_stencil, dtype="bool")
         mode = "wrap" if self.is_circular() else "reflect"
-        self.vars[vname] = (
-            self.compute_stencil(data, mode=mode, stencil_halfwidth=stencil_halfwidth)
-            * gof
-        )
-        # Compute u
-        self.vars[uname] = (
-            -self.compute_stencil(
-                data, vertical=True, stencil_halfwidth=stencil_halfwidth
-            )
-            * gof
+        d_x = empty((nb_stencil, self.x_c.shape[0]))
+        d_y = empty((nb_stencil, self.y_c.shape[0]))
+        coef = self.EARTH_RADIUS * 2 * pi / 360
+        for i, weight in enumerate(stencils):
+            if isinstance(weight, tuple):
+                shifted[i] = True
+                weight = weight[1]
+            nb_weights[i] = weight.shape[0]
+            weights[i, : weight.shape[0]] = weight
+            # Coordinates are always compute without shift, like in compute_stencil
+            d_y[i] = coef * convolve(self.y_c, weight)
+            if mode == "wrap":
+                x = self.x_c % 360
+                d_degrees = convolve(x, weight, mode=mode)
+                d_degrees_180 = convolve((x + 180) % 360 - 180, weight, mode=mode)
+                m = (x < 90) + (x > 270)
+                d_degrees[m] = d_degrees_180[m]
+            else:
+                d_degrees = convolve(self.x_c, weight, mode=mode)
+            d_x[i] = coef * d_degrees
+        lat = ma.getdata(self.y_c)
+        # Divide by sideral day
+        gof = sin(deg2rad(lat)) * 4.0 * pi / (23 * 3600 + 56 * 60 + 4.1)
+        with errstate(divide="ignore"):
+            gof = self.GRAVITY / gof
+        return (
+            weights,
+            nb_weights,
+            shifted,
+            d_x,
+            d_y,
+            cos(deg2rad(lat)),
+            gof,
+            mode == "wrap",
         )
 
     def speed_coef_mean(self, contour):
@@ -1826,6 +2525,26 @@ class RegularGridDataset(GridDataset):
             nan_remove=True,
         )
 
+    def speed_coef_mean_contours(self, contours, indices):
+        """Same as speed_coef_mean for several contours, in one compiled call
+
+        :param Contours contours: contours stored in flat arrays
+        :param array indices: index of contours to compute
+        :return: mean speed of each contour
+        :rtype: array
+        """
+        return mean_on_regular_contours(
+            ma.getdata(self.x_c),
+            ma.getdata(self.y_c),
+            ma.getdata(self._speed_ev),
+            ma.getmaskarray(self._speed_ev),
+            contours.vertices,
+            contours.contour_index,
+            contours.nb_pt_per_contour,
+            indices,
+            nan_remove=True,
+        )
+
     def init_speed_coef(self, uname="u", vname="v"):
         """Draft
         """
@@ -1869,11 +2588,15 @@ class RegularGridDataset(GridDataset):
         """
         if new_name is None:
             new_name = grid_name
-        x, y = meshgrid(self.x_c, self.y_c)
-        # interp and reshape
-        v_interp = (
-            other.interp(grid_name, x.reshape(-1), y.reshape(-1)).reshape(x.shape).T
-        )
+        # Plan depends only of both geometries, it's reused for next dates
+        key = "regrid", other.geometry.get("key")
+        plan = self.geometry.get(key)
+        if plan is None:
+            x, y = meshgrid(self.x_c, self.y_c, indexing="ij")
+            plan = other.interpolation_plan(x, y)
+            if key[1] is not None:
+                self.geometry[key] = plan
+        v_interp = plan.interp(other.grid(grid_name))
         v_interp = ma.array(v_interp, mask=isnan(v_interp))
         # and add it to self
         self.add_grid(new_name, v_interp)
@@ -1892,11 +2615,25 @@ class RegularGridDataset(GridDataset):
         :return: new z
         """
         g = self.grid(grid_name)
-        if len(g.mask.shape):
-            m = g.mask
-        else:
-            m = ones(g.shape) if g.mask else zeros(g.shape)
-        return interp2d_geo(self.x_c, self.y_c, g, m, lons, lats)
+        return interp2d_geo(
+            ma.getdata(self.x_c),
+            ma.getdata(self.y_c),
+            ma.getdata(g),
+            ma.getmaskarray(g),
+            lons,
+            lats,
+        )
+
+    def interpolation_plan(self, lons, lats):
+        """
+        Compute once cells of positions, to interpolate several grids on same
+        positions
+
+        :param array lons: new x
+        :param array lats: new y
+        :rtype: InterpolationPlan
+        """
+        return InterpolationPlan(self.x_c, self.y_c, lons, lats)
 
 
 @njit(cache=True, fastmath=True)
@@ -1969,6 +2706,110 @@ def compute_pixel_path(x0, y0, x1, y1, x_ori, y_ori, x_step, y_step, nb_x):
     return i_g, j_g, d_max
 
 
+@njit(cache=True)
+def _stencil_delta(data, mask, weight, nb_weight, shifted, i, j, along_x, wrap):
+    """Apply one stencil on one pixel, like a convolution with reflect or wrap mode
+
+    :return: delta of data and a flag which is False if a pixel used is masked
+    :rtype: (float, bool)
+    """
+    size = data.shape[0] if along_x else data.shape[1]
+    center = nb_weight // 2
+    d_h = 0.0
+    for k in range(nb_weight):
+        t = (i if along_x else j) + center - k
+        # boundary condition
+        if wrap:
+            t %= size
+        elif t < 0:
+            t = -t - 1
+        elif t >= size:
+            t = 2 * size - t - 1
+        # uncentered stencil work on data shifted of one pixel
+        if shifted:
+            t -= 1
+            if t < 0:
+                t = size - 1 if along_x else 0
+        if along_x:
+            if mask[t, j]:
+                return d_h, False
+            d_h += weight[k] * data[t, j]
+        else:
+            if mask[i, t]:
+                return d_h, False
+            d_h += weight[k] * data[i, t]
+    return d_h, True
+
+
+@njit(cache=True)
+def compute_uv_stencil(
+    data, mask, weights, nb_weights, shifted, d_x, d_y, cos_lat, gof, wrap_x
+):
+    """Compute u and v on each pixel, with the largest stencil which are not masked
+
+    :param array data: height grid
+    :param array mask: True if pixel is masked
+    :param array weights: weights of each stencil (one stencil by line)
+    :param array nb_weights: number of weights of each stencil
+    :param array shifted: True for stencil which must be applied on shifted data
+    :param array d_x: distance in x (m at equator) for each stencil and each longitude
+    :param array d_y: distance in y (m) for each stencil and each latitude
+    :param array cos_lat: cosine of each latitude
+    :param array gof: gravity / coriolis factor for each latitude
+    :param bool wrap_x: True if grid is circular
+    :return: u, v, mask of u, mask of v
+    :rtype: (array, array, array, array)
+    """
+    nb_x, nb_y = data.shape
+    nb_stencil = weights.shape[0]
+    u = zeros(data.shape)
+    v = zeros(data.shape)
+    m_u = ones(data.shape, dtype=numba_types.bool_)
+    m_v = ones(data.shape, dtype=numba_types.bool_)
+    for i in range(nb_x):
+        for j in range(nb_y):
+            # Iteration from larger stencil to smaller
+            for k in range(nb_stencil):
+                d_h, valid = _stencil_delta(
+                    data,
+                    mask,
+                    weights[k],
+                    nb_weights[k],
+                    shifted[k],
+                    i,
+                    j,
+                    True,
+                    wrap_x,
+                )
+                if not valid:
+                    continue
+                grad = d_h / (d_x[k, i] * cos_lat[j])
+                if isfinite(grad):
+                    v[i, j] = grad * gof[j]
+                    m_v[i, j] = False
+                    break
+            for k in range(nb_stencil):
+                d_h, valid = _stencil_delta(
+                    data,
+                    mask,
+                    weights[k],
+                    nb_weights[k],
+                    shifted[k],
+                    i,
+                    j,
+                    False,
+                    False,
+                )
+                if not valid:
+                    continue
+                grad = d_h / d_y[k, j]
+                if isfinite(grad):
+                    u[i, j] = -grad * gof[j]
+                    m_u[i, j] = False
+                    break
+    return u, v, m_u, m_v
+
+
 @njit(cache=True)
 def has_masked_value(grid, i_x, i_y):
     for i, j in zip(i_x, i_y):
@@ -1987,3 +2828,480 @@ def has_value(grid, i_x, i_y, value, below=False):
             if grid[i, j] > value:
                 return True
     return False
+
+
+@njit(cache=True)
+def contours_shape_error(vertices, contour_index, nb_pt_per_contour):
+    """
+    Compute shape error of all contours stored in flat arrays.
+
+    :param array vertices: vertices of all contours (N,2)
+    :param array contour_index: index of first vertice of each contour
+    :param array nb_pt_per_contour: number of vertices of each contour
+    :return: shape error of each contour
+    :rtype: array
+    """
+    nb_contour = contour_index.shape[0]
+    errors = empty(nb_contour, dtype=vertices.dtype)
+    for i in range(nb_contour):
+        i_start = contour_index[i]
+        i_stop = i_start + nb_pt_per_contour[i]
+        errors[i] = _fit_circle_path(vertices[i_start:i_stop])[3]
+    return errors
+
+
+@njit(cache=True)
+def contours_bbox_indice_regular(
+    vertices,
+    contour_index,
+    nb_pt_per_contour,
+    x0,
+    y0,
+    xstep,
+    ystep,
+    N,
+    circular,
+    x_size,
+):
+    """
+    Get bbox indices of all contours stored in flat arrays, in a regular grid.
+
+    :param array vertices: vertices of all contours (N,2)
+    :param array contour_index: index of first vertice of each contour
+    :param array nb_pt_per_contour: number of vertices of each contour
+    :return: x_start, x_stop, y_start, y_stop of each contour
+    :rtype: (array, array, array, array)
+
+    Others parameters are described in
+    :py:func:`~py_eddy_tracker.generic.bbox_indice_regular`
+    """
+    nb_contour = contour_index.shape[0]
+    bbox = empty((4, nb_contour), dtype=numba_types.int64)
+    for i in range(nb_contour):
+        i_start = contour_index[i]
+        i_stop = i_start + nb_pt_per_contour[i]
+        (x_start, x_stop), (y_start, y_stop) = bbox_indice_regular(
+            vertices[i_start:i_stop], x0, y0, xstep, ystep, N, circular, x_size
+        )
+        bbox[0, i], bbox[1, i], bbox[2, i], bbox[3, i] = (
+            x_start,
+            x_stop,
+            y_start,
+            y_stop,
+        )
+    return bbox[0], bbox[1], bbox[2], bbox[3]
+
+
+@njit(cache=True)
+def contour_criterion(i_contour, used, reject, shape_errors, shape_error_max):
+    """
+    Check criterions which don't need pixels of contour.
+
+    - contour already used in an eddy : no reject code
+    - shape error out of bounds : reject code 1
+
+    :return: True if contour must be skipped
+    :rtype: bool
+    """
+    if used[i_contour]:
+        return True
+    aerr = shape_errors[i_contour]
+    if aerr < 0 or aerr > shape_error_max or isnan(aerr):
+        reject[i_contour] = 1
+        return True
+    return False
+
+
+@njit(cache=True)
+def pixels_criterion(
+    i_contour, i_x, i_y, reject, mask, values, threshold, below, pixel_min, pixel_max
+):
+    """
+    Check criterions on pixels in contour, same order as in eddy_identification.
+
+    - a pixel is masked : reject code 2, only if contour was not already rejected
+    - a pixel is beyond threshold : no reject code
+    - number of pixels out of bounds : reject code 3
+
+    :return: True if contour must be skipped
+    :rtype: bool
+    """
+    if has_masked_value(mask, i_x, i_y):
+        if reject[i_contour] == 0:
+            reject[i_contour] = 2
+        return True
+    if has_value(values, i_x, i_y, threshold, below=below):
+        return True
+    nb_pixel = i_x.shape[0]
+    if nb_pixel < pixel_min or nb_pixel > pixel_max:
+        reject[i_contour] = 3
+        return True
+    return False
+
+
+@njit(cache=True)
+def select_contour_regular(
+    x_c,
+    y_c,
+    i_start,
+    i_stop,
+    vertices,
+    contour_index,
+    nb_pt_per_contour,
+    used,
+    reject,
+    shape_errors,
+    shape_error_max,
+    bbox,
+    mask,
+    values,
+    threshold,
+    below,
+    pixel_min,
+    pixel_max,
+):
+    """
+    Search in a regular grid the first contour between i_start and i_stop,
+    which respects all criterions needing only grid and contour.
+
+    :param array x_c: longitude of grid
+    :param array y_c: latitude of grid
+    :param int i_start: first contour to check
+    :param int i_stop: last contour to check (excluded)
+    :param array vertices: vertices of all contours (N,2)
+    :param array contour_index: index of first vertice of each contour
+    :param array nb_pt_per_contour: number of vertices of each contour
+    :param array[bool] used: contour already used in an eddy
+    :param array[uint8] reject: reject code of each contour, updated
+    :param array shape_errors: shape error of each contour
+    :param float shape_error_max: maximal shape error accepted
+    :param (array,array,array,array) bbox: x_start, x_stop, y_start, y_stop of contours
+    :param array[bool] mask: mask of grid, pixel already used in an eddy are masked
+    :param array values: values to compare with threshold
+    :param float threshold: no pixel value must be beyond threshold
+    :param bool below: if True, pixel value must not be below threshold
+    :param int pixel_min: minimal number of pixel
+    :param int pixel_max: maximal number of pixel
+    :return: index of contour (-1 if there are no valid contour) and pixels in contour
+    :rtype: (int, array, array)
+    """
+    x_starts, x_stops, y_starts, y_stops = bbox
+    for i in range(i_start, i_stop):
+        if contour_criterion(i, used, reject, shape_errors, shape_error_max):
+            continue
+        i_pt = contour_index[i]
+        i_x, i_y = get_pixel_in_regular(
+            vertices[i_pt : i_pt + nb_pt_per_contour[i]],
+            x_c,
+            y_c,
+            x_starts[i],
+            x_stops[i],
+            y_starts[i],
+            y_stops[i],
+        )
+        if pixels_criterion(
+            i, i_x, i_y, reject, mask, values, threshold, below, pixel_min, pixel_max
+        ):
+            continue
+        return i, i_x, i_y
+    empty_index = empty(0, dtype=numba_types.int64)
+    return -1, empty_index, empty_index
+
+
+@njit(cache=True)
+def select_contour_unregular(
+    x_c,
+    y_c,
+    i_start,
+    i_stop,
+    vertices,
+    contour_index,
+    nb_pt_per_contour,
+    used,
+    reject,
+    shape_errors,
+    shape_error_max,
+    bbox,
+    mask,
+    values,
+    threshold,
+    below,
+    pixel_min,
+    pixel_max,
+):
+    """
+    Same as :py:func:`select_contour_regular` for an unregular grid,
+    with 2D coordinates.
+    """
+    x_starts, x_stops, y_starts, y_stops = bbox
+    for i in range(i_start, i_stop):
+        if contour_criterion(i, used, reject, shape_errors, shape_error_max):
+            continue
+        i_pt = contour_index[i]
+        i_x, i_y = _get_pixel_in_unregular(
+            vertices[i_pt : i_pt + nb_pt_per_contour[i]],
+            x_c,
+            y_c,
+            x_starts[i],
+            x_stops[i],
+            y_starts[i],
+            y_stops[i],
+        )
+        if pixels_criterion(
+            i, i_x, i_y, reject, mask, values, threshold, below, pixel_min, pixel_max
+        ):
+            continue
+        return i, i_x, i_y
+    empty_index = empty(0, dtype=numba_types.int64)
+    return -1, empty_index, empty_index
+
+
+@njit(cache=True)
+def bucket_hint(x_c, y_c, x0, y0, x_step, y_step, nb_x, nb_y):
+    """
+    Get for each bucket the node nearest of bucket center.
+
+    :param array x_c: longitude of grid (2D)
+    :param array y_c: latitude of grid (2D)
+    :param float x0: west bound of buckets
+    :param float y0: south bound of buckets
+    :param float x_step: width of buckets
+    :param float y_step: height of buckets
+    :param int nb_x: number of buckets along x
+    :param int nb_y: number of buckets along y
+    :return: flat index of node for each bucket, -1 if there are no node in bucket
+    :rtype: array
+    """
+    hint = empty((nb_x, nb_y), dtype=numba_types.int64)
+    hint[:] = -1
+    dist = empty((nb_x, nb_y))
+    dist[:] = inf
+    nx, ny = x_c.shape
+    for i in range(nx):
+        for j in range(ny):
+            x, y = x_c[i, j], y_c[i, j]
+            if not isfinite(x) or not isfinite(y):
+                continue
+            b_i = min(max(int((x - x0) / x_step), 0), nb_x - 1)
+            b_j = min(max(int((y - y0) / y_step), 0), nb_y - 1)
+            d = (x - x0 - (b_i + 0.5) * x_step) ** 2 + (
+                y - y0 - (b_j + 0.5) * y_step
+            ) ** 2
+            if d < dist[b_i, b_j]:
+                dist[b_i, b_j] = d
+                hint[b_i, b_j] = i * ny + j
+    return hint
+
+
+@njit(cache=True)
+def bucket_node(hint, x0, y0, x_step, y_step, x, y):
+    """
+    Get a node near a position with bucket table, if bucket of position is
+    empty we look at buckets around.
+
+    :return: flat index of node
+    :rtype: int
+    """
+    nb_x, nb_y = hint.shape
+    b_i = min(max(int((x - x0) / x_step), 0), nb_x - 1)
+    b_j = min(max(int((y - y0) / y_step), 0), nb_y - 1)
+    for r in range(max(nb_x, nb_y)):
+        for i in range(b_i - r, b_i + r + 1):
+            if i < 0 or i >= nb_x:
+                continue
+            for j in range(b_j - r, b_j + r + 1):
+                if j < 0 or j >= nb_y:
+                    continue
+                # Only bucket on ring
+                if abs(i - b_i) != r and abs(j - b_j) != r:
+                    continue
+                if hint[i, j] != -1:
+                    return hint[i, j]
+    return 0
+
+
+@njit(cache=True)
+def walk_nearest(x_c, y_c, x, y, i, j):
+    """
+    Walk from node i, j to the neighbour node nearest of position, until
+    there are no nearer neighbour.
+
+    :return: index of node and square of distance
+    :rtype: (int, int, float)
+    """
+    nx, ny = x_c.shape
+    d = (x_c[i, j] - x) ** 2 + (y_c[i, j] - y) ** 2
+    while True:
+        i_best, j_best, d_best = i, j, d
+        for i_ in range(max(i - 1, 0), min(i + 2, nx)):
+            for j_ in range(max(j - 1, 0), min(j + 2, ny)):
+                d_ = (x_c[i_, j_] - x) ** 2 + (y_c[i_, j_] - y) ** 2
+                if d_ < d_best:
+                    i_best, j_best, d_best = i_, j_, d_
+        if i_best == i and j_best == j:
+            return i, j, d
+        i, j, d = i_best, j_best, d_best
+
+
+@njit(cache=True)
+def locate_nearest(x_c, y_c, hint, x0, y0, x_step, y_step, x, y, k):
+    """
+    Get k nearest nodes of each position, look at :py:class:`CurvilinearLocator`.
+
+    When k > 1, nearest nodes are searched in a window around the nearest node.
+
+    :return: distance and flat index of nodes (N,k)
+    :rtype: (array, array)
+    """
+    nb = x.shape[0]
+    nx, ny = x_c.shape
+    dist = empty((nb, k))
+    idx = empty((nb, k), dtype=numba_types.int64)
+    half_width = int(ceil(k ** 0.5))
+    i, j = -1, -1
+    for p in range(nb):
+        x_, y_ = x[p], y[p]
+        node = bucket_node(hint, x0, y0, x_step, y_step, x_, y_)
+        i_start, j_start = node // ny, node % ny
+        # Previous result could be nearer, when positions are successive
+        if i != -1:
+            d_hint = (x_c[i_start, j_start] - x_) ** 2 + (
+                y_c[i_start, j_start] - y_
+            ) ** 2
+            d_previous = (x_c[i, j] - x_) ** 2 + (y_c[i, j] - y_) ** 2
+            if d_previous < d_hint:
+                i_start, j_start = i, j
+        i, j, d = walk_nearest(x_c, y_c, x_, y_, i_start, j_start)
+        dist[p, 0], idx[p, 0] = d, i * ny + j
+        if k > 1:
+            dist[p, 1:] = inf
+            idx[p, 1:] = -1
+            for i_ in range(max(i - half_width, 0), min(i + half_width + 1, nx)):
+                for j_ in range(max(j - half_width, 0), min(j + half_width + 1, ny)):
+                    if i_ == i and j_ == j:
+                        continue
+                    d_ = (x_c[i_, j_] - x_) ** 2 + (y_c[i_, j_] - y_) ** 2
+                    # Insertion in sorted list
+                    m = k - 1
+                    if d_ >= dist[p, m]:
+                        continue
+                    while m > 1 and d_ < dist[p, m - 1]:
+                        dist[p, m], idx[p, m] = dist[p, m - 1], idx[p, m - 1]
+                        m -= 1
+                    dist[p, m], idx[p, m] = d_, i_ * ny + j_
+    return sqrt(dist), idx
+
+
+@njit(cache=True)
+def inverse_bilinear(x00, y00, x10, y10, x11, y11, x01, y01, x, y):
+    """
+    Get coordinates s, t of position in a quadrilateral cell with Newton
+    iterations, position is in cell if s and t are between 0 and 1.
+
+    :return: s, t
+    :rtype: (float, float)
+    """
+    s, t = 0.5, 0.5
+    for _ in range(20):
+        a_x, a_y = x10 - x00, y10 - y00
+        b_x, b_y = x01 - x00, y01 - y00
+        c_x, c_y = x11 - x10 - x01 + x00, y11 - y10 - y01 + y00
+        # Residual and jacobian
+        f_x = x00 + a_x * s + b_x * t + c_x * s * t - x
+        f_y = y00 + a_y * s + b_y * t + c_y * s * t - y
+        ds_x, ds_y = a_x + c_x * t, a_y + c_y * t
+        dt_x, dt_y = b_x + c_x * s, b_y + c_y * s
+        det = ds_x * dt_y - dt_x * ds_y
+        if det == 0:
+            return nan, nan
+        d_s = (f_x * dt_y - dt_x * f_y) / det
+        d_t = (ds_x * f_y - f_x * ds_y) / det
+        s -= d_s
+        t -= d_t
+        if abs(d_s) < 1e-12 and abs(d_t) < 1e-12:
+            break
+    return s, t
+
+
+@njit(cache=True)
+def locate_cells(x_c, y_c, hint, x0, y0, x_step, y_step, x, y):
+    """
+    Find cell of each position and bilinear weights of its corners, look at
+    :py:class:`BilinearWeights`.
+
+    We start from the nearest node and look at the 4 cells around it, then at the
+    next ring of cells for very distorted grids.
+
+    :return: index i, j of cells (-1 if position is out of grid) and weights (N,4)
+    :rtype: (array, array, array)
+    """
+    nb = x.shape[0]
+    nx, ny = x_c.shape
+    _, idx = locate_nearest(x_c, y_c, hint, x0, y0, x_step, y_step, x, y, 1)
+    i_cell = empty(nb, dtype=numba_types.int64)
+    j_cell = empty(nb, dtype=numba_types.int64)
+    weights = zeros((nb, 4))
+    eps = 1e-9
+    for p in range(nb):
+        i_cell[p], j_cell[p] = -1, -1
+        i_n, j_n = idx[p, 0] // ny, idx[p, 0] % ny
+        for r in range(1, 3):
+            for i in range(max(i_n - r, 0), min(i_n + r, nx - 1)):
+                for j in range(max(j_n - r, 0), min(j_n + r, ny - 1)):
+                    # Cells of previous ring are already tested
+                    inner_i = i_n - r < i < i_n + r - 1
+                    if r > 1 and inner_i and j_n - r < j < j_n + r - 1:
+                        continue
+                    s, t = inverse_bilinear(
+                        x_c[i, j],
+                        y_c[i, j],
+                        x_c[i + 1, j],
+                        y_c[i + 1, j],
+                        x_c[i + 1, j + 1],
+                        y_c[i + 1, j + 1],
+                        x_c[i, j + 1],
+                        y_c[i, j + 1],
+                        x[p],
+                        y[p],
+                    )
+                    if not (-eps <= s <= 1 + eps and -eps <= t <= 1 + eps):
+                        continue
+                    s, t = min(max(s, 0.0), 1.0), min(max(t, 0.0), 1.0)
+                    i_cell[p], j_cell[p] = i, j
+                    weights[p, 0] = (1 - s) * (1 - t)
+                    weights[p, 1] = s * (1 - t)
+                    weights[p, 2] = s * t
+                    weights[p, 3] = (1 - s) * t
+                    break
+                if i_cell[p] != -1:
+                    break
+            if i_cell[p] != -1:
+                break
+    return i_cell, j_cell, weights
+
+
+@njit(cache=True)
+def interp_cells(z, m, i_cell, j_cell, weights):
+    """
+    Weighted mean of cell corners, look at :py:class:`BilinearWeights`.
+
+    :param array z: grid values
+    :param array[bool] m: grid mask
+    :return: interpolated values, nan out of grid or if all corners are masked
+    :rtype: array
+    """
+    nb = i_cell.shape[0]
+    values = empty(nb)
+    for p in range(nb):
+        i, j = i_cell[p], j_cell[p]
+        if i == -1:
+            values[p] = nan
+            continue
+        w_sum, v_sum = 0.0, 0.0
+        for k, (i_, j_) in enumerate(((i, j), (i + 1, j), (i + 1, j + 1), (i, j + 1))):
+            if m[i_, j_]:
+                continue
+            w_sum += weights[p, k]
+            v_sum += weights[p, k] * z[i_, j_]
+        values[p] = v_sum / w_sum if w_sum > 0 else nan
+    return values
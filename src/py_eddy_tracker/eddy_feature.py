@@ -15,12 +15,11 @@ from numpy import (
     ones,
     int_,
     digitize,
+    searchsorted,
+    sort,
 )
-from matplotlib.colors import Normalize
-from matplotlib.figure import Figure
-from matplotlib.cm import get_cmap
 from numba import njit, types as numba_types
-from .poly import winding_number_poly
+from .poly import winding_number_poly, create_vertice
 
 logger = logging.getLogger("pet")
 
@@ -280,6 +279,7 @@ class Contours(object):
         "contours",
         "x_value",
         "y_value",
+        "vertices",
         "contour_index",
         "level_index",
         "x_min_per_contour",
@@ -288,6 +288,9 @@ class Contours(object):
         "y_max_per_contour",
         "nb_pt_per_contour",
         "nb_contour_per_level",
+        "used_per_contour",
+        "reject_per_contour",
+        "nesting",
     )
 
     DELTA_PREC = 1e-10
@@ -376,6 +379,11 @@ class Contours(object):
         c_i : index to contours
         l_i : index to levels
         """
+        from matplotlib.figure import Figure
+        from .dataset.grid import patch_matplotlib_path
+
+        # Methods of grid module are used on contours
+        patch_matplotlib_path()
         logger.info("Start computing iso lines")
         fig = Figure()
         ax = fig.add_subplot(111)
@@ -495,6 +503,8 @@ class Contours(object):
 
                 # Count pt
                 self.nb_pt_per_contour[i_c] = nb_pt
+                # Link between path and flat arrays
+                contour.index = i_c
                 i_pt += nb_pt
                 i_c += 1
             i_l += 1
@@ -505,6 +515,94 @@ class Contours(object):
         self.level_index[0] = 0
         self.nb_contour_per_level[:-1] = self.level_index[1:] - self.level_index[:-1]
         self.nb_contour_per_level[-1] = nb_contour - self.level_index[-1]
+        # Vertices of all contours (N,2), contour i is
+        # vertices[contour_index[i]:contour_index[i] + nb_pt_per_contour[i]]
+        self.vertices = create_vertice(self.x_value, self.y_value)
+
+        # Flags used during identification, copied on paths with update_paths_flags
+        self.used_per_contour = zeros(nb_contour, dtype="bool")
+        self.reject_per_contour = zeros(nb_contour, dtype="u1")
+        # Nesting tree, computed at the first call of get_nesting
+        self.nesting = dict()
+
+    def get_nesting(self, step):
+        """Get for each contour all contours of level + step which are inside,
+        computed only at the first call
+
+        :param int step: 1 to get contours of upper level, -1 for lower level
+        :return: index of first child for each contour and children,
+            children of contour i are children[i_first[i]:i_first[i + 1]]
+        :rtype: (array, array)
+        """
+        if step not in self.nesting:
+            self.nesting[step] = contours_nesting_(
+                self.level_index,
+                self.nb_contour_per_level,
+                self.nb_pt_per_contour,
+                self.contour_index,
+                self.vertices,
+                self.x_min_per_contour,
+                self.y_min_per_contour,
+                self.x_max_per_contour,
+                self.y_max_per_contour,
+                step,
+            )
+        return self.nesting[step]
+
+    def inner_contours(self, i_contour, xpt, ypt, step):
+        """Get successive contours inside a contour, on each level we select
+        the nearest contour of pt, among contours with a bbox which contains pt.
+        Walk stop at the first level where the nearest contour is not inside
+        start contour. Only the containment test uses the nesting tree, look at
+        :py:meth:`get_nesting`.
+
+        :param int i_contour: index of start contour
+        :param float xpt: x of point to follow
+        :param float ypt: y of point to follow
+        :param int step: 1 to walk on upper levels, -1 for lower levels
+        :return: index of one contour by level
+        :rtype: array
+        """
+        i_first_child, children = self.get_nesting(step)
+        level = self.level_index.searchsorted(i_contour, side="right") - 1
+        return inner_contours_(
+            int(i_contour),
+            level,
+            step,
+            i_first_child,
+            children,
+            self.level_index,
+            self.nb_contour_per_level,
+            self.nb_pt_per_contour,
+            self.contour_index,
+            self.x_value,
+            self.y_value,
+            self.x_min_per_contour,
+            self.y_min_per_contour,
+            self.x_max_per_contour,
+            self.y_max_per_contour,
+            xpt,
+            ypt,
+        )
+
+    def get_path(self, i_contour):
+        """Get path from index of contour in flat arrays
+
+        :param int i_contour: index of contour
+        :rtype: matplotlib.path.Path
+        """
+        level = self.level_index.searchsorted(i_contour, side="right") - 1
+        return self.contours.collections[level]._paths[
+            i_contour - self.level_index[level]
+        ]
+
+    def update_paths_flags(self):
+        """Copy used and reject flags of flat arrays on each path
+        """
+        for collection in self.contours.collections:
+            for contour in collection.get_paths():
+                contour.used = bool(self.used_per_contour[contour.index])
+                contour.reject = int(self.reject_per_contour[contour.index])
 
     def iter(self, start=None, stop=None, step=None):
         return self.contours.collections[slice(start, stop, step)]
@@ -583,6 +681,8 @@ class Contours(object):
         .. minigallery:: py_eddy_tracker.Contours.display
         """
         from matplotlib.collections import LineCollection
+        from matplotlib.colors import Normalize
+        from matplotlib.cm import get_cmap
 
         overide_color = display_criterion or field is not None
         if display_criterion:
@@ -761,3 +861,162 @@ def index_from_nearest_path_with_pt_in_bbox_(
         return int_(-1)
     # We return index of contour, for the specific level
     return int_(i_ref - i_start_c)
+
+
+@njit(cache=True)
+def bbox_contain_bbox(x0_out, x1_out, y0_out, y1_out, x0_in, x1_in, y0_in, y1_in):
+    """Check if bbox in is included in bbox out, x could be shift of 360
+    """
+    if y0_in < y0_out or y1_in > y1_out:
+        return False
+    for shift in (-360.0, 0.0, 360.0):
+        if x0_in + shift >= x0_out and x1_in + shift <= x1_out:
+            return True
+    return False
+
+
+@njit(cache=True)
+def contours_nesting_(
+    l_i,
+    nb_c_per_l,
+    nb_pt_per_c,
+    indices_of_first_pts,
+    vertices,
+    x_min_per_c,
+    y_min_per_c,
+    x_max_per_c,
+    y_max_per_c,
+    step,
+):
+    """Get for each contour all contours of the next level (level + step)
+    which are inside
+
+    :return: index of first child for each contour and children,
+        children of contour i are children[i_first[i]:i_first[i + 1]]
+    :rtype: (array, array)
+    """
+    nb_level = l_i.shape[0]
+    nb_c = nb_pt_per_c.shape[0]
+    i_first = zeros(nb_c + 1, dtype=numba_types.int64)
+    # Numba work around
+    children = [0]
+    children.pop(0)
+    for level in range(nb_level):
+        i_start_out = l_i[level]
+        i_end_out = i_start_out + nb_c_per_l[level]
+        next_level = level + step
+        if next_level < 0 or next_level >= nb_level:
+            for i_out in range(i_start_out, i_end_out):
+                i_first[i_out + 1] = len(children)
+            continue
+        i_start_in = l_i[next_level]
+        i_end_in = i_start_in + nb_c_per_l[next_level]
+        # Contours of next level sorted by south bound, to check only
+        # contours in latitude band of outer contour
+        y_min_in = y_min_per_c[i_start_in:i_end_in]
+        order = y_min_in.argsort()
+        y_min_in = y_min_in[order]
+        for i_out in range(i_start_out, i_end_out):
+            i_pt = indices_of_first_pts[i_out]
+            v_out = vertices[i_pt : i_pt + nb_pt_per_c[i_out]]
+            k_start = searchsorted(y_min_in, y_min_per_c[i_out], side="left")
+            k_end = searchsorted(y_min_in, y_max_per_c[i_out], side="right")
+            # Keep contour order
+            for i_in in sort(order[k_start:k_end]) + i_start_in:
+                if not bbox_contain_bbox(
+                    x_min_per_c[i_out],
+                    x_max_per_c[i_out],
+                    y_min_per_c[i_out],
+                    y_max_per_c[i_out],
+                    x_min_per_c[i_in],
+                    x_max_per_c[i_in],
+                    y_min_per_c[i_in],
+                    y_max_per_c[i_in],
+                ):
+                    continue
+                # Iso-lines of two levels could not cross, so we check only
+                # first vertice
+                x_in = vertices[indices_of_first_pts[i_in], 0]
+                if abs(x_in - v_out[0, 0]) > 180:
+                    x_in = (x_in - v_out[0, 0] + 180) % 360 + v_out[0, 0] - 180
+                y_in = vertices[indices_of_first_pts[i_in], 1]
+                if winding_number_poly(x_in, y_in, v_out) != 0:
+                    children.append(i_in)
+            i_first[i_out + 1] = len(children)
+    return i_first, array(children, dtype=numba_types.int64)
+
+
+@njit(cache=True)
+def inner_contours_(
+    i_contour,
+    level,
+    step,
+    i_first_child,
+    children,
+    l_i,
+    nb_c_per_l,
+    nb_pt_per_c,
+    indices_of_first_pts,
+    x_value,
+    y_value,
+    x_min_per_c,
+    y_min_per_c,
+    x_max_per_c,
+    y_max_per_c,
+    xpt,
+    ypt,
+):
+    """Walk on levels from a contour, at each level we select the nearest contour
+    of pt among all contours of the level, like
+    :py:func:`index_from_nearest_path_with_pt_in_bbox_`. Walk stop at the first
+    level without contour or if selected contour is not inside start contour,
+    contours inside start contour are found with nesting tree.
+
+    Each level is still scanned to find the nearest contour, nesting tree only
+    replaces the polygon containment test
+    (:py:func:`~py_eddy_tracker.poly.poly_contain_poly`).
+
+    :return: index of selected contour for each level
+    :rtype: array
+    """
+    selected = [0]
+    selected.pop(0)
+    nb_level = l_i.shape[0]
+    # All contours of current level inside start contour
+    current = [i_contour]
+    while True:
+        level += step
+        if level < 0 or level >= nb_level:
+            break
+        i_ref = index_from_nearest_path_with_pt_in_bbox_(
+            level,
+            l_i,
+            nb_c_per_l,
+            nb_pt_per_c,
+            indices_of_first_pts,
+            x_value,
+            y_value,
+            x_min_per_c,
+            y_min_per_c,
+            x_max_per_c,
+            y_max_per_c,
+            xpt,
+            ypt,
+        )
+        if i_ref == -1:
+            break
+        i_ref += l_i[level]
+        next_ = [0]
+        next_.pop(0)
+        inside = False
+        for i_c in current:
+            for i_child in range(i_first_child[i_c], i_first_child[i_c + 1]):
+                next_.append(children[i_child])
+                if children[i_child] == i_ref:
+                    inside = True
+        # Nearest contour is outside start contour
+        if not inside:
+            break
+        selected.append(i_ref)
+        current = next_
+    return array(selected, dtype=numba_types.int64)
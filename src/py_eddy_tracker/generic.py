@@ -155,7 +155,45 @@ def cumsum_by_track(field, track):
     return cumsum_array
 
 
+@njit(cache=True)
+def is_circular_axis(x_g):
+    """
+    Check if regular longitudes cover the globe.
+
+    :param array x_g: coordinates of grid
+    :rtype: bool
+    """
+    x_step = x_g[1] - x_g[0]
+    return (x_g[-1] + x_step) % 360 == x_g[0] % 360
+
+
 @njit(cache=True, fastmath=True)
+def bilinear_cell(x_ref, y_ref, x_step, y_step, nb_x, nb_y, is_circular, x, y):
+    """
+    Get cell of a position in a regular grid.
+
+    :return: indices i0, i1, j0 of cell and position xd, yd in cell,
+        i0 is -1 if position is out of grid
+    :rtype: (int, int, int, float, float)
+    """
+    x_ = (x - x_ref) / x_step
+    y_ = (y - y_ref) / y_step
+    i0 = int(floor(x_))
+    i1 = i0 + 1
+    xd = x_ - i0
+    j0 = int(floor(y_))
+    yd = y_ - j0
+    if is_circular:
+        i0 %= nb_x
+        i1 %= nb_x
+    elif i1 >= nb_x or i0 < 0:
+        return -1, -1, -1, xd, yd
+    if j0 < 0 or j0 + 1 >= nb_y:
+        return -1, -1, -1, xd, yd
+    return i0, i1, j0, xd, yd
+
+
+@njit(cache=True, fastmath=True, parallel=True)
 def interp2d_geo(x_g, y_g, z_g, m_g, x, y):
     """
     For geographic grid, test of cicularity.
@@ -169,32 +207,51 @@ def interp2d_geo(x_g, y_g, z_g, m_g, x, y):
     :return: z interpolated
     :rtype: array
     """
-    # TODO : Maybe test if we are out of bounds
-    x_ref = x_g[0]
-    y_ref = y_g[0]
-    x_step = x_g[1] - x_ref
-    y_step = y_g[1] - y_ref
-    nb_x = x_g.shape[0]
-    nb_y = y_g.shape[0]
-    is_circular = (x_g[-1] + x_step) % 360 == x_g[0] % 360
+    x_ref, y_ref = x_g[0], y_g[0]
+    x_step, y_step = x_g[1] - x_ref, y_g[1] - y_ref
+    nb_x, nb_y = x_g.shape[0], y_g.shape[0]
+    is_circular = is_circular_axis(x_g)
     z = empty(x.shape, dtype=z_g.dtype)
     for i in prange(x.size):
-        x_ = (x[i] - x_ref) / x_step
-        y_ = (y[i] - y_ref) / y_step
-        i0 = int(floor(x_))
-        i1 = i0 + 1
-        xd = x_ - i0
-        j0 = int(floor(y_))
+        i0, i1, j0, xd, yd = bilinear_cell(
+            x_ref, y_ref, x_step, y_step, nb_x, nb_y, is_circular, x[i], y[i]
+        )
+        if i0 == -1:
+            z[i] = nan
+            continue
         j1 = j0 + 1
-        if is_circular:
-            i0 %= nb_x
-            i1 %= nb_x
+        z00 = z_g[i0, j0]
+        z01 = z_g[i0, j1]
+        z10 = z_g[i1, j0]
+        z11 = z_g[i1, j1]
+        if m_g[i0, j0] or m_g[i0, j1] or m_g[i1, j0] or m_g[i1, j1]:
+            z[i] = nan
         else:
-            if i1 >= nb_x or i0 < 0 or j0 < 0 or j1 >= nb_y:
-                z[i] = nan
-                continue
+            z[i] = (z00 * (1 - xd) + (z10 * xd)) * (1 - yd) + (
+                z01 * (1 - xd) + z11 * xd
+            ) * yd
+    return z
+
 
-        yd = y_ - j0
+@njit(cache=True, fastmath=True)
+def interp2d_geo_serial(x_g, y_g, z_g, m_g, x, y):
+    """
+    Same as :py:func:`interp2d_geo` without threads, for small arrays
+    interpolated in a compiled loop.
+    """
+    x_ref, y_ref = x_g[0], y_g[0]
+    x_step, y_step = x_g[1] - x_ref, y_g[1] - y_ref
+    nb_x, nb_y = x_g.shape[0], y_g.shape[0]
+    is_circular = is_circular_axis(x_g)
+    z = empty(x.shape, dtype=z_g.dtype)
+    for i in range(x.size):
+        i0, i1, j0, xd, yd = bilinear_cell(
+            x_ref, y_ref, x_step, y_step, nb_x, nb_y, is_circular, x[i], y[i]
+        )
+        if i0 == -1:
+            z[i] = nan
+            continue
+        j1 = j0 + 1
         z00 = z_g[i0, j0]
         z01 = z_g[i0, j1]
         z10 = z_g[i1, j0]
@@ -208,6 +265,66 @@ def interp2d_geo(x_g, y_g, z_g, m_g, x, y):
     return z
 
 
+@njit(cache=True, fastmath=True, parallel=True)
+def interp2d_plan(x_g, y_g, x, y):
+    """
+    Compute cells and positions in cells used by :py:func:`interp2d_geo`, to
+    interpolate several grids on the same positions with :py:func:`interp2d_apply`.
+
+    :param array x_g: coordinates of grid
+    :param array y_g: coordinates of grid
+    :param array x: coordinate where interpolate
+    :param array y: coordinate where interpolate
+    :return: i0, i1, j0, xd, yd
+    :rtype: (array, array, array, array, array)
+    """
+    x_ref, y_ref = x_g[0], y_g[0]
+    x_step, y_step = x_g[1] - x_ref, y_g[1] - y_ref
+    nb_x, nb_y = x_g.shape[0], y_g.shape[0]
+    is_circular = is_circular_axis(x_g)
+    nb = x.size
+    i0 = empty(nb, dtype=numba_types.int64)
+    i1 = empty(nb, dtype=numba_types.int64)
+    j0 = empty(nb, dtype=numba_types.int64)
+    xd, yd = empty(nb), empty(nb)
+    for i in prange(nb):
+        i0[i], i1[i], j0[i], xd[i], yd[i] = bilinear_cell(
+            x_ref, y_ref, x_step, y_step, nb_x, nb_y, is_circular, x[i], y[i]
+        )
+    return i0, i1, j0, xd, yd
+
+
+@njit(cache=True, fastmath=True, parallel=True)
+def interp2d_apply(z_g, m_g, i0, i1, j0, xd, yd):
+    """
+    Interpolate a grid with a plan computed by :py:func:`interp2d_plan`.
+
+    :param array z_g: Grid value
+    :param array m_g: Boolean grid, True if value is masked
+    :return: z interpolated
+    :rtype: array
+    """
+    nb = i0.shape[0]
+    z = empty(nb, dtype=z_g.dtype)
+    for i in prange(nb):
+        i0_, i1_, j0_, j1_ = i0[i], i1[i], j0[i], j0[i] + 1
+        if i0_ == -1:
+            z[i] = nan
+            continue
+        z00 = z_g[i0_, j0_]
+        z01 = z_g[i0_, j1_]
+        z10 = z_g[i1_, j0_]
+        z11 = z_g[i1_, j1_]
+        if m_g[i0_, j0_] or m_g[i0_, j1_] or m_g[i1_, j0_] or m_g[i1_, j1_]:
+            z[i] = nan
+        else:
+            xd_, yd_ = xd[i], yd[i]
+            z[i] = (z00 * (1 - xd_) + (z10 * xd_)) * (1 - yd_) + (
+                z01 * (1 - xd_) + z11 * xd_
+            ) * yd_
+    return z
+
+
 @njit(cache=True, fastmath=True)
 def uniform_resample(x_val, y_val, num_fac=2, fixed_size=None):
     """
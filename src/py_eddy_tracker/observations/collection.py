@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+"""
+Class to use a collection of identification files like one dataset
+"""
+import logging
+from os import path
+from netCDF4 import Dataset
+from numpy import array, empty, zeros, arange, concatenate, unique
+from .. import VAR_DESCR
+from .observation import EddiesObservations
+
+logger = logging.getLogger("pet")
+
+
+class EddiesCollection:
+    """
+    Virtual concatenation of identification files, an index with number of
+    observations, time and position bounds of each file is used to open only
+    files needed by a selection
+
+    :param list filenames: files of collection, sorted in time
+    :param dict index: index of files, computed if not given, look at
+        :py:meth:`compute_index`
+    :param class class_method: class used to load files
+    :param int cache_size: number of loaded files kept in memory
+    """
+
+    __slots__ = (
+        "filenames",
+        "index",
+        "first_index",
+        "class_method",
+        "cache_size",
+        "cache",
+    )
+
+    INDEX_VARIABLES = (
+        "nb_obs",
+        "time_min",
+        "time_max",
+        "lon_min",
+        "lon_max",
+        "lat_min",
+        "lat_max",
+    )
+
+    def __init__(self, filenames, index=None, class_method=None, cache_size=3):
+        self.filenames = list(filenames)
+        if class_method is None:
+            class_method = EddiesObservations
+        self.class_method = class_method
+        self.index = self.compute_index() if index is None else index
+        nb_obs = self.index["nb_obs"]
+        self.first_index = concatenate(((0,), nb_obs.cumsum()))
+        self.cache_size = cache_size
+        self.cache = dict()
+
+    def __len__(self):
+        return int(self.first_index[-1])
+
+    def __repr__(self):
+        t0, t1 = self.period
+        nb_file = len(self.filenames)
+        return f"{nb_file} files, {len(self)} observations from {t0} to {t1}"
+
+    @property
+    def period(self):
+        """
+        Give time coverage
+
+        :return: first and last date, None if there are no observations
+        :rtype: (int,int)
+        """
+        m = self.index["nb_obs"] > 0
+        if not m.any():
+            return None, None
+        return self.index["time_min"][m].min(), self.index["time_max"][m].max()
+
+    def compute_index(self):
+        """
+        Read only time and position of each file to build index
+
+        :return: number of observations, time, longitude (in [0, 360[) and
+            latitude bounds of each file
+        :rtype: dict
+        """
+        index = {k: empty(len(self.filenames)) for k in self.INDEX_VARIABLES}
+        index["nb_obs"] = zeros(len(self.filenames), dtype="i8")
+        names = [VAR_DESCR[i]["nc_name"] for i in ("time", "lon", "lat")]
+        for i, filename in enumerate(self.filenames):
+            e = self.class_method.load_file(filename, include_vars=names)
+            index["nb_obs"][i] = len(e)
+            if len(e) == 0:
+                for k in self.INDEX_VARIABLES[1:]:
+                    index[k][i] = float("nan")
+                continue
+            lon = e.longitude % 360
+            for name, values in (("time", e.time), ("lon", lon), ("lat", e.latitude)):
+                index[f"{name}_min"][i] = values.min()
+                index[f"{name}_max"][i] = values.max()
+        return index
+
+    def write_index(self, filename):
+        """
+        Store index of collection in a netcdf file, path of files are stored
+        relatively to index file
+
+        :param str filename: netcdf file to write
+        """
+        directory = path.dirname(path.abspath(filename))
+        with Dataset(filename, "w") as h:
+            h.createDimension("file", len(self.filenames))
+            var = h.createVariable("filename", str, ("file",))
+            for i, name in enumerate(self.filenames):
+                var[i] = path.relpath(path.abspath(name), directory)
+            for name in self.INDEX_VARIABLES:
+                values = self.index[name]
+                h.createVariable(name, values.dtype, ("file",))[:] = values
+
+    @classmethod
+    def from_index(cls, filename, **kwargs):
+        """
+        Load a collection from an index written by :py:meth:`write_index`
+
+        :param str filename: netcdf index
+        :param dict kwargs: look at :py:class:`EddiesCollection`
+        :rtype: EddiesCollection
+        """
+        directory = path.dirname(path.abspath(filename))
+        with Dataset(filename) as h:
+            filenames = [path.join(directory, i) for i in h.variables["filename"][:]]
+            index = {k: h.variables[k][:].data for k in cls.INDEX_VARIABLES}
+        return cls(filenames, index=index, **kwargs)
+
+    def load(self, i, **kwargs):
+        """
+        Load one file of collection, last loaded files are kept in cache
+
+        :param int i: index of file
+        :param dict kwargs: look at :py:meth:`EddiesObservations.load_file`
+        :return: a copy of cached observations, which could be modified
+        :rtype: EddiesObservations
+        """
+        e = self.load_cached(i, **kwargs)
+        eddies = e.new_like(e, len(e))
+        eddies.obs[:] = e.obs
+        eddies.sign_type = e.sign_type
+        return eddies
+
+    def load_cached(self, i, **kwargs):
+        """
+        Load one file of collection, last loaded files are kept in cache
+
+        :param int i: index of file
+        :param dict kwargs: look at :py:meth:`EddiesObservations.load_file`
+        :return: cached observations, must be used as read-only
+        :rtype: EddiesObservations
+        """
+        key = (i, repr(sorted(kwargs.items())))
+        if key not in self.cache:
+            if len(self.cache) >= self.cache_size:
+                self.cache.pop(next(iter(self.cache)))
+            logger.debug("Load %s", self.filenames[i])
+            self.cache[key] = self.class_method.load_file(self.filenames[i], **kwargs)
+        return self.cache[key]
+
+    def empty_observations(self, **kwargs):
+        """
+        Build a dataset without observations, with variables of files if there
+        are files in collection
+
+        :param dict kwargs: look at :py:meth:`EddiesObservations.load_file`
+        :rtype: EddiesObservations
+        """
+        if len(self.filenames) == 0:
+            return self.class_method(0)
+        e = self.load_cached(0, **kwargs)
+        eddies = e.new_like(e, 0)
+        eddies.sign_type = e.sign_type
+        return eddies
+
+    def files_with_period(self, period):
+        """
+        :param (int,int) period: first and last day (included)
+        :return: index of files which could have observations in period
+        :rtype: array
+        """
+        t_min, t_max = self.index["time_min"], self.index["time_max"]
+        return ((t_max >= period[0]) * (t_min <= period[1])).nonzero()[0]
+
+    def files_with_area(self, area):
+        """
+        :param dict area: bounding box like in
+            :py:meth:`EddiesObservations.extract_with_area`
+        :return: index of files which could have observations in area
+        :rtype: array
+        """
+        m = (self.index["lat_max"] > area["llcrnrlat"]) * (
+            self.index["lat_min"] < area["urcrnrlat"]
+        )
+        # Overlap of two arcs of longitude
+        lon0 = area["llcrnrlon"] % 360
+        width = area["urcrnrlon"] - area["llcrnrlon"]
+        lon_min, lon_max = self.index["lon_min"], self.index["lon_max"]
+        m *= ((lon_min - lon0) % 360 <= width) + (
+            (lon0 - lon_min) % 360 <= lon_max - lon_min
+        )
+        return m.nonzero()[0]
+
+    def to_observations(self, files=None, **kwargs):
+        """
+        Concatenate files in one dataset, memory is allocated once with number of
+        observations stored in index
+
+        :param array files: index of files to use, all if None
+        :param dict kwargs: look at :py:meth:`EddiesObservations.load_file`
+        :rtype: EddiesObservations
+        """
+        files = arange(len(self.filenames)) if files is None else files
+        if len(files) == 0:
+            return self.empty_observations(**kwargs)
+        nb_obs = self.index["nb_obs"][files].sum()
+        eddies = None
+        i = 0
+        for i_file in files:
+            e = self.load_cached(i_file, **kwargs)
+            if eddies is None:
+                eddies = e.new_like(e, nb_obs)
+                eddies.sign_type = e.sign_type
+            nb = len(e)
+            if nb != self.index["nb_obs"][i_file]:
+                raise Exception(f"Index is out of date for {self.filenames[i_file]}")
+            eddies.obs[i : i + nb] = e.obs
+            i += nb
+        return eddies
+
+    def extract_with_period(self, period, **kwargs):
+        """
+        Extract observations in a period, only files which overlap period are
+        opened
+
+        :param (int,int) period: first and last day (included)
+        :param dict kwargs: look at :py:meth:`EddiesObservations.load_file`
+        :rtype: EddiesObservations
+        """
+        eddies = self.to_observations(self.files_with_period(period), **kwargs)
+        m = (eddies.time >= period[0]) * (eddies.time <= period[1])
+        return eddies.extract_with_mask(m)
+
+    def extract_with_area(self, area, **kwargs):
+        """
+        Extract observations in an area, only files which overlap area are opened
+
+        :param dict area: bounding box like in
+            :py:meth:`EddiesObservations.extract_with_area`
+        :param dict kwargs: look at :py:meth:`EddiesObservations.load_file`
+        :rtype: EddiesObservations
+        """
+        eddies = self.to_observations(self.files_with_area(area), **kwargs)
+        return eddies.extract_with_area(area)
+
+    def get_observations(self, rows, **kwargs):
+        """
+        Get observations with their index in collection, only files which store
+        these rows are opened
+
+        :param array rows: index of observations in collection
+        :param dict kwargs: look at :py:meth:`EddiesObservations.load_file`
+        :return: observations in same order than rows
+        :rtype: EddiesObservations
+        """
+        i_files, i_rows = self.file_of_observations(rows)
+        eddies = None
+        for i_file in unique(i_files):
+            m = i_files == i_file
+            e = self.load_cached(i_file, **kwargs)
+            if eddies is None:
+                eddies = e.new_like(e, i_files.shape[0])
+                eddies.sign_type = e.sign_type
+            eddies.obs[m] = e.obs[i_rows[m]]
+        if eddies is None:
+            eddies = self.empty_observations(**kwargs)
+        return eddies
+
+    def file_of_observations(self, rows):
+        """
+        :param array rows: index of observations in collection
+        :return: index of file and index in this file of each observation
+        :rtype: (array, array)
+        """
+        rows = array(rows, dtype="i8")
+        if ((rows < 0) + (rows >= len(self))).any():
+            raise Exception(f"Index out of collection with {len(self)} observations")
+        i_files = self.first_index.searchsorted(rows, side="right") - 1
+        return i_files, rows - self.first_index[i_files]
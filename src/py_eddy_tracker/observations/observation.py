@@ -3,7 +3,12 @@
 Base class to manage eddy observation
 """
 import logging
-import zarr
+import hashlib
+from collections import deque
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from multiprocessing import get_context
+from os.path import exists
 from numpy import (
     zeros,
     where,
@@ -27,19 +32,19 @@ from numpy import (
     sin,
     histogram,
     digitize,
+    nan,
+    bincount,
+    inf,
+    sqrt,
+    lexsort,
+    iinfo,
 )
-from netCDF4 import Dataset
+from netCDF4 import Dataset, default_fillvals
 from datetime import datetime
-from numba import njit, types as numba_types
+from numba import njit, prange, get_num_threads, types as numba_types
 from Polygon import Polygon
-from pint import UnitRegistry
-from pint.errors import UndefinedUnitError
 from tokenize import TokenError
 from tarfile import ExFileObject
-from matplotlib.path import Path as BasePath
-from matplotlib.collections import PolyCollection
-from matplotlib.cm import get_cmap
-from matplotlib.colors import Normalize
 from .. import VAR_DESCR, VAR_DESCR_inv, __version__
 from ..generic import (
     distance_grid,
@@ -62,6 +67,107 @@ from ..poly import (
 
 logger = logging.getLogger("pet")
 
+#: Chunking and compression used to write observations in netcdf
+#:
+#: - default: fast compression, 2d variables chunked by ~400k values
+#: - fast-write: no compression and contiguous storage, fastest write, biggest file
+#: - small-file: strong compression on large chunks
+#: - random-access: small chunks along obs, to read few observations quickly
+NETCDF_PROFILES = {
+    "default": dict(
+        zlib=True, complevel=1, shuffle=True, chunk_values=400000, chunk_1d=False
+    ),
+    "fast-write": dict(zlib=False, shuffle=False, contiguous=True),
+    "small-file": dict(
+        zlib=True, complevel=6, shuffle=True, chunk_values=2000000, chunk_1d=True
+    ),
+    "random-access": dict(
+        zlib=True, complevel=1, shuffle=True, chunk_values=50000, chunk_1d=True
+    ),
+}
+
+#: Unit conversion factors already computed, by (input unit, output unit), None
+#: when a unit is unknown
+UNIT_FACTORS = dict()
+#: Number of unit conversions found in :py:data:`UNIT_FACTORS` or computed
+UNIT_FACTORS_STATS = dict(cached=0, computed=0)
+
+
+@lru_cache(maxsize=1)
+def unit_registry():
+    """
+    Only one pint registry is built by process, it is long to build
+
+    :rtype: pint.UnitRegistry
+    """
+    from pint import UnitRegistry
+
+    return UnitRegistry()
+
+
+def parse_unit(unit):
+    """
+    Parse a unit with case sensitive rules, case insensitive rules are used only
+    if unit is unknown, because they could give a different unit in each process
+    (like molar for m)
+
+    :param str unit: unit to parse
+    :rtype: pint.Quantity
+    """
+    from pint.errors import UndefinedUnitError
+
+    units = unit_registry()
+    try:
+        return units.parse_expression(unit)
+    except UndefinedUnitError:
+        return units.parse_expression(unit, case_sensitive=False)
+
+
+def unit_factor(input_unit, output_unit, strict=False):
+    """
+    Factor to convert values from input_unit to output_unit, factors are kept in
+    :py:data:`UNIT_FACTORS` for the whole process
+
+    :param str input_unit: unit found in file
+    :param str output_unit: unit expected
+    :param bool strict: if True, an unknown unit or units which can't be
+        converted raise an exception
+    :return: factor, 1 if there is no factor and strict is False
+    :rtype: float
+    """
+    key = (input_unit, output_unit)
+    if key in UNIT_FACTORS:
+        UNIT_FACTORS_STATS["cached"] += 1
+        factor = UNIT_FACTORS[key]
+    else:
+        from pint.errors import UndefinedUnitError, DimensionalityError
+
+        try:
+            factor = parse_unit(input_unit).to(parse_unit(output_unit)).to_tuple()[0]
+        except (UndefinedUnitError, DimensionalityError, TokenError):
+            factor = None
+        UNIT_FACTORS_STATS["computed"] += 1
+        UNIT_FACTORS[key] = factor
+    if factor is None:
+        if strict:
+            raise Exception(f"Unable to convert {input_unit} in {output_unit}")
+        return 1
+    return factor
+
+
+def prewarm_unit_factors(units=None):
+    """
+    Build unit registry and conversion factors before loading files, to keep this
+    cost out of a timed or parallel section
+
+    :param list units: (input unit, output unit) pairs to compute, if None only
+        registry is built
+    """
+    unit_registry()
+    if units is not None:
+        for input_unit, output_unit in units:
+            unit_factor(input_unit, output_unit)
+
 
 @njit(cache=True, fastmath=True)
 def shifted_ellipsoid_degrees_mask2(lon0, lat0, lon1, lat1, minor=1.5, major=1.5):
@@ -114,6 +220,7 @@ class EddiesObservations(object):
         "observations",
         "sign_type",
         "raw_data",
+        "buffer",
     )
 
     ELEMENTS = [
@@ -157,6 +264,8 @@ class EddiesObservations(object):
                 raise Exception("Unknown element : %s" % elt)
         self.observations = zeros(size, dtype=self.dtype)
         self.sign_type = None
+        # Storage with free rows after observations, used by insert_observations
+        self.buffer = None
 
     @property
     def longitude(self):
@@ -407,6 +516,74 @@ class EddiesObservations(object):
         eddies.sign_type = self.sign_type
         return eddies
 
+    @classmethod
+    def concatenate_files(
+        cls,
+        filenames,
+        out=None,
+        nb_process=1,
+        callback=None,
+        profile="default",
+        **kwargs,
+    ):
+        """
+        Concatenate files in two passes, number of observations is read in headers
+        to allocate output once, then each file is copied in place. Like with
+        :py:meth:`merge`, track ids of each file are shifted after ids of previous
+        files.
+
+        :param list filenames: files to concatenate
+        :param str out: if define, observations are written directly in this netcdf
+            file and are never all kept in memory, zarr is not available
+        :param int nb_process: number of processes used to read files
+        :param callable callback: function applied on each loaded file
+        :param str,dict profile: netcdf write profile used with out
+        :param dict kwargs: look at :py:meth:`load_file`
+        :return: concatenated observations, or None if out is given
+        """
+        if out is not None and out.endswith(".zarr"):
+            raise Exception(
+                f"Only netcdf could be written by block, not {out}, use write_file"
+            )
+        sizes = [cls.nb_obs_in_file(filename)[1] for filename in filenames]
+        nb_obs = sum(sizes)
+        eddies, handler, extremes = None, None, dict()
+        i, next_track = 0, 0
+        files = cls.iter_files(filenames, nb_process=nb_process, **kwargs)
+        try:
+            for filename, nb, e in zip(filenames, sizes, files):
+                if callback is not None:
+                    e = callback(e)
+                if len(e) != nb:
+                    raise Exception(f"{filename} has {len(e)} observations, not {nb}")
+                if eddies is None:
+                    eddies = e.new_like(e, nb_obs if out is None else 0)
+                    eddies.sign_type = e.sign_type
+                    if out is not None:
+                        handler = Dataset(out, "w", format="NETCDF4")
+                        e.to_netcdf(handler, profile=profile, nb_obs=nb_obs)
+                # Copy by name, fields order could change between files
+                if e.obs.dtype != eddies.obs.dtype:
+                    block = e.new_like(eddies, nb)
+                    for name in block.obs.dtype.names:
+                        if name in e.obs.dtype.names:
+                            block.obs[name] = e.obs[name]
+                    e = block
+                if "track" in e.obs.dtype.names and nb != 0:
+                    e.obs["track"] += next_track
+                    next_track = e.obs["track"][-1] + 1
+                if out is None:
+                    eddies.obs[i : i + nb] = e.obs
+                else:
+                    e.write_netcdf_block(handler, i, extremes)
+                i += nb
+            if handler is not None:
+                eddies.set_netcdf_min_max(handler, extremes)
+        finally:
+            if handler is not None:
+                handler.close()
+        return None if out is not None else eddies
+
     def reset(self):
         self.observations = zeros(0, dtype=self.dtype)
 
@@ -471,7 +648,12 @@ class EddiesObservations(object):
             yield indexs_self, indexs_other, b0_self, b1_self
 
     def insert_observations(self, other, index):
-        """Insert other obs in self at the index
+        """Insert other obs in self at the index, observations are stored in a
+        buffer with free rows, which doubles when full, so repeated appends
+        copy each observation only a few times
+
+        :param EddiesObservations other: observations to insert
+        :param int index: position of insertion, negative value start from end
         """
         if not self.coherence(other):
             raise Exception("Observations with no coherence")
@@ -485,13 +667,37 @@ class EddiesObservations(object):
             return self
         if index < 0:
             index = self_size + index + 1
-        eddies = self.new_like(self, new_size)
-        eddies.obs[:index] = self.obs[:index]
-        eddies.obs[index : index + insert_size] = other.obs
-        eddies.obs[index + insert_size :] = self.obs[index:]
-        self.observations = eddies.obs
+        # Only an append could use free rows, previous observations are unchanged
+        if index != self_size or self.buffer_capacity() < new_size:
+            buffer = zeros(max(new_size, 2 * self_size), dtype=self.obs.dtype)
+            buffer[:index] = self.obs[:index]
+            buffer[index + insert_size : new_size] = self.obs[index:]
+            self.buffer = buffer
+        else:
+            buffer = self.buffer
+        buffer[index : index + insert_size] = other.obs
+        self.observations = buffer[:new_size]
         return self
 
+    def buffer_capacity(self):
+        """Number of rows which could be stored without a new allocation, 0 if
+        observations are not stored in the buffer of insert_observations
+
+        :rtype: int
+        """
+        buffer, obs = self.buffer, self.observations
+        if buffer is None or obs.base is not buffer or obs.dtype != buffer.dtype:
+            return 0
+        if obs.ctypes.data != buffer.ctypes.data:
+            return 0
+        return buffer.shape[0]
+
+    def shrink(self):
+        """Release free rows of buffer used by insert_observations"""
+        if self.buffer_capacity() > len(self):
+            self.observations = self.observations.copy()
+        self.buffer = None
+
     def append(self, other):
         """Merge
         """
@@ -535,9 +741,11 @@ class EddiesObservations(object):
 
     @staticmethod
     def zarr_dimension(filename):
+        import zarr
+
         h = zarr.open(filename)
         dims = list()
-        for varname in h:
+        for varname in h.array_keys():
             dims.extend(list(getattr(h, varname).shape))
         return set(dims)
 
@@ -552,31 +760,139 @@ class EddiesObservations(object):
         else:
             return cls.load_from_netcdf(filename, **kwargs)
 
+    @classmethod
+    def nb_obs_in_file(cls, filename):
+        """
+        Read only header of a file to get number of observations
+
+        :param str filename: netcdf or zarr file on disk
+        :return: name of observation dimension and number of observations
+        :rtype: (str, int)
+        """
+        if not isinstance(filename, str):
+            raise Exception("Only file on disk could be inspected")
+        if filename.endswith(".zarr"):
+            import zarr
+
+            h_zarr = zarr.open(filename, "r")
+            return "obs", h_zarr[next(h_zarr.array_keys())].shape[0]
+        with Dataset(filename) as h_nc:
+            obs_dim = cls.obs_dimension(h_nc)
+            return obs_dim, len(h_nc.dimensions[obs_dim])
+
+    @classmethod
+    def iter_files(cls, filenames, nb_process=1, **kwargs):
+        """
+        Load files one after the other, with several processes next files are
+        read in advance
+
+        :param list filenames: files to load
+        :param int nb_process: number of processes used to read files, processes
+            are spawned so a script must be protected by ``if __name__ == "__main__"``
+        :param dict kwargs: look at :py:meth:`load_file`
+        :return: observations of each file, in same order than filenames
+        :rtype: iterator
+        """
+        if nb_process == 1:
+            for filename in filenames:
+                yield cls.load_file(filename, **kwargs)
+            return
+        # Fork could inherit locks held by threads of numba or hdf5
+        context = get_context("spawn")
+        with ProcessPoolExecutor(nb_process, mp_context=context) as executor:
+            futures = deque()
+            for filename in filenames:
+                futures.append(executor.submit(cls.load_file, filename, **kwargs))
+                # Keep only a few files in advance to bound memory
+                if len(futures) > nb_process:
+                    yield futures.popleft().result()
+            while futures:
+                yield futures.popleft().result()
+
+    @classmethod
+    def load_chunks(cls, filename, chunk_size, **kwargs):
+        """
+        Load observations of a file by consecutive chunks
+
+        :param str filename: netcdf or zarr file to read
+        :param int chunk_size: number of observations in each chunk
+        :param dict kwargs: look at :py:meth:`load_from_netcdf` or
+            :py:meth:`load_from_zarr`
+        :return: observations of each chunk
+        :rtype: iterator
+        """
+        if isinstance(filename, bytes):
+            filename = filename.decode()
+        obs_dim, nb_obs = cls.nb_obs_in_file(filename)
+        for i in range(0, nb_obs, chunk_size):
+            indexs = {obs_dim: slice(i, min(i + chunk_size, nb_obs))}
+            yield cls.load_file(filename, indexs=indexs, **kwargs)
+
     @classmethod
     def load_from_zarr(
-        cls, filename, raw_data=False, remove_vars=None, include_vars=None
+        cls,
+        filename,
+        raw_data=False,
+        remove_vars=None,
+        include_vars=None,
+        indexs=None,
+        nthreads=1,
     ):
-        # FIXME must be investigate, in zarr no dimensions name (or could be add in attr)
-        array_dim = 50
+        """
+        Load observations from a zarr store
+
+        :param str filename: zarr store
+        :param bool raw_data: if True, packed values are not decoded
+        :param list remove_vars: variables to skip
+        :param list include_vars: variables to load, remove_vars will be ignored
+        :param dict indexs: rows to read with key "obs", a slice (step allowed) or
+            an array of indexes
+        :param int nthreads: number of threads used to read and decode chunks
+        :rtype: EddiesObservations
+        """
+        import zarr
+
         BLOC = 5000000
         if not isinstance(filename, str):
             filename = filename.astype(str)
         h_zarr = zarr.open(filename)
-        var_list = list(h_zarr.keys())
+        var_list = list(h_zarr.array_keys())
         if include_vars is not None:
             var_list = [i for i in var_list if i in include_vars]
         elif remove_vars is not None:
             var_list = [i for i in var_list if i not in remove_vars]
 
         nb_obs = getattr(h_zarr, var_list[0]).shape[0]
+        rows = slice(None) if indexs is None else indexs.get("obs", slice(None))
+        if isinstance(rows, slice):
+            rows = arange(nb_obs)[rows] if rows.step not in (None, 1) else rows
+        else:
+            rows = array(rows)
+        if isinstance(rows, slice):
+            i_start, i_stop, _ = rows.indices(nb_obs)
+            nb_obs = max(i_stop - i_start, 0)
+            # Blocks of contiguous rows, (rows in output, rows in store)
+            blocks = list()
+            for i in range(0, nb_obs, BLOC):
+                i_end = min(i + BLOC, nb_obs)
+                blocks.append((slice(i, i_end), slice(i_start + i, i_start + i_end)))
+        else:
+            nb_obs = rows.shape[0]
+            blocks = [
+                (slice(i, i + BLOC), rows[i : i + BLOC]) for i in range(0, nb_obs, BLOC)
+            ]
         logger.debug("%d observations will be load", nb_obs)
         kwargs = dict()
-        dims = cls.zarr_dimension(filename)
-        if array_dim in dims:
-            kwargs["track_array_variables"] = array_dim
+        # Sample dimension is stored in attributes, else in shape of 2d arrays
+        array_dim = h_zarr.attrs.get("track_array_variables", None)
+        if array_dim is None:
+            dims = [h_zarr[i].shape[1] for i in var_list if len(h_zarr[i].shape) == 2]
+            array_dim = dims[0] if len(dims) else None
+        if array_dim is not None:
+            kwargs["track_array_variables"] = int(array_dim)
             kwargs["array_variables"] = list()
             for variable in var_list:
-                if array_dim in h_zarr[variable].shape:
+                if len(h_zarr[variable].shape) == 2:
                     var_inv = VAR_DESCR_inv[variable]
                     kwargs["array_variables"].append(var_inv)
         array_variables = kwargs.get("array_variables", list())
@@ -590,6 +906,7 @@ class EddiesObservations(object):
             None if include_vars is None else [VAR_DESCR_inv[i] for i in include_vars]
         )
         eddies = cls(size=nb_obs, **kwargs)
+        tasks = list()
         for variable in var_list:
             var_inv = VAR_DESCR_inv[variable]
             logger.debug("%s will be loaded", variable)
@@ -604,44 +921,33 @@ class EddiesObservations(object):
                 and input_unit is not None
                 and output_unit != input_unit
             ):
-                units = UnitRegistry()
-                try:
-                    input_unit = units.parse_expression(
-                        input_unit, case_sensitive=False
-                    )
-                    output_unit = units.parse_expression(
-                        output_unit, case_sensitive=False
+                factor = unit_factor(input_unit, output_unit)
+                # If we are able to find a conversion
+                if factor != 1:
+                    logger.info(
+                        "%s will be multiply by %f to take care of units(%s->%s)",
+                        variable,
+                        factor,
+                        input_unit,
+                        output_unit,
                     )
-                except UndefinedUnitError:
-                    input_unit = None
-                except TokenError:
-                    input_unit = None
-                if input_unit is not None:
-                    factor = input_unit.to(output_unit).to_tuple()[0]
-                    # If we are able to find a conversion
-                    if factor != 1:
-                        logger.info(
-                            "%s will be multiply by %f to take care of units(%s->%s)",
-                            variable,
-                            factor,
-                            input_unit,
-                            output_unit,
-                        )
-            nb = h_zarr[variable].shape[0]
-
             scale_factor = VAR_DESCR[var_inv].get("scale_factor", None)
             add_offset = VAR_DESCR[var_inv].get("add_offset", None)
-            for i in range(0, nb, BLOC):
-                sl = slice(i, i + BLOC)
-                data = h_zarr[variable][sl]
-                if factor != 1:
-                    data *= factor
-                if raw_data:
-                    if add_offset is not None:
-                        data -= add_offset
-                    if scale_factor is not None:
-                        data /= scale_factor
-                eddies.obs[var_inv][sl] = data
+            for sl_out, sl_in in blocks:
+                tasks.append(
+                    (
+                        h_zarr[variable],
+                        sl_in,
+                        eddies.obs[var_inv],
+                        sl_out,
+                        factor,
+                        scale_factor if raw_data else None,
+                        add_offset if raw_data else None,
+                    )
+                )
+        with ThreadPoolExecutor(max_workers=nthreads) as executor:
+            for _ in executor.map(lambda args: cls.read_zarr_block(*args), tasks):
+                pass
 
         eddies.sign_type = h_zarr.attrs.get("rotation_type", 0)
         if eddies.sign_type == 0:
@@ -649,6 +955,28 @@ class EddiesObservations(object):
             eddies.sign_type = -1
         return eddies
 
+    @staticmethod
+    def read_zarr_block(v, sl_in, out, sl_out, factor, scale_factor, add_offset):
+        """
+        Read and decode one block of rows of a zarr variable
+
+        :param zarr.core.Array v: variable to read
+        :param slice,array sl_in: rows to read
+        :param array out: output array
+        :param slice sl_out: rows to fill in output
+        :param float factor: unit factor
+        :param float scale_factor: if define, data are packed again with it
+        :param float add_offset: offset to pack data
+        """
+        data = v[sl_in] if isinstance(sl_in, slice) else v.oindex[sl_in]
+        if factor != 1:
+            data *= factor
+        if add_offset is not None:
+            data -= add_offset
+        if scale_factor is not None:
+            data /= scale_factor
+        out[sl_out] = data
+
     @classmethod
     def load_from_netcdf(
         cls, filename, raw_data=False, remove_vars=None, include_vars=None, indexs=None
@@ -722,29 +1050,16 @@ class EddiesObservations(object):
                         and input_unit is not None
                         and output_unit != input_unit
                     ):
-                        units = UnitRegistry()
-                        try:
-                            input_unit = units.parse_expression(
-                                input_unit, case_sensitive=False
+                        factor = unit_factor(input_unit, output_unit)
+                        # If we are able to find a conversion
+                        if factor != 1:
+                            logger.info(
+                                "%s will be multiply by %f to take care of units(%s->%s)",
+                                variable,
+                                factor,
+                                input_unit,
+                                output_unit,
                             )
-                            output_unit = units.parse_expression(
-                                output_unit, case_sensitive=False
-                            )
-                        except UndefinedUnitError:
-                            input_unit = None
-                        except TokenError:
-                            input_unit = None
-                        if input_unit is not None:
-                            factor = input_unit.to(output_unit).to_tuple()[0]
-                            # If we are able to find a conversion
-                            if factor != 1:
-                                logger.info(
-                                    "%s will be multiply by %f to take care of units(%s->%s)",
-                                    variable,
-                                    factor,
-                                    input_unit,
-                                    output_unit,
-                                )
                 if indexs is None:
                     indexs = dict()
                 var_sl = [
@@ -1188,33 +1503,47 @@ class EddiesObservations(object):
 
         return i_self, i_other, cost_mat[i_self, i_other]
 
-    def to_zarr(self, handler, **kwargs):
+    def to_zarr(self, handler, nthreads=1, **kwargs):
+        """
+        Write observations in a zarr handler, chunks of all variables are encoded
+        and compressed concurrently
+
+        :param zarr.hierarchy.Group handler: opened zarr group to fill
+        :param int nthreads: number of threads used to write chunks
+        """
         handler.attrs["track_extra_variables"] = ",".join(self.track_extra_variables)
         if self.track_array_variables != 0:
             handler.attrs["track_array_variables"] = self.track_array_variables
             handler.attrs["array_variables"] = ",".join(self.array_variables)
         # Iter on variables to create:
         fields = [field[0] for field in self.observations.dtype.descr]
-        for ori_name in fields:
-            # Patch for a transition
-            name = ori_name
-            #
-            logger.debug("Create Variable %s", VAR_DESCR[name]["nc_name"])
-            self.create_variable_zarr(
-                handler,
-                dict(
-                    name=VAR_DESCR[name]["nc_name"],
-                    store_dtype=VAR_DESCR[name]["output_type"],
-                    dtype=VAR_DESCR[name]["nc_type"],
-                    dimensions=VAR_DESCR[name]["nc_dims"],
-                ),
-                VAR_DESCR[name]["nc_attr"],
-                self.observations[ori_name],
-                scale_factor=VAR_DESCR[name].get("scale_factor", None),
-                add_offset=VAR_DESCR[name].get("add_offset", None),
-                filters=VAR_DESCR[name].get("filters", None),
-                **kwargs,
-            )
+        variables = list()
+        with ThreadPoolExecutor(max_workers=nthreads) as executor:
+            for ori_name in fields:
+                # Patch for a transition
+                name = ori_name
+                #
+                logger.debug("Create Variable %s", VAR_DESCR[name]["nc_name"])
+                variable = self.create_variable_zarr(
+                    handler,
+                    dict(
+                        name=VAR_DESCR[name]["nc_name"],
+                        store_dtype=VAR_DESCR[name]["output_type"],
+                        dtype=VAR_DESCR[name]["nc_type"],
+                        dimensions=VAR_DESCR[name]["nc_dims"],
+                    ),
+                    VAR_DESCR[name]["nc_attr"],
+                    self.observations[ori_name],
+                    scale_factor=VAR_DESCR[name].get("scale_factor", None),
+                    add_offset=VAR_DESCR[name].get("add_offset", None),
+                    filters=VAR_DESCR[name].get("filters", None),
+                    executor=executor,
+                    **kwargs,
+                )
+                variables.append(variable)
+            # Statistics are set once all chunks of variable are written
+            for v, blocks in variables:
+                self.set_zarr_min_max(v, [block.result() for block in blocks])
         self.set_global_attr_zarr(handler)
 
     @staticmethod
@@ -1228,8 +1557,17 @@ class EddiesObservations(object):
                     f"{dim} dimensions previously set to a different size {old_nb} (current value : {nb})"
                 )
 
-    def to_netcdf(self, handler, **kwargs):
-        eddy_size = len(self)
+    def to_netcdf(self, handler, profile="default", nb_obs=None, **kwargs):
+        """
+        Write observations in a netcdf handler
+
+        :param netCDF4.Dataset handler: opened dataset to fill
+        :param str,dict profile: key of :py:data:`NETCDF_PROFILES` or dict with same
+            keys, to select chunking and compression
+        :param int nb_obs: if define, variables are created with this number of
+            observations but not filled, look at :py:meth:`write_netcdf_block`
+        """
+        eddy_size = len(self) if nb_obs is None else nb_obs
         logger.debug('Create Dimensions "obs" : %d', eddy_size)
         self.netcdf_create_dimensions(handler, "obs", eddy_size)
         handler.track_extra_variables = ",".join(self.track_extra_variables)
@@ -1258,11 +1596,71 @@ class EddiesObservations(object):
                     dimensions=VAR_DESCR[name]["nc_dims"],
                 ),
                 VAR_DESCR[name]["nc_attr"],
-                self.observations[ori_name],
+                self.observations[ori_name] if nb_obs is None else None,
                 scale_factor=VAR_DESCR[name].get("scale_factor", None),
                 add_offset=VAR_DESCR[name].get("add_offset", None),
+                profile=profile,
                 **kwargs,
             )
+        # Global attributes could need min and max of variables
+        if nb_obs is None:
+            self.set_global_attr_netcdf(handler)
+
+    def write_netcdf_block(self, handler, i, extremes=None):
+        """
+        Write observations from row i in variables created by :py:meth:`to_netcdf`
+        with nb_obs
+
+        :param netCDF4.Dataset handler: opened dataset
+        :param int i: first row to write
+        :param dict extremes: if define, min and max of each variable are updated,
+            to be set at the end with :py:meth:`set_netcdf_min_max`
+        """
+        nb = len(self)
+        if nb == 0:
+            return
+        for name in self.obs.dtype.names:
+            var = handler.variables[VAR_DESCR[name]["nc_name"]]
+            var.set_auto_scale(not self.raw_data)
+            data = self.obs[name]
+            var[i : i + nb] = data
+            if extremes is not None:
+                values = self.valid_min_max(
+                    data,
+                    var,
+                    VAR_DESCR[name].get("scale_factor", None),
+                    VAR_DESCR[name].get("add_offset", None),
+                )
+                if values is None:
+                    continue
+                v_min, v_max = values
+                if name in extremes:
+                    v_min = min(v_min, extremes[name][0])
+                    v_max = max(v_max, extremes[name][1])
+                extremes[name] = v_min, v_max
+
+    def set_netcdf_min_max(self, handler, extremes):
+        """
+        Set min and max attributes of variables written by blocks, then global
+        attributes
+
+        :param netCDF4.Dataset handler: opened dataset
+        :param dict extremes: min and max of each variable
+        """
+        for name, values in extremes.items():
+            var = handler.variables[VAR_DESCR[name]["nc_name"]]
+            if len(var.dimensions) != 1 and var.size >= 1e7:
+                continue
+            values = self.stored_min_max(
+                array(values),
+                var,
+                VAR_DESCR[name].get("scale_factor", None),
+                VAR_DESCR[name].get("add_offset", None),
+            )
+            if values is None:
+                continue
+            for attr, value in zip(("min", "max"), values):
+                var.setncattr(attr, value)
         self.set_global_attr_netcdf(handler)
 
     def create_variable(
@@ -1273,21 +1671,35 @@ class EddiesObservations(object):
         data,
         scale_factor=None,
         add_offset=None,
+        profile="default",
         **kwargs,
     ):
+        if isinstance(profile, str):
+            if profile not in NETCDF_PROFILES:
+                raise Exception(
+                    f"Unknown profile {profile}, available: {list(NETCDF_PROFILES)}"
+                )
+            profile = NETCDF_PROFILES[profile]
         dims = kwargs_variable.get("dimensions", None)
-        # Manage chunk in 2d case
-        if dims is not None and len(dims) > 1:
+        if profile.get("contiguous", False):
+            kwargs_variable["contiguous"] = True
+        # Manage chunk along first dimension
+        elif dims is not None and (len(dims) > 1 or profile["chunk_1d"]):
             chunk = [1]
             cum = 1
             for dim in dims[1:]:
                 nb = len(handler_nc.dimensions[dim])
                 chunk.append(nb)
                 cum *= nb
-            chunk[0] = min(int(400000 / cum), len(handler_nc.dimensions[dims[0]]))
-            kwargs_variable["chunksizes"] = chunk
-        kwargs_variable["zlib"] = True
-        kwargs_variable["complevel"] = 1
+            chunk[0] = min(
+                int(profile["chunk_values"] / cum), len(handler_nc.dimensions[dims[0]])
+            )
+            if chunk[0] > 0:
+                kwargs_variable["chunksizes"] = chunk
+        kwargs_variable["zlib"] = profile["zlib"]
+        if profile["zlib"]:
+            kwargs_variable["complevel"] = profile["complevel"]
+        kwargs_variable["shuffle"] = profile["shuffle"]
         kwargs_variable.update(kwargs)
         var = handler_nc.createVariable(**kwargs_variable)
         attrs = list(attr_variable.keys())
@@ -1295,7 +1707,7 @@ class EddiesObservations(object):
         for attr in attrs:
             attr_value = attr_variable[attr]
             var.setncattr(attr, attr_value)
-        if self.raw_data:
+        if self.raw_data and data is not None:
             var[:] = data
         if scale_factor is not None:
             var.scale_factor = scale_factor
@@ -1303,14 +1715,78 @@ class EddiesObservations(object):
                 var.add_offset = add_offset
             else:
                 var.add_offset = 0
+        if data is None:
+            return
         if not self.raw_data:
             var[:] = data
-        try:
-            if len(var.dimensions) == 1 or var.size < 1e7:
-                var.setncattr("min", var[:].min())
-                var.setncattr("max", var[:].max())
-        except ValueError:
-            logger.warning("Data is empty")
+        if len(var.dimensions) == 1 or var.size < 1e7:
+            values = self.stored_min_max(data, var, scale_factor, add_offset)
+            if values is None:
+                logger.warning("Data is empty")
+            else:
+                for attr, value in zip(("min", "max"), values):
+                    var.setncattr(attr, value)
+
+    def valid_min_max(self, data, var, scale_factor=None, add_offset=None):
+        """
+        Compute from data in memory min and max of valid values, nan and values
+        stored as fill value are skipped like they are masked when variable is read
+
+        :param array data: data written in variable
+        :param netCDF4.Variable var: variable written
+        :param float scale_factor: scale factor used to pack data
+        :param float add_offset: offset used to pack data
+        :return: min and max, None if there are no valid values
+        """
+        if "_FillValue" in var.ncattrs():
+            fill_value = var.getncattr("_FillValue")
+        else:
+            # netCDF4 doesn't mask default fill value of byte
+            fill_value = default_fillvals.get(var.dtype.str[1:])
+            if var.dtype.str[1:] in ("i1", "u1"):
+                fill_value = None
+        stored = data
+        if scale_factor is not None and not self.raw_data:
+            # Same packing than netCDF4 library
+            stored = (data - (0 if add_offset is None else add_offset)) / scale_factor
+            if var.dtype.kind in "iu":
+                stored = stored.round()
+        valid = ~isnan(stored) if stored.dtype.kind == "f" else ones(data.shape, "?")
+        if fill_value is not None:
+            valid &= stored != fill_value
+        if not valid.any():
+            return None
+        data = data[valid]
+        return data.min(), data.max()
+
+    def stored_min_max(self, data, var, scale_factor=None, add_offset=None):
+        """
+        Compute from data in memory min and max of values like they will be read
+        in netcdf file, packing is taken into account, and nan or fill values
+        are skipped (look at :py:meth:`valid_min_max`)
+
+        :param array data: data written in variable
+        :param netCDF4.Variable var: variable written
+        :param float scale_factor: scale factor used to pack data
+        :param float add_offset: offset used to pack data
+        :return: min and max, None if there are no valid values
+        """
+        values = self.valid_min_max(data, var, scale_factor, add_offset)
+        if values is None:
+            return None
+        v_min, v_max = values
+        if scale_factor is None:
+            return v_min, v_max
+        add_offset = 0 if add_offset is None else add_offset
+        values = array([v_min, v_max])
+        if not self.raw_data:
+            # Same packing than netCDF4 library
+            values = (values - add_offset) / scale_factor
+            if var.dtype.kind in "iu":
+                values = values.round()
+            values = values.astype(var.dtype)
+        values = values * var.scale_factor + var.add_offset
+        return values[0], values[1]
 
     def create_variable_zarr(
         self,
@@ -1322,7 +1798,18 @@ class EddiesObservations(object):
         add_offset=None,
         filters=None,
         compressor=None,
+        executor=None,
     ):
+        """
+        Create a zarr variable and write data by chunks
+
+        :param concurrent.futures.Executor executor: if define, chunks are written
+            by executor and function return variable and futures of each chunk,
+            min and max must be set with :py:meth:`set_zarr_min_max`
+        """
+        import zarr
+        from numcodecs import get_codec
+
         kwargs_variable["shape"] = data.shape
         kwargs_variable["compressor"] = (
             zarr.Blosc(cname="zstd", clevel=2) if compressor is None else compressor
@@ -1341,7 +1828,10 @@ class EddiesObservations(object):
                 )
             )
         if filters is not None:
-            kwargs_variable["filters"].extend(filters)
+            # Filters of VAR_DESCR are codec configurations
+            kwargs_variable["filters"].extend(
+                get_codec(dict(i)) if isinstance(i, dict) else i for i in filters
+            )
         dims = kwargs_variable.get("dimensions", None)
         # Manage chunk in 2d case
         if len(dims) == 1:
@@ -1357,26 +1847,62 @@ class EddiesObservations(object):
         for attr in attrs:
             attr_value = attr_variable[attr]
             v.attrs[attr] = str(attr_value)
-        if self.raw_data:
-            if scale_factor is not None:
-                s_bloc = kwargs_variable["chunks"][0]
-                nb_bloc = int(ceil(data.shape[0] / s_bloc))
-                for i in range(nb_bloc):
-                    sl = slice(i * s_bloc, (i + 1) * s_bloc)
-                    v[sl] = data[sl] * scale_factor + add_offset
-            else:
-                v[:] = data
-        if not self.raw_data:
-            v[:] = data
-        try:
-            if v.size < 1e8:
-                v.attrs["min"] = str(v[:].min())
-                v.attrs["max"] = str(v[:].max())
-        except ValueError:
+        # Raw data must be unpack, zarr filter will pack it again
+        unpack = self.raw_data and scale_factor is not None
+        s_bloc = kwargs_variable["chunks"][0]
+        nb_bloc = int(ceil(data.shape[0] / s_bloc))
+        blocks = [slice(i * s_bloc, (i + 1) * s_bloc) for i in range(nb_bloc)]
+        args = [(v, data, sl, unpack, scale_factor, add_offset) for sl in blocks]
+        if executor is None:
+            self.set_zarr_min_max(v, [self.write_zarr_block(*arg) for arg in args])
+            return
+        return v, [executor.submit(self.write_zarr_block, *arg) for arg in args]
+
+    @staticmethod
+    def write_zarr_block(v, data, sl, unpack, scale_factor, add_offset):
+        """
+        Write one chunk of a zarr variable
+
+        :return: min and max of written values
+        """
+        block = data[sl]
+        if unpack:
+            block = block * scale_factor + add_offset
+        v[sl] = block
+        return block.min(), block.max()
+
+    @staticmethod
+    def set_zarr_min_max(v, stats):
+        """
+        Set min and max attributes with values like they will be read, filters are
+        applied to take care of packing
+
+        :param zarr.core.Array v: variable written
+        :param list stats: min and max of each chunk
+        """
+        if len(stats) == 0 or v.size == 0:
             logger.warning("Data is empty")
+            return
+        if v.size >= 1e8:
+            return
+        values = array(
+            [min(i[0] for i in stats), max(i[1] for i in stats)], dtype=v.dtype
+        )
+        if v.filters is not None:
+            for filter_ in v.filters:
+                values = filter_.encode(values)
+            for filter_ in v.filters[::-1]:
+                values = filter_.decode(values)
+        v.attrs["min"] = str(values[0])
+        v.attrs["max"] = str(values[1])
 
     def write_file(
-        self, path="./", filename="%(path)s/%(sign_type)s.nc", zarr_flag=False
+        self,
+        path="./",
+        filename="%(path)s/%(sign_type)s.nc",
+        zarr_flag=False,
+        profile="default",
+        nthreads=1,
     ):
         """Write a netcdf or zarr with eddy obs.
         Zarr is usefull for large dataset > 10M observations
@@ -1384,6 +1910,10 @@ class EddiesObservations(object):
         :param str path: set path variable
         :param str filename: model to store file
         :param bool zarr_flag: If True, method will use zarr format instead of netcdf
+        :param str,dict profile: netcdf write profile, look at
+            :py:data:`NETCDF_PROFILES`
+        :param int nthreads: number of threads used to encode and compress chunks,
+            only with zarr
         """
         filename = filename % dict(
             path=path,
@@ -1396,11 +1926,13 @@ class EddiesObservations(object):
             zarr_flag = True
         logger.info("Store in %s", filename)
         if zarr_flag:
+            import zarr
+
             handler = zarr.open(filename, "w")
-            self.to_zarr(handler)
+            self.to_zarr(handler, nthreads=nthreads)
         else:
             with Dataset(filename, "w", format="NETCDF4") as handler:
-                self.to_netcdf(handler)
+                self.to_netcdf(handler, profile=profile)
 
     @property
     def global_attr(self):
@@ -1516,6 +2048,10 @@ class EddiesObservations(object):
         verts = list()
         for x_, y_ in zip(x, y):
             verts.append(create_vertice(x_, y_))
+        from matplotlib.collections import PolyCollection
+        from matplotlib.cm import get_cmap
+        from matplotlib.colors import Normalize
+
         if "facecolors" not in kwargs:
             kwargs = kwargs.copy()
             cmap = get_cmap(cmap, lut)
@@ -1619,25 +2155,91 @@ class EddiesObservations(object):
         xname, yname = self.intern(intern)
         return insidepoly(x, y, self[xname], self[yname])
 
-    def grid_count(self, bins, intern=False, center=False):
+    def grid_count(
+        self,
+        bins,
+        intern=False,
+        center=False,
+        pixels_filename=None,
+        time_chunk=None,
+        regular_grid=None,
+        memory=1e9,
+    ):
         """
         Compute count of eddies in each bin (use of all pixel in each contour)
 
         :param (numpy.array,numpy.array) bins: bins to compute count
         :param bool intern: if True use speed contour only
         :param bool center: if True use of center to count
+        :param str pixels_filename: file to store pixels of contours, look at
+            :py:meth:`contours_pixels`, pixels of all contours are kept in memory
+        :param int time_chunk: if define, contours are processed by period of
+            time_chunk days, to limit memory used on large datasets, not used with
+            pixels_filename
+        :param RegularGridDataset regular_grid: grid returned by a previous call
+            with same bins, count of this call will be added to it
+        :param float memory: maximal memory in bytes used by count grids of threads,
+            each thread counts in its own grid, so memory scales with number of
+            threads and number of threads used is reduced to stay below
         :return: return grid of count
         :rtype: py_eddy_tracker.dataset.grid.RegularGridDataset
 
         .. minigallery:: py_eddy_tracker.EddiesObservations.grid_count
         """
-        x_name, y_name = self.intern(intern)
         x_bins, y_bins = arange(*bins[0]), arange(*bins[1])
         x0 = bins[0][0]
-        grid = ma.zeros((x_bins.shape[0] - 1, y_bins.shape[0] - 1), dtype="u4")
+        if regular_grid is None:
+            regular_grid = self.grid_count_dataset(x_bins, y_bins)
+        grid = regular_grid.vars["count"]
+        if center:
+            x, y = (self.longitude - x0) % 360 + x0, self.latitude
+            grid.data[:] += histogram2d(x, y, (x_bins, y_bins))[0].astype(grid.dtype)
+            grid.mask = grid.data == 0
+        elif pixels_filename is not None:
+            if time_chunk is not None:
+                logger.warning(
+                    "time_chunk is not used with pixels_filename, pixels of all "
+                    "contours are kept in memory"
+                )
+            _, pixels = self.contours_pixels(regular_grid, intern, pixels_filename)
+            count = bincount(pixels, minlength=grid.size).reshape(grid.shape)
+            grid.data[:] += count.astype(grid.dtype)
+            grid.mask = grid.data == 0
+        else:
+            x_name, y_name = self.intern(intern)
+            x_c, y_c = regular_grid.x_c, regular_grid.y_c
+            nb_chunk = min(get_num_threads(), max(int(memory // grid.data.nbytes), 1))
+            for index in self.time_chunks(time_chunk):
+                lon = self.longitude[index]
+                x_ref = ((lon - x0) % 360 + x0 - 180).reshape(-1, 1)
+                x, y = (self[x_name][index] - x_ref) % 360 + x_ref, self[y_name][index]
+                logger.debug("Count pixels of %d contours", x.shape[0])
+                grid_count_contours(
+                    x_c,
+                    y_c,
+                    x,
+                    y,
+                    regular_grid.is_circular(),
+                    grid.data,
+                    nb_chunk,
+                )
+            grid.mask = grid.data == 0
+        return regular_grid
+
+    @staticmethod
+    def grid_count_dataset(x_bins, y_bins):
+        """
+        Create an empty grid to count eddies
+
+        :param array x_bins: longitude bounds of bins
+        :param array y_bins: latitude bounds of bins
+        :return: grid with a count variable set to zero
+        :rtype: py_eddy_tracker.dataset.grid.RegularGridDataset
+        """
         from ..dataset.grid import RegularGridDataset
 
-        regular_grid = RegularGridDataset.with_array(
+        grid = ma.zeros((x_bins.shape[0] - 1, y_bins.shape[0] - 1), dtype="u4")
+        return RegularGridDataset.with_array(
             coordinates=("lon", "lat"),
             datas=dict(
                 count=grid,
@@ -1649,91 +2251,279 @@ class EddiesObservations(object):
             ),
             centered=True,
         )
-        debug_active = logger.getEffectiveLevel() == logging.DEBUG
-        if center:
-            x, y = (self.longitude - x0) % 360 + x0, self.latitude
-            grid[:] = histogram2d(x, y, (x_bins, y_bins))[0]
-            grid.mask = grid.data == 0
-        else:
-            x_ref = ((self.longitude - x0) % 360 + x0 - 180).reshape(-1, 1)
-            # x, y = (self[x_name] - x_ref) % 360 + x_ref, self[y_name]
-            nb = x_ref.shape[0]
-            for i_, (x, y_) in enumerate(zip(self[x_name], self[y_name])):
-                x_ = (x - x_ref[i_]) % 360 + x_ref[i_]
-                if debug_active and i_ % 10000 == 0:
-                    print(f"{i_}/{nb}", end="\r")
-                i, j = BasePath(create_vertice(x_, y_)).pixels_in(regular_grid)
-                grid_count_(grid, i, j)
-            if debug_active:
-                print()
-            grid.mask = grid == 0
-        return regular_grid
 
-    def grid_stat(self, bins, varname):
+    @classmethod
+    def grid_count_chunks(cls, chunks, bins, intern=False, center=False, **kwargs):
         """
-        Compute mean of eddies in each bin
+        Compute count of eddies in each bin over several chunks of observations,
+        only one chunk is in memory at a time
 
+        :param iterator chunks: observations to count, like
+            :py:meth:`load_chunks` output
         :param (numpy.array,numpy.array) bins: bins to compute count
-        :param str varname: name of variable to compute mean
-        :return: return grid of mean
+        :param bool intern: if True use speed contour only
+        :param bool center: if True use of center to count
+        :param dict kwargs: look at :py:meth:`grid_count`
+        :return: return grid of count
+        :rtype: py_eddy_tracker.dataset.grid.RegularGridDataset
+        """
+        regular_grid = None
+        for eddies in chunks:
+            regular_grid = eddies.grid_count(
+                bins, intern=intern, center=center, regular_grid=regular_grid, **kwargs
+            )
+        if regular_grid is None:
+            regular_grid = cls.grid_count_dataset(arange(*bins[0]), arange(*bins[1]))
+        return regular_grid
+
+    def time_chunks(self, time_chunk=None):
+        """
+        Split observations by period of time
+
+        :param int time_chunk: length of period in days, if None only one chunk
+            with all observations is given
+        :return: index of observations in each period
+        :rtype: iterator
+        """
+        if time_chunk is None:
+            yield slice(None)
+            return
+        period = ((self.time - self.time.min()) // time_chunk).astype("i8")
+        i_sort = period.argsort(kind="stable")
+        bounds = period[i_sort].searchsorted(unique(period), side="right")
+        i_start = 0
+        for i_stop in bounds:
+            yield i_sort[i_start:i_stop]
+            i_start = i_stop
+
+    def grid_stat(self, bins, varname, method="mean", time_bins=None):
+        """
+        Compute statistics of eddies in each bin, all variables and statistics
+        are computed in one pass over observations
+
+        :param (numpy.array,numpy.array) bins: bins to compute statistics
+        :param str,list varname: name of variable(s) to use
+        :param str,list method: 'mean', 'std', 'min', 'max', 'median', 'sum' or
+            'count', could be a list of them
+        :param array time_bins: bounds of time bins, if define grids get a third
+            dimension named time
+        :return: return grid with one variable for each variable/method couple,
+            named varname if only one method is asked else varname_method
         :rtype: py_eddy_tracker.dataset.grid.RegularGridDataset
 
         .. minigallery:: py_eddy_tracker.EddiesObservations.grid_stat
         """
+        varnames = [varname] if isinstance(varname, str) else list(varname)
+        methods = [method] if isinstance(method, str) else list(method)
+        for method_ in methods:
+            if method_ not in ("mean", "std", "min", "max", "median", "sum", "count"):
+                raise Exception(f"Unknown method : {method_}")
         x_bins, y_bins = arange(*bins[0]), arange(*bins[1])
         x0 = bins[0][0]
         x, y = (self.longitude - x0) % 360 + x0, self.latitude
-        sum_obs = histogram2d(x, y, (x_bins, y_bins), weights=self[varname])[0]
-        nb_obs = histogram2d(x, y, (x_bins, y_bins))[0]
+        shape = [x_bins.shape[0] - 1, y_bins.shape[0] - 1]
+        i_bin, valid = bin_index(x_bins, x), bin_index(y_bins, y)
+        i_bin *= shape[1]
+        i_bin += valid
+        valid = (i_bin >= 0) * (valid >= 0)
+        coordinates = ["x", "y"]
+        datas = dict(x=x_bins[:-1], y=y_bins[:-1])
+        if time_bins is not None:
+            time_bins = array(time_bins)
+            i_t = bin_index(time_bins, self.time)
+            valid *= i_t >= 0
+            shape.append(time_bins.shape[0] - 1)
+            i_bin = i_bin * shape[2] + i_t
+            coordinates.append("time")
+            datas["time"] = time_bins[:-1]
+        i_bin[~valid] = -1
+        nb_bin = shape[0] * shape[1] * (shape[2] if len(shape) == 3 else 1)
+
+        values = empty((len(varnames), i_bin.shape[0]), dtype="f8")
+        for i, name in enumerate(varnames):
+            values[i] = self[name]
+        count = zeros((len(varnames), nb_bin), dtype="u4")
+        mean, m2 = zeros(count.shape), zeros(count.shape)
+        v_min, v_max = ones(count.shape) * inf, ones(count.shape) * -inf
+        binned_stat(i_bin, values, count, mean, m2, v_min, v_max)
+        for i, name in enumerate(varnames):
+            m = count[i] == 0
+            stats = dict(
+                mean=mean[i],
+                std=sqrt(m2[i] / where(m, 1, count[i])),
+                min=v_min[i],
+                max=v_max[i],
+                sum=mean[i] * count[i],
+                count=count[i],
+            )
+            if "median" in methods:
+                result = empty(nb_bin)
+                i_sort = lexsort((values[i], i_bin))
+                binned_median(i_bin[i_sort], values[i][i_sort], result)
+                stats["median"] = result
+            for method_ in methods:
+                key = name if len(methods) == 1 else f"{name}_{method_}"
+                datas[key] = ma.array(stats[method_], mask=m).reshape(shape)
         from ..dataset.grid import RegularGridDataset
 
         regular_grid = RegularGridDataset.with_array(
-            coordinates=("x", "y"),
-            datas={
-                varname: ma.array(sum_obs / nb_obs, mask=nb_obs == 0),
-                "x": x_bins[:-1],
-                "y": y_bins[:-1],
-            },
+            coordinates=coordinates, datas=datas
         )
         return regular_grid
 
     def interp_grid(
-        self, grid_object, varname, method="center", dtype=None, intern=None
+        self,
+        grid_object,
+        varname,
+        method="center",
+        dtype=None,
+        intern=None,
+        pixels_filename=None,
     ):
         """
-        Interpolate a grid on a center or contour with mean, min or max method
+        Interpolate a grid on a center or contour with mean, min or max method,
+        masked pixels are skipped. Contours without valid pixel get nan, or the
+        maximal value of dtype if dtype is an integer type. Dtypes which are
+        neither float nor integer (like bool) give a float result
 
         :param grid_object: Handler of grid to interp
         :type grid_object: py_eddy_tracker.dataset.grid.RegularGridDataset
         :param str varname: Name of variable to use
-        :param str method: 'center', 'mean', 'max', 'min'
+        :param str method: 'center', 'mean', 'max', 'min', 'count'
         :param str dtype: if None we use var dtype
         :param bool intern: Use extern or intern contour
+        :param str pixels_filename: file to store pixels of contours, look at
+            :py:meth:`contours_pixels`
         """
         if method == "center":
             return grid_object.interp(varname, self.longitude, self.latitude)
         elif method in ("min", "max", "mean", "count"):
-            x0 = grid_object.x_bounds[0]
-            x_name, y_name = self.intern(False if intern is None else intern)
-            x_ref = ((self.longitude - x0) % 360 + x0 - 180).reshape(-1, 1)
-            x, y = (self[x_name] - x_ref) % 360 + x_ref, self[y_name]
+            i_first, pixels = self.contours_pixels(
+                grid_object, False if intern is None else intern, pixels_filename
+            )
             grid = grid_object.grid(varname)
             result = empty(self.shape, dtype=grid.dtype if dtype is None else dtype)
-            min_method = method == "min"
-            grid_stat(
-                grid_object.x_c,
-                grid_object.y_c,
-                -grid if min_method else grid,
-                x,
-                y,
+            kind = result.dtype.kind
+            if kind in "iu":
+                fill_value = iinfo(result.dtype).max
+            else:
+                fill_value = nan
+                if kind != "f":
+                    result = empty(self.shape, dtype="f8")
+            data = ma.getdata(grid).reshape(-1)
+            if data.dtype.kind not in "fiu":
+                data = data.astype("f8")
+            pixels_stat(
+                data,
+                ma.getmaskarray(grid).reshape(-1),
+                i_first,
+                pixels,
                 result,
-                grid_object.is_circular(),
-                method="max" if min_method else method,
+                method,
+                fill_value,
             )
-            return -result if min_method else result
+            return result
         else:
             raise Exception(f'method "{method}" unknown')
 
+    def contours_pixels(self, grid_object, intern=False, filename=None):
+        """
+        Get pixels of a regular grid in each contour, stored in flat arrays.
+
+        Pixels are kept in grid geometry, so next variables or dates of grids with
+        the same coordinates reuse them.
+
+        :param grid_object: Handler of grid
+        :type grid_object: py_eddy_tracker.dataset.grid.RegularGridDataset
+        :param bool intern: Use extern or intern contour
+        :param str filename: if define, pixels are read in this file if it exists,
+            else they are computed and stored in it for next runs (zarr store if
+            filename ends with .zarr, netcdf else)
+        :return: index of first pixel of each contour (N+1) and flat index of pixels
+        :rtype: (array, array)
+        """
+        x_c, y_c = ma.getdata(grid_object.x_c), ma.getdata(grid_object.y_c)
+        x0 = grid_object.x_bounds[0]
+        x_name, y_name = self.intern(intern)
+        x_ref = ((self.longitude - x0) % 360 + x0 - 180).reshape(-1, 1)
+        x, y = (self[x_name] - x_ref) % 360 + x_ref, self[y_name]
+        digest = hashlib.sha1()
+        for values in (x_c, y_c, x, y):
+            values = values.astype("f8")
+            digest.update(str(values.shape).encode())
+            digest.update(values.tobytes())
+        digest = digest.hexdigest()
+        key = "contours_pixels", intern
+        if grid_object.geometry.get(key, (None,))[0] == digest:
+            return grid_object.geometry[key][1]
+        if filename is not None and exists(filename):
+            pixels = self.read_contours_pixels(filename, digest)
+        else:
+            pixels = contours_pixels(x_c, y_c, x, y, grid_object.is_circular())
+            if filename is not None:
+                self.write_contours_pixels(filename, digest, *pixels)
+        grid_object.geometry[key] = digest, pixels
+        return pixels
+
+    @staticmethod
+    def write_contours_pixels(filename, digest, i_first, pixels):
+        """
+        Store pixels of contours, look at :py:meth:`contours_pixels`
+
+        :param str filename: zarr store if filename ends with .zarr, netcdf else
+        :param str digest: hash of grid coordinates and contours
+        :param array i_first: index of first pixel of each contour (N+1)
+        :param array pixels: flat index of pixels
+        """
+        logger.info("Store contour pixels in %s", filename)
+        if filename.endswith(".zarr"):
+            import zarr
+
+            h = zarr.open(filename, "w")
+            h.attrs["digest"] = digest
+            h.create_dataset("i_first", data=i_first, chunks=(1000000,))
+            h.create_dataset("pixels", data=pixels, chunks=(10000000,))
+        else:
+            with Dataset(filename, "w", format="NETCDF4") as h:
+                h.digest = digest
+                h.createDimension("contour_bound", i_first.shape[0])
+                h.createDimension("pixel", pixels.shape[0])
+                for name, values, dim in (
+                    ("i_first", i_first, "contour_bound"),
+                    ("pixels", pixels, "pixel"),
+                ):
+                    var = h.createVariable(name, values.dtype, (dim,), zlib=True)
+                    var[:] = values
+
+    @staticmethod
+    def read_contours_pixels(filename, digest):
+        """
+        Read pixels of contours stored with :py:meth:`write_contours_pixels`
+
+        :param str filename: zarr store if filename ends with .zarr, netcdf else
+        :param str digest: hash of grid coordinates and contours, to check that
+            pixels were computed for the same grid and contours
+        :return: index of first pixel of each contour (N+1) and flat index of pixels
+        :rtype: (array, array)
+        """
+        logger.info("Read contour pixels in %s", filename)
+        if filename.endswith(".zarr"):
+            import zarr
+
+            h = zarr.open(filename, "r")
+            digest_ = h.attrs["digest"]
+            i_first, pixels = h["i_first"][:], h["pixels"][:]
+        else:
+            with Dataset(filename) as h:
+                h.set_auto_mask(False)
+                digest_ = h.digest
+                i_first, pixels = h.variables["i_first"][:], h.variables["pixels"][:]
+        if digest_ != digest:
+            raise Exception(
+                f"Pixels in {filename} were computed for another grid or contours"
+            )
+        return i_first, pixels
+
     @property
     def period(self):
         """
@@ -1751,6 +2541,43 @@ def grid_count_(grid, i, j):
         grid[i_, j_] += 1
 
 
+@njit(cache=True, parallel=True)
+def grid_count_contours(x_c, y_c, x, y, circular, grid, nb_chunk=1):
+    """
+    Add one in grid for each pixel in each contour. Contours are shared between
+    chunks, each chunk is counted by one thread in its own grid, and grids are
+    summed at the end, so memory used is nb_chunk times size of grid.
+
+    :param array_like x_c: longitude coordinate of grid
+    :param array_like y_c: latitude coordinate of grid
+    :param array_like x: longitude of contours
+    :param array_like y: latitude of contours
+    :param bool circular: True if grid is wrappable
+    :param array_like grid: count grid to increment
+    :param int nb_chunk: number of chunks, at most number of threads
+    """
+    nb = x.shape[0]
+    nb_x, nb_y = grid.shape
+    xstep, ystep = x_c[1] - x_c[0], y_c[1] - y_c[0]
+    x0, y0 = x_c - xstep / 2.0, y_c - ystep / 2.0
+    nb_chunk = min(nb_chunk, max(nb, 1))
+    chunk_size = (nb + nb_chunk - 1) // nb_chunk
+    partial = zeros((nb_chunk, nb_x, nb_y), dtype=grid.dtype)
+    for i_chunk in prange(nb_chunk):
+        for elt in range(i_chunk * chunk_size, min((i_chunk + 1) * chunk_size, nb)):
+            v = create_vertice(x[elt], y[elt])
+            (x_start, x_stop), (y_start, y_stop) = bbox_indice_regular(
+                v, x0, y0, xstep, ystep, 1, circular, nb_x
+            )
+            i, j = get_pixel_in_regular(v, x_c, y_c, x_start, x_stop, y_start, y_stop)
+            for i_, j_ in zip(i, j):
+                partial[i_chunk, i_, j_] += 1
+    for i in prange(nb_x):
+        for i_chunk in range(nb_chunk):
+            for j in range(nb_y):
+                grid[i, j] += partial[i_chunk, i, j]
+
+
 @njit(cache=True)
 def insidepoly(x_p, y_p, x_c, y_c):
     """
@@ -1778,43 +2605,203 @@ def insidepoly(x_p, y_p, x_c, y_c):
     return flag
 
 
-@njit(cache=True)
-def grid_stat(x_c, y_c, grid, x, y, result, circular=False, method="mean"):
+@njit(cache=True, parallel=True)
+def contours_pixels(x_c, y_c, x, y, circular=False):
     """
-    Compute mean of grid for each contour
+    Get pixels of a regular grid in each contour
 
     :param array_like x_c: longitude coordinate of grid
     :param array_like y_c: latitude coordinate of grid
-    :param array_like grid: grid value
     :param array_like x: longitude of contours
     :param array_like y: latitude of contours
-    :param array_like result: return values
     :param bool circular: True if grid is wrappable
-    :param str method: 'mean', 'max'
+    :return: index of first pixel of each contour (N+1) and flat index of pixels
+    :rtype: (array, array)
     """
-    nb = result.shape[0]
+    nb = x.shape[0]
     xstep, ystep = x_c[1] - x_c[0], y_c[1] - y_c[0]
     x0, y0 = x_c - xstep / 2.0, y_c - ystep / 2.0
-    nb_x = x_c.shape[0]
-    max_method = "max" == method
-    mean_method = "mean" == method
-    for elt in range(nb):
-        v = create_vertice(x[elt], y[elt],)
+    nb_x, nb_y = x_c.shape[0], y_c.shape[0]
+    # Bbox size is an upper bound of pixel number, to fill contours in parallel
+    bbox = empty((nb, 4), dtype=numba_types.int64)
+    i_bbox = empty(nb + 1, dtype=numba_types.int64)
+    i_bbox[0] = 0
+    for elt in prange(nb):
         (x_start, x_stop), (y_start, y_stop) = bbox_indice_regular(
-            v, x0, y0, xstep, ystep, 1, circular, nb_x
+            create_vertice(x[elt], y[elt]), x0, y0, xstep, ystep, 1, circular, nb_x
         )
-        i, j = get_pixel_in_regular(v, x_c, y_c, x_start, x_stop, y_start, y_stop)
+        bbox[elt, 0], bbox[elt, 1] = x_start, x_stop
+        bbox[elt, 2], bbox[elt, 3] = y_start, y_stop
+        d_x = x_stop - x_start if x_stop >= x_start else x_stop - x_start + nb_x
+        i_bbox[elt + 1] = d_x * max(y_stop - y_start, 0)
+    i_bbox = i_bbox.cumsum()
+    buffer = empty(i_bbox[-1], dtype=numba_types.int32)
+    nb_pixels = empty(nb + 1, dtype=numba_types.int64)
+    nb_pixels[0] = 0
+    for elt in prange(nb):
+        i, j = get_pixel_in_regular(
+            create_vertice(x[elt], y[elt]),
+            x_c,
+            y_c,
+            bbox[elt, 0],
+            bbox[elt, 1],
+            bbox[elt, 2],
+            bbox[elt, 3],
+        )
+        i_start = i_bbox[elt]
+        for k in range(i.shape[0]):
+            buffer[i_start + k] = i[k] * nb_y + j[k]
+        nb_pixels[elt + 1] = i.shape[0]
+    i_first = nb_pixels.cumsum()
+    pixels = empty(i_first[-1], dtype=numba_types.int32)
+    for elt in prange(nb):
+        i_start = i_bbox[elt]
+        for k in range(i_first[elt + 1] - i_first[elt]):
+            pixels[i_first[elt] + k] = buffer[i_start + k]
+    return i_first, pixels
+
+
+@njit(cache=True, parallel=True)
+def pixels_stat(
+    grid, mask, i_first, pixels, result, method="mean", fill_value=nan
+):
+    """
+    Compute a statistic of grid for each contour, masked pixels are skipped
 
-        if mean_method:
-            v_sum = 0
-            for i_, j_ in zip(i, j):
-                v_sum += grid[i_, j_]
-            result[elt] = v_sum / i.shape[0]
+    :param array_like grid: flat grid value
+    :param array_like mask: flat grid mask
+    :param array_like i_first: index of first pixel of each contour (N+1)
+    :param array_like pixels: flat index of pixels, look at :py:func:`contours_pixels`
+    :param array_like result: return values
+    :param str method: 'mean', 'max', 'min', 'count'
+    :param fill_value: value set when there are no valid pixels, must be
+        representable with result dtype (nan is only valid for float result)
+    """
+    nb = result.shape[0]
+    max_method = "max" == method
+    min_method = "min" == method
+    mean_method = "mean" == method
+    for elt in prange(nb):
+        nb_valid, v_sum = 0, 0.0
+        v_min, v_max = 1e40, -1e40
+        for k in range(i_first[elt], i_first[elt + 1]):
+            i = pixels[k]
+            if mask[i]:
+                continue
+            v = grid[i]
+            nb_valid += 1
+            v_sum += v
+            v_min, v_max = min(v_min, v), max(v_max, v)
+        if not mean_method and not max_method and not min_method:
+            result[elt] = nb_valid
+        elif nb_valid == 0:
+            result[elt] = fill_value
+        elif mean_method:
+            result[elt] = v_sum / nb_valid
         elif max_method:
-            v_max = -1e40
-            for i_, j_ in zip(i, j):
-                v_max = max(v_max, grid[i_, j_])
             result[elt] = v_max
+        else:
+            result[elt] = v_min
+
+
+@njit(cache=True)
+def grid_stat(
+    x_c, y_c, grid, x, y, result, circular=False, method="mean", fill_value=nan
+):
+    """
+    Compute mean of grid for each contour
+
+    :param array_like x_c: longitude coordinate of grid
+    :param array_like y_c: latitude coordinate of grid
+    :param array_like grid: grid value
+    :param array_like x: longitude of contours
+    :param array_like y: latitude of contours
+    :param array_like result: return values
+    :param bool circular: True if grid is wrappable
+    :param str method: 'mean', 'max', 'min', 'count'
+    :param fill_value: value set when there are no pixels, look at
+        :py:func:`pixels_stat`
+    """
+    i_first, pixels = contours_pixels(x_c, y_c, x, y, circular)
+    mask = zeros(grid.size, dtype=numba_types.bool_)
+    pixels_stat(grid.ravel(), mask, i_first, pixels, result, method, fill_value)
+
+
+def bin_index(bounds, values):
+    """
+    Give index of bin for each value, like numpy.histogram, last bin include its
+    upper bound
+
+    :param array bounds: bounds of bins in increasing order
+    :param array values: values to bin
+    :return: index of bin, -1 for values out of bounds
+    :rtype: array
+    """
+    i = bounds.searchsorted(values, side="right") - 1
+    nb = bounds.shape[0] - 1
+    i[values == bounds[-1]] = nb - 1
+    i[(i < 0) + (i >= nb)] = -1
+    return i
+
+
+@njit(cache=True, parallel=True)
+def binned_stat(i_bin, values, count, mean, m2, v_min, v_max):
+    """
+    Update in one pass count, mean, sum of squared differences (Welford), min and
+    max of each bin, nan values are skipped
+
+    :param array_like i_bin: index of bin of each observation, -1 to skip
+    :param array_like values: values of each variable, shape (nb_var, nb_obs)
+    :param array_like count: number of values in bin by variable
+    :param array_like mean: mean by bin and variable
+    :param array_like m2: sum of squared differences to mean by bin and variable
+    :param array_like v_min: minimum by bin and variable
+    :param array_like v_max: maximum by bin and variable
+    """
+    nb_var, nb = values.shape
+    for i_var in prange(nb_var):
+        for i in range(nb):
+            i_ = i_bin[i]
+            v = values[i_var, i]
+            if i_ == -1 or isnan(v):
+                continue
+            count[i_var, i_] += 1
+            delta = v - mean[i_var, i_]
+            mean[i_var, i_] += delta / count[i_var, i_]
+            m2[i_var, i_] += delta * (v - mean[i_var, i_])
+            if v < v_min[i_var, i_]:
+                v_min[i_var, i_] = v
+            if v > v_max[i_var, i_]:
+                v_max[i_var, i_] = v
+
+
+@njit(cache=True)
+def binned_median(i_bin, values, result):
+    """
+    Compute median of each bin, nan values are skipped
+
+    :param array_like i_bin: index of bin of each observation, -1 to skip, sorted
+    :param array_like values: values sorted by bin and value
+    :param array_like result: median of each bin
+    """
+    result[:] = nan
+    nb = i_bin.shape[0]
+    i_start = 0
+    for i in range(1, nb + 1):
+        if i != nb and i_bin[i] == i_bin[i_start]:
+            continue
+        i_stop = i
+        # nan are sorted at the end of bin
+        while i_stop > i_start and isnan(values[i_stop - 1]):
+            i_stop -= 1
+        n = i_stop - i_start
+        if i_bin[i_start] != -1 and n > 0:
+            i_mid = i_start + n // 2
+            if n % 2:
+                result[i_bin[i_start]] = values[i_mid]
+            else:
+                result[i_bin[i_start]] = (values[i_mid - 1] + values[i_mid]) / 2
+        i_start = i
 
 
 class VirtualEddiesObservations(EddiesObservations):
@@ -1828,3 +2815,63 @@ class VirtualEddiesObservations(EddiesObservations):
         elements = super().elements
         elements.extend(["track", "segment_size", "dlon", "dlat"])
         return list(set(elements))
+
+
+class ObservationsBuffer(object):
+    """Growable columnar buffer to store observations one by one, before
+    building only one observations object at the end
+
+    :param EddiesObservations template: empty observations which give variables
+    :param int size: initial capacity of buffer
+    """
+
+    __slots__ = ("template", "columns", "size", "capacity")
+
+    def __init__(self, template, size=256):
+        self.template = template
+        self.size = 0
+        self.capacity = max(size, 1)
+        self.columns = dict()
+        for name, data_type, *shape in template.dtype:
+            shape = (self.capacity,) + (shape[0] if shape else ())
+            self.columns[name] = zeros(shape, dtype=data_type)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def grow(self, capacity):
+        """Extend capacity of buffer, data already stored are kept
+
+        :param int capacity: new capacity
+        """
+        for name, column in self.columns.items():
+            new = zeros((capacity,) + column.shape[1:], dtype=column.dtype)
+            new[: self.size] = column[: self.size]
+            self.columns[name] = new
+        self.capacity = capacity
+
+    def new_row(self):
+        """Reserve a row, capacity is doubled if buffer is full
+
+        :return: index of reserved row
+        :rtype: int
+        """
+        if self.size == self.capacity:
+            self.grow(self.capacity * 2)
+        self.size += 1
+        return self.size - 1
+
+    def to_observations(self):
+        """Build observations with all stored rows
+
+        :return: observations with one row by reserved row
+        :rtype: same class as template
+        """
+        eddies = self.template.new_like(self.template, self.size)
+        for name, column in self.columns.items():
+            eddies.obs[name] = column[: self.size]
+        eddies.sign_type = self.template.sign_type
+        return eddies
@@ -3,6 +3,7 @@
 Class to manage observations gathered in track
 """
 import logging
+from os import makedirs, path
 from numpy import (
     empty,
     arange,
@@ -15,12 +16,20 @@ from numpy import (
     array,
     median,
     histogram,
+    lexsort,
+    flatnonzero,
+    minimum,
+    maximum,
+    isin,
+    concatenate,
+    full,
 )
 from datetime import datetime, timedelta
+from netCDF4 import Dataset
 from numba import njit
 from Polygon import Polygon
 from .observation import EddiesObservations
-from .. import VAR_DESCR_inv
+from .. import VAR_DESCR, VAR_DESCR_inv
 from ..generic import split_line, wrap_longitude, build_index, distance, cumsum_by_track
 from ..poly import polygon_overlap, create_vertice_from_2darray
 
@@ -236,6 +245,255 @@ class TrackEddiesObservations(EddiesObservations):
             mask *= self.time <= (dataset_period[1] + p_max)
         return self.extract_with_mask(mask, **kwargs)
 
+    TRACK_INDEX = "track_index"
+
+    def to_netcdf(self, handler, **kwargs):
+        super().to_netcdf(handler, **kwargs)
+        # Variables are only created, tracks are not known yet
+        if kwargs.get("nb_obs", None) is not None:
+            return
+        index = self.track_index_to_store()
+        if index is not None:
+            group = handler.createGroup(self.TRACK_INDEX)
+            group.createDimension("track", index[0].shape[0])
+            for name, values in zip(("first_index", "nb_obs"), index):
+                group.createVariable(name, "i8", ("track",), zlib=True)[:] = values
+
+    def to_zarr(self, handler, **kwargs):
+        super().to_zarr(handler, **kwargs)
+        index = self.track_index_to_store()
+        if index is not None:
+            group = handler.create_group(self.TRACK_INDEX)
+            for name, values in zip(("first_index", "nb_obs"), index):
+                group.array(name, values)
+
+    def track_index_to_store(self):
+        """
+        Index of tracks to store with observations, only if observations are
+        sorted by track
+
+        :return: first index and number of observations for each track id, or None
+        """
+        if len(self) == 0 or "track" not in self.obs.dtype.names:
+            return None
+        tracks = self.tracks
+        if (tracks[1:] < tracks[:-1]).any():
+            return None
+        return self.index_from_track, self.nb_obs_by_track
+
+    @classmethod
+    def load_track_index(cls, filename):
+        """
+        Read index of tracks stored by :py:meth:`write_file`
+
+        :param str filename: netcdf or zarr file
+        :return: first index and number of observations for each track id, or None
+            if file has no index
+        """
+        if not isinstance(filename, str):
+            return None
+        if filename.endswith(".zarr"):
+            import zarr
+
+            h = zarr.open(filename, "r")
+            if cls.TRACK_INDEX not in h.group_keys():
+                return None
+            group = h[cls.TRACK_INDEX]
+            return group["first_index"][:], group["nb_obs"][:]
+        with Dataset(filename) as h:
+            if cls.TRACK_INDEX not in h.groups:
+                return None
+            group = h.groups[cls.TRACK_INDEX]
+            return group["first_index"][:].data, group["nb_obs"][:].data
+
+    @classmethod
+    def load_file(cls, filename, tracks=None, **kwargs):
+        """
+        Load observations, index of tracks stored in file is used to avoid to
+        compute it again
+
+        :param str filename: netcdf or zarr file
+        :param array tracks: if define, only observations of these track ids are
+            read, with index of tracks stored in file, file written with
+            "random-access" profile will be faster to read
+        :param dict kwargs: look at :py:meth:`EddiesObservations.load_file`
+        :rtype: TrackEddiesObservations
+        """
+        index = cls.load_track_index(filename)
+        if tracks is None:
+            eddies = super().load_file(filename, **kwargs)
+            if index is not None and kwargs.get("indexs", None) is None:
+                eddies.__first_index_of_track, eddies.__obs_by_track = index
+            return eddies
+        if index is None:
+            logger.warning("No index of tracks usable, all file will be loaded")
+            return super().load_file(filename, **kwargs).extract_ids(tracks)
+        first_index, nb_obs = index
+        tracks = unique(tracks)
+        tracks = tracks[(tracks >= 0) * (tracks < first_index.shape[0])]
+        tracks = tracks[nb_obs[tracks] != 0]
+        i_start, i_stop = first_index[tracks], first_index[tracks] + nb_obs[tracks]
+        if len(tracks) == 0:
+            slices = [slice(0, 0)]
+        else:
+            # Tracks which follow each other in file are read together
+            i_first = concatenate(((0,), flatnonzero(i_start[1:] != i_stop[:-1]) + 1))
+            i_last = concatenate((i_first[1:], (len(tracks),))) - 1
+            slices = [slice(*i) for i in zip(i_start[i_first], i_stop[i_last])]
+        if filename.endswith(".zarr"):
+            # Zarr could read all rows in one call
+            rows = concatenate([arange(sl.start, sl.stop) for sl in slices])
+            return cls.load_from_zarr(filename, indexs=dict(obs=rows), **kwargs)
+        datasets = [
+            cls.load_from_netcdf(filename, indexs=dict(obs=sl), **kwargs)
+            for sl in slices
+        ]
+        return cls.concatenate(datasets)
+
+    PARTITION_INDEX = "index.nc"
+    PARTITION_FILE = "partition_%06d.nc"
+
+    def write_partitions(self, directory, time_chunk=365, **kwargs):
+        """
+        Write observations in a partitioned store, with one netcdf file by period
+        of time_chunk days, and an index which store time, longitude and latitude
+        bounds of each track in each partition. Store could be read with
+        :py:meth:`load_partitions`
+
+        :param str directory: directory where store will be written
+        :param int time_chunk: length of partitions in days
+        :param dict kwargs: look at :py:meth:`write_file`
+        """
+        makedirs(directory, exist_ok=True)
+        period = (self.time // time_chunk).astype("i8")
+        # Sort by partition then by track, observations order in track is kept
+        i_sort = lexsort((self.tracks, period))
+        period = period[i_sort]
+        i_bounds = flatnonzero(period[1:] != period[:-1]) + 1
+        i_bounds = concatenate(((0,), i_bounds, (period.shape[0],)))
+        entries = list()
+        for i0, i1 in zip(i_bounds[:-1], i_bounds[1:]):
+            if i0 == i1:
+                continue
+            eddies = self.index(i_sort[i0:i1])
+            filename = path.join(directory, self.PARTITION_FILE % period[i0])
+            eddies.write_file(filename=filename, **kwargs)
+            entries_ = eddies.partition_entries()
+            entries_["partition"] = full(entries_["track"].shape, period[i0])
+            entries.append(entries_)
+        with Dataset(path.join(directory, self.PARTITION_INDEX), "w") as h:
+            h.time_chunk = time_chunk
+            h.createDimension("entry", sum(len(e["track"]) for e in entries))
+            for name in entries[0].keys():
+                values = concatenate([e[name] for e in entries])
+                h.createVariable(name, values.dtype, ("entry",))[:] = values
+
+    def partition_entries(self):
+        """
+        Compute index entries of a partition, observations must be sorted by track
+
+        :return: first row, number of observations, time, longitude (in [0, 360[)
+            and latitude bounds of each track
+        :rtype: dict
+        """
+        tracks = self.tracks
+        i_first = concatenate(((0,), flatnonzero(tracks[1:] != tracks[:-1]) + 1))
+        nb = concatenate((i_first[1:], (len(self),))) - i_first
+        entries = dict(track=tracks[i_first], i_first=i_first, nb=nb)
+        lon = self.longitude % 360
+        for name, values in (("time", self.time), ("lon", lon), ("lat", self.latitude)):
+            entries[f"{name}_min"] = minimum.reduceat(values, i_first)
+            entries[f"{name}_max"] = maximum.reduceat(values, i_first)
+        return entries
+
+    @classmethod
+    def load_partitions(
+        cls, directory, period=None, area=None, tracks=None, full_path=False, **kwargs
+    ):
+        """
+        Load observations of a partitioned store written by
+        :py:meth:`write_partitions`, predicates are used with the index to read
+        only partitions and rows which could match
+
+        :param str directory: directory of store
+        :param (int,int) period: first and last day to select (included)
+        :param dict area: bounding box like in :py:meth:`extract_with_area`
+        :param array tracks: id of tracks to select
+        :param bool full_path: if True, all observations of tracks with at least
+            one selected observation are loaded
+        :param dict kwargs: look at :py:meth:`load_from_netcdf`
+        :return: observations which match all predicates, sorted by track
+        :rtype: TrackEddiesObservations
+        """
+        with Dataset(path.join(directory, cls.PARTITION_INDEX)) as h:
+            index = {k: v[:].data for k, v in h.variables.items()}
+        m = ones(index["track"].shape, dtype="bool")
+        if period is not None:
+            m *= (index["time_max"] >= period[0]) * (index["time_min"] <= period[1])
+        if area is not None:
+            m *= index["lat_max"] > area["llcrnrlat"]
+            m *= index["lat_min"] < area["urcrnrlat"]
+            # Overlap of two arcs of longitude
+            lon0 = area["llcrnrlon"] % 360
+            width = area["urcrnrlon"] - area["llcrnrlon"]
+            lon_min, lon_max = index["lon_min"], index["lon_max"]
+            m *= ((lon_min - lon0) % 360 <= width) + (
+                (lon0 - lon_min) % 360 <= lon_max - lon_min
+            )
+        if tracks is not None:
+            m *= isin(index["track"], tracks)
+        if full_path:
+            # Find tracks with only needed variables, then load them
+            names = [VAR_DESCR[i]["nc_name"] for i in ("track", "time", "lon", "lat")]
+            selection = cls.load_entries(
+                directory, index, m, period, area, tracks, include_vars=names
+            )
+            tracks = unique(selection.tracks)
+            m = isin(index["track"], tracks)
+            period, area = None, None
+        elif kwargs.get("include_vars", None) is not None:
+            include_vars = list(kwargs["include_vars"])
+            for name in ("track", "time", "lon", "lat"):
+                if VAR_DESCR[name]["nc_name"] not in include_vars:
+                    include_vars.append(VAR_DESCR[name]["nc_name"])
+            kwargs["include_vars"] = include_vars
+        return cls.load_entries(directory, index, m, period, area, tracks, **kwargs)
+
+    @classmethod
+    def load_entries(cls, directory, index, mask, period, area, tracks, **kwargs):
+        """
+        Load rows of selected index entries and filter observations with
+        predicates, look at :py:meth:`load_partitions`
+        """
+        partitions = index["partition"]
+        selected = unique(partitions[mask])
+        if selected.shape[0] == 0:
+            # Read an empty slice to get an empty dataset with good variables
+            selected = partitions[:1]
+            mask = zeros(mask.shape, dtype="bool")
+        datasets = list()
+        for partition in selected:
+            m = mask * (partitions == partition)
+            i0 = index["i_first"][m].min() if m.any() else 0
+            i1 = (index["i_first"][m] + index["nb"][m]).max() if m.any() else 0
+            filename = path.join(directory, cls.PARTITION_FILE % partition)
+            eddies = cls.load_from_netcdf(
+                filename, indexs=dict(obs=slice(i0, i1)), **kwargs
+            )
+            m_obs = ones(len(eddies), dtype="bool")
+            if period is not None:
+                m_obs *= (eddies.time >= period[0]) * (eddies.time <= period[1])
+            if area is not None:
+                lat, lon0 = eddies.latitude, area["llcrnrlon"]
+                lon = (eddies.longitude - lon0) % 360 + lon0
+                m_obs *= (lat > area["llcrnrlat"]) * (lat < area["urcrnrlat"])
+                m_obs *= (lon > lon0) * (lon < area["urcrnrlon"])
+            if tracks is not None:
+                m_obs *= isin(eddies.tracks, tracks)
+            datasets.append(eddies.extract_with_mask(m_obs) if len(eddies) else eddies)
+        eddies = cls.concatenate(datasets)
+        return eddies.index(eddies.tracks.argsort(kind="stable"))
+
     def get_azimuth(self):
         """
         Return azimuth for each tracks.
@@ -251,6 +509,8 @@ class TrackEddiesObservations(EddiesObservations):
 
     def get_mask_from_id(self, tracks):
         mask = zeros(self.tracks.shape, dtype=bool_)
+        # Unknown ids would be read out of index
+        tracks = tracks[(tracks >= 0) * (tracks < self.index_from_track.shape[0])]
         compute_mask_from_id(tracks, self.index_from_track, self.nb_obs_by_track, mask)
         return mask
 
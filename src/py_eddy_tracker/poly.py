@@ -3,7 +3,7 @@
 Method for polygon
 """
 
-from numpy import empty, where, array, ones, pi, concatenate
+from numpy import empty, where, array, ones, zeros, pi, concatenate
 from numpy.linalg import lstsq
 from numba import njit, prange, types as numba_types
 from Polygon import Polygon
@@ -154,6 +154,78 @@ def winding_number_grid_in_poly(x_1d, y_1d, i_x0, i_x1, x_size, i_y0, xy_poly):
     return i_x, i_y
 
 
+@njit(cache=True)
+def scanline_grid_in_poly(x_1d, y_1d, i_x0, i_x1, x_size, i_y0, xy_poly):
+    """
+    Return index for each grid coordinates within contour, with the same rule
+    as :py:func:`winding_number_grid_in_poly`.
+
+    For each row of grid, we compute crossings between row and edges of polygon,
+    winding number of a pixel is given by crossings on its right. Cost is in
+    O(rows * edges + pixels) instead of O(pixels * edges).
+
+    :param array x_1d: x of local grid
+    :param array y_1d: y of local grid
+    :param int i_x0: int to add at x index to have index in global grid
+    :param int i_x1: last index in global grid
+    :param int x_size: number of x in global grid
+    :param int i_y0: int to add at y index to have index in global grid
+    :param vertice xy_poly: vertices of polygon which must contain pixel
+    :return: Return index in xy_poly
+    :rtype: (int,int)
+    """
+    nb_x, nb_y = len(x_1d), len(y_1d)
+    nb_elt = xy_poly.shape[0]
+    wn = zeros((nb_x, nb_y), dtype=numba_types.bool_)
+    x_cross = empty(nb_elt)
+    d_cross = empty(nb_elt, dtype=numba_types.int8)
+    i_sort_x = x_1d.argsort()
+    for j in range(nb_y):
+        y = y_1d[j]
+        # Crossings of row with edges, +1 for upward edge and -1 for downward edge
+        nb_cross = 0
+        for i_elt in range(nb_elt):
+            i_next = 0 if i_elt + 1 == nb_elt else i_elt + 1
+            x0, y0 = xy_poly[i_elt, 0], xy_poly[i_elt, 1]
+            x1, y1 = xy_poly[i_next, 0], xy_poly[i_next, 1]
+            if y0 <= y:
+                if y1 <= y:
+                    continue
+                d_cross[nb_cross] = 1
+            else:
+                if y1 > y:
+                    continue
+                d_cross[nb_cross] = -1
+            x_cross[nb_cross] = x0 + (x1 - x0) * (y - y0) / (y1 - y0)
+            nb_cross += 1
+        if nb_cross == 0:
+            continue
+        i_sort = x_cross[:nb_cross].argsort()
+        # Walk on pixels from west to east and remove crossings on the left
+        wn_pixel, k = 0, 0
+        for i_elt in range(nb_cross):
+            wn_pixel += d_cross[i_elt]
+        for i in i_sort_x:
+            x = x_1d[i]
+            while k < nb_cross:
+                i_cross = i_sort[k]
+                x_ = x_cross[i_cross]
+                # A point on an upward edge is not on its left
+                if x_ < x or (x_ == x and d_cross[i_cross] == 1):
+                    wn_pixel -= d_cross[i_cross]
+                    k += 1
+                else:
+                    break
+            if wn_pixel != 0:
+                wn[i, j] = True
+    i_x, i_y = where(wn)
+    i_x += i_x0
+    i_y += i_y0
+    if i_x1 < i_x0:
+        i_x %= x_size
+    return i_x, i_y
+
+
 @njit(cache=True, fastmath=True)
 def close_center(x0, y0, x1, y1, delta=.1):
     """
@@ -497,7 +569,7 @@ def get_pixel_in_regular(vertices, x_c, y_c, x_start, x_stop, y_start, y_stop):
             + x_ref
             - 180
         )
-        return winding_number_grid_in_poly(
+        return scanline_grid_in_poly(
             x_array,
             y_c[y_start:y_stop],
             x_start,
@@ -507,7 +579,7 @@ def get_pixel_in_regular(vertices, x_c, y_c, x_start, x_stop, y_start, y_stop):
             vertices,
         )
     else:
-        return winding_number_grid_in_poly(
+        return scanline_grid_in_poly(
             x_c[x_start:x_stop],
             y_c[y_start:y_stop],
             x_start,
@@ -0,0 +1,65 @@
+from py_eddy_tracker.observations.collection import EddiesCollection
+from py_eddy_tracker.observations.observation import EddiesObservations
+from py_eddy_tracker.data import get_path
+from numpy import arange
+
+a = EddiesObservations.load_file(get_path("Anticyclonic_20190223.nc"))
+
+
+def build_collection(directory, nb_file=5):
+    filenames = list()
+    for i in range(nb_file):
+        e = a.index(arange(i * 100, i * 100 + 300 + i))
+        e.obs["time"] += i
+        filename = str(directory / f"Anticyclonic_{i}.nc")
+        e.write_file(filename=filename)
+        filenames.append(filename)
+    return EddiesCollection(filenames)
+
+
+def test_collection(tmp_path):
+    c = build_collection(tmp_path)
+    assert len(c) == 300 * 5 + 10
+    c.write_index(str(tmp_path / "index.nc"))
+    c = EddiesCollection.from_index(str(tmp_path / "index.nc"))
+    assert len(c) == 300 * 5 + 10
+    full = c.to_observations()
+    assert len(full) == len(c)
+    assert (full.obs[-304:] == c.load(4).obs).all()
+
+    rows = [5, 400, 1200, 3, 1509]
+    assert (c.get_observations(rows).obs == full.obs[rows]).all()
+
+    t0 = a.time[0]
+    period = (t0 + 1, t0 + 2)
+    assert (c.files_with_period(period) == [1, 2]).all()
+    ref = full.extract_with_mask((full.time >= period[0]) * (full.time <= period[1]))
+    assert (c.extract_with_period(period).obs == ref.obs).all()
+
+    area = dict(llcrnrlon=-30, llcrnrlat=-40, urcrnrlon=100, urcrnrlat=20)
+    assert (c.extract_with_area(area).obs == full.extract_with_area(area).obs).all()
+    assert len(c.to_observations([])) == 0
+
+    # Loaded files could be modified without changing cache
+    c.load(4).obs["time"] += 10
+    assert (c.to_observations().obs == full.obs).all()
+
+    empty = EddiesCollection([])
+    assert len(empty.to_observations([])) == 0
+    assert len(empty.get_observations([])) == 0
+    assert empty.period == (None, None)
+    assert repr(empty) == "0 files, 0 observations from None to None"
+
+
+def test_collection_without_observations(tmp_path):
+    filename = str(tmp_path / "empty.nc")
+    a.index(arange(0)).write_file(filename=filename)
+    c = EddiesCollection([filename, filename])
+    assert len(c) == 0
+    assert c.period == (None, None)
+    assert repr(c) == "2 files, 0 observations from None to None"
+    assert len(c.to_observations()) == 0
+    # Files without observations are skipped to compute period
+    full = build_collection(tmp_path, 2)
+    c = EddiesCollection([filename] + full.filenames)
+    assert c.period == full.period
@@ -1,7 +1,36 @@
-from py_eddy_tracker.dataset.grid import RegularGridDataset
+from py_eddy_tracker.dataset.grid import (
+    RegularGridDataset,
+    UnRegularGridDataset,
+    IdentificationContext,
+    contours_shape_error,
+    mean_on_regular_contour,
+    CurvilinearLocator,
+)
+from py_eddy_tracker.eddy_feature import Contours
+from py_eddy_tracker.poly import create_vertice, poly_contain_poly
 from py_eddy_tracker.data import get_path
 from matplotlib.path import Path
-from pytest import approx
+from py_eddy_tracker.observations.observation import UNIT_FACTORS
+from pytest import approx, raises
+from numpy import (
+    sin,
+    cos,
+    deg2rad,
+    pi,
+    array,
+    arange,
+    ma,
+    meshgrid,
+    c_,
+    linspace,
+    exp,
+    histogram2d,
+    errstate,
+)
+from numpy.random import RandomState
+from netCDF4 import Dataset
+from scipy.spatial import cKDTree
+from scipy.interpolate import RectBivariateSpline
 
 G = RegularGridDataset(get_path("mask_1_60.nc"), "lon", "lat")
 X = 0.025
@@ -44,3 +73,213 @@ def test_bounds():
     x0, x1, y0, y1 = G.bounds
     assert x0 == -1 / 120.0 and x1 == 360 - 1 / 120
     assert y0 == approx(-90 - 1 / 120.0) and y1 == approx(90 - 1 / 120)
+
+
+def test_uv_stencil():
+    for filename in (
+        "dt_med_allsat_phy_l4_20160515_20190101.nc",
+        # Global grid, stencils wrap around longitude bounds
+        "nrt_global_allsat_phy_l4_20190223_20190226.nc",
+    ):
+        g = RegularGridDataset(get_path(filename), "longitude", "latitude")
+        h = g.grid("adt")
+        if "global" in filename:
+            assert g.is_circular()
+            # Masked pixels on both sides of longitude bounds
+            h[:2, 300:320] = ma.masked
+            h[-3:, 330:340] = ma.masked
+        u, v = g.compute_uv_stencil(h)
+        # compute_stencil doesn't apply gravity/coriolis factor
+        f = sin(deg2rad(g.y_c.data)) * 4 * pi / (23 * 3600 + 56 * 60 + 4.1)
+        gof = g.GRAVITY / f
+        u_ref = -g.compute_stencil(h, vertical=True) * gof
+        mode = "wrap" if g.is_circular() else "reflect"
+        v_ref = g.compute_stencil(h, mode=mode) * gof
+        assert (u.mask == u_ref.mask).all() and (v.mask == v_ref.mask).all()
+        assert u[~u.mask].data == approx(u_ref[~u.mask].data)
+        assert v[~v.mask].data == approx(v_ref[~v.mask].data)
+
+
+def test_identification_context():
+    context = IdentificationContext()
+    filename = get_path("dt_med_allsat_phy_l4_20160515_20190101.nc")
+    g0 = RegularGridDataset(filename, "longitude", "latitude", context=context)
+    g1 = RegularGridDataset(filename, "longitude", "latitude", context=context)
+    assert len(context.geometries) == 1
+    assert g0.x_bounds is g1.x_bounds
+    k0 = context.get_kernel(g0, g0.kernel_bessel, 35.0, wave_length=500)
+    k1 = context.get_kernel(g1, g1.kernel_bessel, 35.0, wave_length=500)
+    assert k0 is k1
+    assert context.unit_factor("cm", "m") == approx(0.01)
+    # Factors are shared with observations loading
+    assert UNIT_FACTORS[("cm", "m")] == approx(0.01)
+    assert IdentificationContext().units is context.units
+    with raises(Exception):
+        context.unit_factor("unknown_unit", "m")
+
+
+def test_contours_shape_error():
+    g = RegularGridDataset(
+        get_path("dt_med_allsat_phy_l4_20160515_20190101.nc"), "longitude", "latitude"
+    )
+    c = Contours(g.x_c, g.y_c, g.grid("adt"), arange(-0.2, 0.2, 0.01))
+    errors = contours_shape_error(
+        create_vertice(c.x_value, c.y_value), c.contour_index, c.nb_pt_per_contour
+    )
+    paths = [path for coll in c.iter() for path in coll.get_paths()]
+    errors_ref = array([path.fit_circle()[3] for path in paths])
+    assert errors == approx(errors_ref, nan_ok=True)
+
+
+def test_contours_nesting():
+    g = RegularGridDataset(
+        get_path("dt_med_allsat_phy_l4_20160515_20190101.nc"), "longitude", "latitude"
+    )
+    c = Contours(g.x_c, g.y_c, g.grid("adt"), arange(-0.2, 0.2, 0.01))
+    i_first, children = c.get_nesting(1)
+    assert i_first[-1] == children.shape[0] > 0
+    for i in range(c.contour_index.shape[0]):
+        for j in children[i_first[i] : i_first[i + 1]]:
+            assert poly_contain_poly(c.get_path(i).vertices, c.get_path(j).vertices)
+
+
+def test_inner_contours():
+    # Diagonal ridge and a small bump in a corner of ridge bbox
+    x = y = arange(-5, 5, 0.05)
+    xx, yy = meshgrid(x, y, indexing="ij")
+    u, v = (xx + yy) / 2 ** 0.5, (xx - yy) / 2 ** 0.5
+    z = exp(-((u / 3) ** 2) - (v / 0.5) ** 2)
+    z += exp(-((xx - 2) ** 2 + (yy + 2) ** 2) / 0.1)
+    c = Contours(x, y, ma.array(z), arange(0.1, 1, 0.1))
+    i_ridge, i_bump = c.level_index[0], c.level_index[0] + 1
+    assert c.get_path(i_ridge).vertices.max() > 3
+    # From ridge center, walk follow ridge on each level
+    walk = c.inner_contours(i_ridge, 0, 0, 1)
+    assert walk.shape[0] == c.level_index.shape[0] - 1
+    for i_out, i_in in zip(walk[:-1], walk[1:]):
+        assert poly_contain_poly(c.get_path(i_out).vertices, c.get_path(i_in).vertices)
+    # From bump, nearest contour of next level is the bump, outside ridge: stop
+    assert c.inner_contours(i_ridge, 2, -2, 1).shape[0] == 0
+    assert c.inner_contours(i_bump, 2, -2, 1).shape[0] > 0
+
+
+def test_speed_coef_mean_contours():
+    g = RegularGridDataset(
+        get_path("dt_med_allsat_phy_l4_20160515_20190101.nc"), "longitude", "latitude"
+    )
+    g.add_uv("adt")
+    g.init_speed_coef()
+    c = Contours(g.x_c, g.y_c, g.grid("adt"), arange(-0.2, 0.2, 0.01))
+    indices = arange(0, c.contour_index.shape[0], 7)
+    speeds = g.speed_coef_mean_contours(c, indices)
+    x, y, speed = ma.getdata(g.x_c), ma.getdata(g.y_c), g._speed_ev
+    speeds_ref = [
+        mean_on_regular_contour(
+            x, y, speed.data, speed.mask, c.get_path(i).vertices, nan_remove=True
+        )
+        for i in indices
+    ]
+    assert speeds == approx(array(speeds_ref), nan_ok=True)
+
+
+def test_curvilinear_locator(tmp_path):
+    i, j = meshgrid(arange(100), arange(80), indexing="ij")
+    x = 0.1 * i + 0.03 * j + 0.5 * sin(j / 40.0)
+    y = -0.02 * i + 0.1 * j + 0.3 * cos(i / 50.0)
+    angle = linspace(0, 2 * pi, 500)
+    points = c_[5 + 2 * cos(angle), 4 + 2 * sin(angle)]
+    tree = cKDTree(c_[x.reshape(-1), y.reshape(-1)])
+    context = IdentificationContext(cache_dir=str(tmp_path))
+    locator = context.get_locator("test", x, y)
+    assert (tmp_path / "locator_test.npz").exists()
+    for locator in (locator, context.get_locator("test", x, y)):
+        for k in (1, 4):
+            dist, idx = locator.query(points, k=k)
+            dist_ref, idx_ref = tree.query(points, k=k)
+            assert (idx == idx_ref).all()
+            assert dist == approx(dist_ref)
+
+
+def test_bilinear_weights():
+    i, j = meshgrid(arange(100), arange(80), indexing="ij")
+    x = 0.1 * i + 0.03 * j + 0.5 * sin(j / 40.0)
+    y = -0.02 * i + 0.1 * j + 0.3 * cos(i / 50.0)
+    z = ma.array(2 * x - 3 * y)
+    angle = linspace(0, 2 * pi, 500)
+    x_pt, y_pt = 5 + 2 * cos(angle), 4 + 2 * sin(angle)
+    weights = CurvilinearLocator(x, y).bilinear_weights(x_pt, y_pt)
+    # Linear field is exact
+    assert weights.interp(z).data == approx(2 * x_pt - 3 * y_pt)
+    # A masked corner is removed from weighted mean
+    z.mask = (i == 20) & (j == 30)
+    assert not weights.interp(z).mask.any()
+    # Out of grid
+    values = CurvilinearLocator(x, y).bilinear_weights([-10, 5], [4, 4]).interp(z)
+    assert values.mask.tolist() == [True, False]
+
+
+def test_interpolation_plan():
+    g = RegularGridDataset(
+        get_path("dt_med_allsat_phy_l4_20160515_20190101.nc"), "longitude", "latitude"
+    )
+    x, y = meshgrid(linspace(-10, 40, 300), linspace(28, 48, 200), indexing="ij")
+    plan = g.interpolation_plan(x, y)
+    assert plan.interp(g.grid("adt")).shape == x.shape
+    assert plan.interp(g.grid("adt")).reshape(-1) == approx(
+        g.interp("adt", x.reshape(-1), y.reshape(-1)), nan_ok=True
+    )
+
+
+def low_filter_reference(g, w_cut, factor=8.0):
+    # Bin average with histogram2d, like the first implementation
+    x, y, data = g.grid("lon"), g.grid("lat"), g.grid("z")
+    step = w_cut / 111.0 / factor
+    x_min, x_max, y_min, y_max = g.bounds
+    x_array = arange(x_min, x_max + step, step)
+    y_array = arange(y_min, min(y_max + step, 89), step)
+    bins = (x_array, y_array)
+    x_flat, y_flat, z_flat = x.reshape(-1), y.reshape(-1), data.reshape(-1)
+    m = ~ma.getmaskarray(z_flat)
+    nb_value, _, _ = histogram2d(x_flat[m], y_flat[m], bins=bins)
+    sum_value, _, _ = histogram2d(x_flat[m], y_flat[m], bins=bins, weights=z_flat[m])
+    with errstate(invalid="ignore"):
+        z_grid = ma.array(sum_value / nb_value, mask=nb_value == 0)
+    regular = RegularGridDataset.with_array(
+        coordinates=("lon", "lat"),
+        datas=dict(z=z_grid, lon=x_array[:-1], lat=y_array[:-1]),
+        centered=False,
+    )
+    regular.bessel_low_filter("z", w_cut, order=1)
+    z_filtered = regular.grid("z")
+    x_center = (x_array[:-1] + x_array[1:]) / 2
+    y_center = (y_array[:-1] + y_array[1:]) / 2
+    m_interp = RectBivariateSpline(
+        x_center, y_center, ma.getmaskarray(z_filtered), kx=1, ky=1, s=0
+    )
+    z_filtered.data[ma.getmaskarray(z_filtered)] = 0
+    z_interp = RectBivariateSpline(
+        x_center, y_center, z_filtered.data, kx=1, ky=1, s=0
+    ).ev(x, y)
+    return ma.array(z_interp, mask=m_interp.ev(x, y) > 0.00001)
+
+
+def test_unregular_low_filter(tmp_path):
+    # Curvilinear grid 10 times finer than regular grid used to filter
+    i, j = meshgrid(arange(400), arange(300), indexing="ij")
+    x = 0.02 * i + 0.005 * j + 0.1 * sin(j / 40.0)
+    y = -0.004 * i + 0.02 * j + 0.05 * cos(i / 50.0)
+    z = sin(x) * cos(y) + 0.1 * RandomState(1).normal(size=x.shape)
+    filename = str(tmp_path / "curvilinear.nc")
+    with Dataset(filename, "w") as h:
+        h.createDimension("i", x.shape[0])
+        h.createDimension("j", x.shape[1])
+        for name, values in (("lon", x), ("lat", y), ("z", z)):
+            h.createVariable(name, "f8", ("i", "j"))[:] = values
+    g = UnRegularGridDataset(filename, "lon", "lat")
+    ref = low_filter_reference(g, 200)
+    new = g._low_filter("z", 200)
+    assert (new.mask == ref.mask).all()
+    assert new.data[~new.mask] == approx(ref.data[~ref.mask])
+    # Cached bins give same result for a second call
+    assert g._low_filter("z", 200).data[~new.mask] == approx(new.data[~new.mask])
+    assert g._low_filter("z", 200, bilinear=True).shape == x.shape
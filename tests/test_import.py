@@ -0,0 +1,14 @@
+import sys
+from subprocess import run
+
+
+def test_lazy_import():
+    for module in ("py_eddy_tracker.appli.eddies", "py_eddy_tracker.appli.grid"):
+        code = (
+            f"import sys, {module};"
+            "print(','.join(i for i in ('zarr', 'pint', 'matplotlib') "
+            "if i in sys.modules))"
+        )
+        result = run([sys.executable, "-c", code], capture_output=True, text=True)
+        assert result.returncode == 0
+        assert result.stdout.strip() == "", module
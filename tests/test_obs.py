@@ -1,5 +1,21 @@
-from py_eddy_tracker.observations.observation import EddiesObservations
+from py_eddy_tracker.observations.observation import (
+    EddiesObservations,
+    ObservationsBuffer,
+    NETCDF_PROFILES,
+    UNIT_FACTORS,
+    UNIT_FACTORS_STATS,
+    prewarm_unit_factors,
+    unit_factor,
+)
+from py_eddy_tracker.dataset.grid import RegularGridDataset
 from py_eddy_tracker.data import get_path
+from numpy import arange, ma, isnan, median, nan, nanmin, nanmax, ones
+from netCDF4 import Dataset, default_fillvals
+from pytest import raises, approx
+import zarr
+import sys
+from os import environ
+from subprocess import run
 
 a = EddiesObservations.load_file(get_path("Anticyclonic_20190223.nc"))
 c = EddiesObservations.load_file(get_path("Cyclonic_20190223.nc"))
@@ -10,5 +26,211 @@ def test_merge():
     assert len(new) == len(a) + len(c)
 
 
+def test_insert_observations():
+    new = a.index(arange(10))
+    first = new.obs
+    for i in range(10, 100, 10):
+        new = new + a.index(arange(i, i + 10))
+    assert (new.obs == a.obs[:100]).all()
+    assert new.buffer_capacity() >= 100
+    assert (first == a.obs[:10]).all()
+    new.insert_observations(a.index(arange(200, 205)), 3)
+    assert (new.obs[3:8] == a.obs[200:205]).all()
+    assert (new.obs[8:] == a.obs[3:100]).all()
+    new.shrink()
+    assert new.buffer_capacity() == 0 and len(new) == 105
+
+
+def test_unit_factors(tmp_path):
+    filename = str(tmp_path / "units.nc")
+    a.write_file(filename=filename)
+    with Dataset(filename, "a") as h:
+        h.variables["amplitude"].units = "centimeter"
+    prewarm_unit_factors([("kilometer", "m")])
+    assert UNIT_FACTORS[("kilometer", "m")] == 1000
+    cached = UNIT_FACTORS_STATS["cached"]
+    for i in range(3):
+        new = EddiesObservations.load_file(filename)
+        assert new.obs["amplitude"] == approx(a.obs["amplitude"] / 100)
+    assert UNIT_FACTORS[("centimeter", "m")] == approx(0.01)
+    assert UNIT_FACTORS_STATS["cached"] >= cached + 2
+    # No factor between units of different dimensions
+    assert unit_factor("m", "s") == 1
+    with raises(Exception):
+        unit_factor("m", "s", strict=True)
+
+
+def test_unit_factors_hash_seed():
+    # Case insensitive rules of pint depend on hash seed
+    code = (
+        "from py_eddy_tracker.observations.observation import unit_factor;"
+        "print(unit_factor('cm', 'm', True), unit_factor('cm/s', 'm/s', True),"
+        "unit_factor('m', 'cm', True))"
+    )
+    for seed in range(8):
+        result = run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            env=dict(environ, PYTHONHASHSEED=str(seed)),
+        )
+        assert result.returncode == 0, result.stderr
+        assert [float(i) for i in result.stdout.split()] == approx([0.01, 0.01, 100])
+
+
+def test_buffer():
+    buffer = ObservationsBuffer(EddiesObservations.new_like(a, 0), size=2)
+    for i in range(5):
+        i_obs = buffer.new_row()
+        buffer["amplitude"][i_obs] = a.obs["amplitude"][i]
+        buffer["contour_lon_e"][i_obs] = a.obs["contour_lon_e"][i]
+    new = buffer.to_observations()
+    assert len(new) == 5
+    assert (new.obs["amplitude"] == a.obs["amplitude"][:5]).all()
+    assert (new.obs["contour_lon_e"] == a.obs["contour_lon_e"][:5]).all()
+
+
+def test_interp_grid():
+    x, y = arange(0, 360, 0.25), arange(-80, 80, 0.25)
+    z = ma.ones((x.shape[0], y.shape[0]))
+    z.mask = z.data.copy() != 1
+    z.mask[:, y > 0] = True
+    g = RegularGridDataset.with_array(("x", "y"), dict(x=x, y=y, z=z), centered=True)
+    count = a.interp_grid(g, "z", method="count")
+    mean = a.interp_grid(g, "z", method="mean")
+    south = a.latitude < -10
+    assert (count[south] > 0).all()
+    assert (mean[south] == 1).all()
+    assert isnan(mean[a.latitude > 10]).all()
+    # Integer result can't store nan
+    max_ = a.interp_grid(g, "z", method="max", dtype="i2")
+    assert (max_[south] == 1).all()
+    assert (max_[a.latitude > 10] == 32767).all()
+    # Bool grid gives float result
+    g.vars["b"] = z > 0
+    mean = a.interp_grid(g, "b", method="mean")
+    assert mean.dtype == "f8"
+    assert (mean[south] == 1).all()
+    assert isnan(mean[a.latitude > 10]).all()
+    # Pixels are computed only once for a grid geometry
+    assert a.contours_pixels(g) is a.contours_pixels(g)
+
+
+def test_contours_pixels_file(tmp_path, caplog):
+    bins = ((-180, 180, 0.5), (-90, 90, 0.5))
+    count = a.grid_count(bins).grid("count")
+    for name in ("pixels.nc", "pixels.zarr"):
+        filename = str(tmp_path / name)
+        count_ = a.grid_count(bins, pixels_filename=filename).grid("count")
+        assert (count_ == count).all()
+        # Pixels are read in file
+        count_ = a.grid_count(bins, pixels_filename=filename).grid("count")
+        assert (count_ == count).all()
+        with raises(Exception):
+            c.grid_count(bins, pixels_filename=filename)
+    # Pixels of all contours are loaded, time_chunk can't be used
+    count_ = a.grid_count(bins, pixels_filename=filename, time_chunk=1).grid("count")
+    assert (count_ == count).all()
+    assert "time_chunk is not used" in caplog.text
+
+
+def test_grid_count_time_chunk():
+    new = a.merge(c)
+    new.time[:] = arange(len(new)) % 7
+    bins = ((0, 360, 0.5), (-80, 80, 0.5))
+    ref = new.grid_count(bins)
+    chunked = new.grid_count(bins, time_chunk=2)
+    assert ref.vars["count"].sum() > 0
+    assert (ref.vars["count"] == chunked.vars["count"]).all()
+    # Memory allows only one count grid, so only one thread
+    single = new.grid_count(bins, memory=0)
+    assert (ref.vars["count"] == single.vars["count"]).all()
+
+
+def test_grid_count_chunks():
+    bins = ((0, 360, 0.5), (-80, 80, 0.5))
+    for center in (False, True):
+        ref = a.grid_count(bins, center=center)
+        chunks = EddiesObservations.load_chunks(
+            get_path("Anticyclonic_20190223.nc"), 100
+        )
+        chunked = EddiesObservations.grid_count_chunks(chunks, bins, center=center)
+        assert ref.vars["count"].sum() > 0
+        assert (ref.vars["count"] == chunked.vars["count"]).all()
+
+
+def test_grid_stat():
+    bins = ((0, 370, 10), (-90, 100, 10))
+    g = a.grid_stat(bins, "amplitude")
+    g_all = a.grid_stat(
+        bins, ["amplitude", "radius_s"], ["mean", "std", "min", "max", "median"]
+    )
+    assert (g.vars["amplitude"] == g_all.vars["amplitude_mean"]).all()
+    count = a.grid_stat(bins, "amplitude", "count").vars["amplitude"]
+    assert count.sum() == len(a)
+    mean, std = g_all.vars["radius_s_mean"], g_all.vars["radius_s_std"]
+    assert (g_all.vars["radius_s_min"] <= mean).all()
+    assert (g_all.vars["radius_s_max"] >= mean).all()
+    assert (std[count == 1] == 0).all()
+    i, j = (count > 2).nonzero()
+    x = (a.longitude % 360) // 10 == i[0]
+    m = x * ((a.latitude + 90) // 10 == j[0])
+    assert g_all.vars["radius_s_median"][i[0], j[0]] == approx(
+        median(a["radius_s"][m])
+    )
+    assert std[i[0], j[0]] == approx(a["radius_s"][m].std())
+    g_t = a.grid_stat(bins, "amplitude", time_bins=[a.time.min(), a.time.max() + 1])
+    assert g_t.vars["amplitude"].shape == g.vars["amplitude"].shape + (1,)
+
+
+def test_write_profiles(tmp_path):
+    for profile in NETCDF_PROFILES:
+        filename = str(tmp_path / f"{profile}.nc")
+        a.write_file(filename=filename, profile=profile)
+        new = EddiesObservations.load_file(filename)
+        assert (new.obs["amplitude"] == a.obs["amplitude"]).all()
+        assert (new.obs["contour_lon_e"] == a.obs["contour_lon_e"]).all()
+    with raises(Exception):
+        a.write_file(filename=str(tmp_path / "wrong.nc"), profile="wrong")
+
+
+def test_write_min_max(tmp_path):
+    new = a.extract_with_mask(ones(len(a), dtype="bool"))
+    new.obs["lat"][3] = nan
+    new.obs["lat"][5] = default_fillvals["f4"]
+    new.obs["lon"][3] = default_fillvals["f8"]
+    filename = str(tmp_path / "min_max.nc")
+    new.write_file(filename=filename)
+    with Dataset(filename) as h:
+        for name in ("latitude", "longitude", "amplitude"):
+            v = h.variables[name]
+            assert v.min == approx(nanmin(v[:])) and v.max == approx(nanmax(v[:]))
+        assert h.variables["latitude"].max < 90
+
+
+def test_write_zarr_threads(tmp_path):
+    filename = str(tmp_path / "obs.zarr")
+    a.write_file(filename=filename, nthreads=2)
+    new = EddiesObservations.load_file(filename)
+    assert (new.obs["amplitude"] == a.obs["amplitude"]).all()
+    assert abs(new.obs["contour_lon_e"] - a.obs["contour_lon_e"]).max() < 1e-4
+    h = zarr.open(filename)
+    assert float(h["amplitude"].attrs["max"]) == approx(new.obs["amplitude"].max())
+
+
+def test_load_zarr_indexs(tmp_path):
+    filename = str(tmp_path / "obs.zarr")
+    a.write_file(filename=filename)
+    ref = EddiesObservations.load_file(filename)
+    assert ref.track_array_variables == a.track_array_variables
+    for rows in (slice(10, 200), slice(5, None, 7), arange(0, 500, 3)):
+        new = EddiesObservations.load_file(
+            filename, indexs=dict(obs=rows), nthreads=2
+        )
+        assert (new.obs == ref.obs[rows]).all()
+    chunks = EddiesObservations.load_chunks(filename, 1000)
+    assert sum(len(chunk) for chunk in chunks) == len(ref)
+
+
 # def test_write():
 #     with Dataset
@@ -1,5 +1,10 @@
-from py_eddy_tracker.poly import poly_area_vertice, fit_circle
-from numpy import array, pi
+from py_eddy_tracker.poly import (
+    poly_area_vertice,
+    fit_circle,
+    scanline_grid_in_poly,
+    winding_number_grid_in_poly,
+)
+from numpy import array, pi, arange, linspace, cos, sin, c_
 from pytest import approx
 
 # Vertices for next test
@@ -16,3 +21,15 @@ def test_fit_circle():
     assert y0 == approx(-9.5, rel=1e-10)
     assert r == approx(2 ** 0.5 / 2, rel=1e-10)
     assert err == approx((1 - 2 / pi) * 100, rel=1e-10)
+
+
+def test_scanline_grid_in_poly():
+    # Star polygon with self intersections
+    angle = linspace(0, 4 * pi, 11)
+    radius = 1 + 0.5 * cos(angle * 3)
+    vertices = c_[3 * radius * cos(angle), 2 * radius * sin(angle)]
+    x, y = arange(-5, 5, 0.07), arange(-4, 4, 0.05)
+    i, j = winding_number_grid_in_poly(x, y, 3, 3 + x.size, 1000, 7, vertices)
+    i_, j_ = scanline_grid_in_poly(x, y, 3, 3 + x.size, 1000, 7, vertices)
+    assert i.size > 0
+    assert (i == i_).all() and (j == j_).all()
@@ -0,0 +1,108 @@
+from py_eddy_tracker.observations.observation import EddiesObservations
+from py_eddy_tracker.observations.tracking import TrackEddiesObservations
+from py_eddy_tracker.data import get_path
+from numpy import arange, concatenate, isin
+from pytest import raises
+
+a = EddiesObservations.load_file(get_path("Anticyclonic_20190223.nc"))
+
+
+def build_tracks(nb_track=50):
+    # Track i start at day i % 20 and last i % 15 + 1 days
+    length = arange(nb_track) % 15 + 1
+    nb = length.sum()
+    tracks = TrackEddiesObservations(
+        nb,
+        track_array_variables=a.track_array_variables,
+        array_variables=a.array_variables,
+    )
+    i_first = concatenate(((0,), length.cumsum()[:-1]))
+    n = arange(nb) - i_first.repeat(length)
+    for name in tracks.obs.dtype.names:
+        if name in a.obs.dtype.names:
+            tracks.obs[name] = a.obs[name][:nb]
+    tracks.obs["track"] = arange(nb_track).repeat(length)
+    tracks.obs["n"] = n
+    tracks.obs["time"] = 25000 + (arange(nb_track) % 20).repeat(length) + n
+    tracks.sign_type = 1
+    return tracks
+
+
+def test_partitions(tmp_path):
+    tracks = build_tracks()
+    tracks.write_file(filename=str(tmp_path / "tracks.nc"))
+    tracks = TrackEddiesObservations.load_file(str(tmp_path / "tracks.nc"))
+    directory = str(tmp_path / "store")
+    tracks.write_partitions(directory, time_chunk=7)
+    new = TrackEddiesObservations.load_partitions(directory)
+    assert (new.obs == tracks.obs).all()
+
+    period = (25010, 25015)
+    m = (tracks.time >= period[0]) * (tracks.time <= period[1])
+    m_track = m * isin(tracks.tracks, [3, 4, 5, 30])
+    for kwargs, mask in (
+        (dict(period=period), m),
+        (dict(period=period, tracks=[3, 4, 5, 30]), m_track),
+    ):
+        for full_path in (False, True):
+            ref = tracks.extract_with_mask(mask, full_path=full_path)
+            new = TrackEddiesObservations.load_partitions(
+                directory, full_path=full_path, **kwargs
+            )
+            assert len(new) == len(ref)
+            assert (new.obs == ref.obs).all()
+
+    area = dict(llcrnrlon=-20, llcrnrlat=-40, urcrnrlon=120, urcrnrlat=20)
+    ref = tracks.extract_with_area(area)
+    new = TrackEddiesObservations.load_partitions(directory, area=area)
+    assert len(new) == len(ref)
+    assert (new.obs == ref.obs).all()
+    assert len(TrackEddiesObservations.load_partitions(directory, tracks=[500])) == 0
+
+
+def test_track_index(tmp_path):
+    tracks = build_tracks()
+    for extension in ("nc", "zarr"):
+        filename = str(tmp_path / f"tracks.{extension}")
+        tracks.write_file(filename=filename)
+        first_index, nb_obs = TrackEddiesObservations.load_track_index(filename)
+        assert (first_index == tracks.index_from_track).all()
+        assert (nb_obs == tracks.nb_obs_by_track).all()
+        new = TrackEddiesObservations.load_file(filename)
+        assert (new.nb_obs_by_track == tracks.nb_obs_by_track).all()
+        ids = [3, 4, 10, 49, 500]
+        ref = new.extract_ids(ids)
+        assert len(ref) == tracks.nb_obs_by_track[[3, 4, 10, 49]].sum()
+        selection = TrackEddiesObservations.load_file(filename, tracks=ids)
+        assert (selection.obs == ref.obs).all()
+        assert len(TrackEddiesObservations.load_file(filename, tracks=[500])) == 0
+
+
+def test_concatenate_files(tmp_path):
+    filenames = list()
+    for i in range(3):
+        tracks = build_tracks(20 + i)
+        tracks.obs["time"] += i
+        filenames.append(str(tmp_path / f"tracks_{i}.nc"))
+        tracks.write_file(filename=filenames[-1])
+    kwargs = dict(raw_data=True, callback=TrackEddiesObservations.add_rotation_type)
+    ref = TrackEddiesObservations.load_file(filenames[0], raw_data=True)
+    ref = ref.add_rotation_type()
+    for filename in filenames[1:]:
+        other = TrackEddiesObservations.load_file(filename, raw_data=True)
+        ref = ref.merge(other.add_rotation_type())
+    out = str(tmp_path / "merged.nc")
+    for new in (
+        TrackEddiesObservations.concatenate_files(filenames, **kwargs),
+        TrackEddiesObservations.concatenate_files(filenames, nb_process=2, **kwargs),
+        TrackEddiesObservations.concatenate_files(filenames, out=out, **kwargs),
+    ):
+        if new is None:
+            new = TrackEddiesObservations.load_file(out, raw_data=True)
+        assert len(new) == len(ref)
+        for name in ref.obs.dtype.names:
+            assert (new.obs[name] == ref.obs[name]).all()
+    with raises(Exception):
+        TrackEddiesObservations.concatenate_files(
+            filenames, out=str(tmp_path / "merged.zarr"), **kwargs
+        )